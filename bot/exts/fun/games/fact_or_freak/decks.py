@@ -0,0 +1,178 @@
+from __future__ import annotations
+from bot.utils.database import MeteredPool
+from bot.utils.minhash import MinHashIndex
+from random import randint, random, shuffle
+from sqlite3 import Row
+from weakref import WeakSet
+
+# For clarity in typehints
+type QuestionID = int
+type PileKey = tuple[int, int]
+"A tuple of `(category, addressed_to)`, where `addressed_to` is -1 for questions meant for everyone."
+
+class QuestionBank:
+    """
+    An in-memory index of every question ID, grouped by category
+    and who the question is addressed to.
+
+    Questions are identified by their `question_id` in the `questions` table,
+    so drawing one never needs to sort or scan the table.
+    """
+
+    pool: MeteredPool
+
+    _piles: dict[PileKey, list[QuestionID]] = {}
+    _keys: dict[QuestionID, PileKey] = {}
+    _decks: WeakSet[QuestionDeck] = WeakSet()
+
+    _similar = MinHashIndex()
+    "Every question's text, for finding near duplicates of new submissions."
+
+    @classmethod
+    async def load(cls, pool: MeteredPool) -> None:
+        "Index every question in the database."
+
+        cls.pool = pool
+
+        async with pool.acquire() as conn:
+            rows = await conn.fetchall("SELECT question_id, category, addressed_to, content FROM questions")
+
+        piles: dict[PileKey, list[QuestionID]] = {}
+        keys: dict[QuestionID, PileKey] = {}
+        similar = MinHashIndex()
+
+        for row in rows:
+            key = keys[row["question_id"]] = (row["category"], row["addressed_to"])
+            piles.setdefault(key, []).append(row["question_id"])
+            similar.add(row["question_id"], row["content"])
+
+        cls._piles = piles
+        cls._keys = keys
+        cls._similar = similar
+
+    @classmethod
+    def add(cls, question_id: QuestionID, category: int, content: str, addressed_to: int = -1) -> None:
+        """
+        Add a newly submitted question to the bank, and shuffle it
+        into the decks of any games in progress.
+        """
+
+        key = (category, addressed_to)
+
+        cls._piles.setdefault(key, []).append(question_id)
+        cls._keys[question_id] = key
+        cls._similar.add(question_id, content)
+
+        for deck in cls._decks:
+            deck._insert(key, question_id)
+
+    @classmethod
+    def discard(cls, question_id: QuestionID) -> None:
+        """
+        Drop a question that's no longer in the database. Decks that already
+        hold it will skip it once they draw it and find it's gone.
+        """
+
+        if (key := cls._keys.pop(question_id, None)) is not None and question_id in cls._piles.get(key, ()):
+            cls._piles[key].remove(question_id)
+
+    @classmethod
+    def closest(cls, content: str) -> tuple[QuestionID, float] | None:
+        """
+        Returns the ID of the question most like `content`, ignoring case,
+        punctuation and spacing, with their estimated similarity from 0 to 1.
+
+        Returns `None` if no question is similar enough to count as a near duplicate.
+        """
+
+        return cls._similar.closest(content)
+
+    @classmethod
+    def count(cls, key: PileKey) -> int:
+        "Returns the number of questions in the bank for `key`."
+
+        return len(cls._piles.get(key, ()))
+
+    @classmethod
+    async def fetch(cls, question_id: QuestionID) -> Row | None:
+        "Fetch a question's data by its ID."
+
+        async with cls.pool.acquire() as conn:
+            req = await conn.execute(
+                """
+                SELECT
+                    submitter_id,
+                    when_submitted,
+                    category,
+                    content
+                FROM questions
+                WHERE question_id = ?
+                """,
+                question_id
+            )
+
+            return await req.fetchone()
+
+
+class QuestionDeck:
+    """
+    A single game's shuffled draw piles.
+
+    Questions are drawn without replacement, so nobody sees a repeat
+    until every question in a pile has been asked, at which point the
+    pile is reshuffled.
+    """
+
+    def __init__(self) -> None:
+        self._piles: dict[PileKey, list[QuestionID]] = {}
+
+        QuestionBank._decks.add(self)
+
+    def _pile(self, key: PileKey) -> list[QuestionID]:
+        pile = self._piles.get(key)
+
+        if not pile:
+            pile = self._piles[key] = QuestionBank._piles.get(key, []).copy()
+            shuffle(pile)
+
+        return pile
+
+    def _insert(self, key: PileKey, question_id: QuestionID) -> None:
+        pile = self._piles.get(key)
+
+        # Piles that haven't been dealt yet will pick the question up when they are
+        if pile:
+            pile.insert(randint(0, len(pile)), question_id)
+
+    def put_back(self, question_id: QuestionID) -> None:
+        "Shuffle a drawn question that was never asked back into its pile."
+
+        key = QuestionBank._keys.get(question_id)
+
+        pile = self._piles.get(key)
+
+        # The pile may have been re-dealt, with the question in it again, since it was drawn
+        if pile is not None and question_id not in pile:
+            pile.insert(randint(0, len(pile)), question_id)
+
+    def draw(self, category: int, player_id: int) -> QuestionID | None:
+        """
+        Draw a question in `category` for `player_id`, or `None` if there
+        aren't any.
+
+        Questions addressed to the player are drawn as often as they
+        would be if they were mixed in with the ones for everyone.
+        """
+
+        general = QuestionBank.count((category, -1))
+        addressed = QuestionBank.count((category, player_id))
+
+        if not general + addressed:
+            return None
+
+        key = (category, player_id) if random() * (general + addressed) < addressed else (category, -1)
+
+        return self._pile(key).pop()
+
+    def __repr__(self) -> str:
+        return f"<QuestionDeck piles={len(self._piles)} remaining={sum(map(len, self._piles.values()))}>"
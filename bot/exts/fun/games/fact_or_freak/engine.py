@@ -0,0 +1,82 @@
+from bot.utils.turns import Effect, Event, TurnEngine
+
+class FactOrFreakEngine(TurnEngine):
+    """
+    The rules of Fact-or-Freak.
+
+    Each turn, the current player picks a category, then answers or
+    passes on a question from it. Passing or running out of time costs
+    a life. After answering, the player picks who goes next. If there
+    are no questions in the category, the turn goes to someone else.
+    """
+
+    __slots__ = ()
+
+    PHASES = ("waiting", "choosing_category", "answering", "choosing_next_player", "over")
+
+    LIVES = 3
+
+    def __init__(self, player_ids: list[int], **kwargs) -> None:
+        super().__init__(player_ids, self.LIVES, **kwargs)
+
+    def on_turn_start(self) -> list[Effect]:
+        self.phase = "choosing_category"
+
+        return [Effect("prompt_category", self.current)]
+
+    def after_lost_life(self, effects: list[Effect]) -> list[Effect]:
+        "Take a life for a failed turn, and hand the turn to a random player if the game goes on."
+
+        effects += self.lose_life()
+
+        if self.is_over:
+            return effects
+
+        return effects + self.begin_turn(self.rng.choice(list(self.lives)))
+
+    def transition(self, event: Event) -> list[Effect]:
+        match self.phase, event.kind:
+            case "waiting", "start":
+                return self.begin_turn(self.current)
+
+            case "choosing_category", "category_chosen":
+                self.phase = "answering"
+
+                return [Effect("show_question", self.current, event.value)]
+
+            case "choosing_category", "timed_out":
+                return self.after_lost_life([])
+
+            case "answering", "answered":
+                self.phase = "choosing_next_player"
+
+                return [
+                    Effect("show_answer", self.current, event.value),
+                    Effect("prompt_next_player", self.current)
+                ]
+
+            case "answering", "no_question":
+                # Nobody's at fault for an empty category, so no life is lost
+                chosen = self.rng.choice([p for p in self.lives if p != self.current])
+
+                return [Effect("keep_prefetch", chosen)] + self.begin_turn(chosen)
+
+            case "answering", "passed":
+                return self.after_lost_life([Effect("show_passed", self.current)])
+
+            case "answering", "timed_out":
+                return self.after_lost_life([Effect("show_answer_timed_out", self.current)])
+
+            case "choosing_next_player", "next_player_chosen":
+                return [Effect("keep_prefetch", event.value)] + self.begin_turn(event.value)
+
+            case "choosing_next_player", "timed_out":
+                chosen = self.rng.choice([p for p in self.lives if p != self.current])
+
+                return [
+                    Effect("show_random_next_player", self.current, chosen),
+                    Effect("keep_prefetch", chosen)
+                ] + self.begin_turn(chosen)
+
+        # Stale events, like a view from an earlier phase stopping late, are ignored
+        return []
@@ -6,6 +6,8 @@ from discord.app_commands import command as app_command, rename as arg_rename, d
 from discord.ext.commands import Cog, CommandInvokeError
 from .enums import LobbyExitCodes
 from .views.game_ui import GameUI
+from .views.pass_on_turn import PageButton, PlayerSelect
+from bot.utils.game_threads import GameThreads
 from bot.utils.lobby import Lobby
 from .statistics import UpdateStatistics as Stats
 
@@ -18,8 +20,11 @@ class FactOrFreakGame(Cog):
     @allowed_contexts(guilds = True, dms = False, private_channels = False)
     @app_command(name = "play", description = "Play a game of Fact-or-Freak.")
     @arg_rename(lobby_name = "name")
-    @arg_describe(lobby_name = "Set a custom name for the lobby you're about to create.")
-    async def play_game(self, interaction: Interaction, lobby_name: str | None = None):
+    @arg_describe(
+        lobby_name = "Set a custom name for the lobby you're about to create.",
+        thread = "Whether to play in a thread of its own. On by default."
+    )
+    async def play_game(self, interaction: Interaction, lobby_name: str | None = None, thread: bool = True):
         if interaction.user in Lobby.in_lobbies:
             return await interaction.response.send_message(
                 embed = Embed(
@@ -95,25 +100,29 @@ class FactOrFreakGame(Cog):
             case LobbyExitCodes.LeaderLeft:
                 return
 
-        game = GameUI(
-            members = lobby.members,
-            bot = self.bot
-        )
-
         player_ids = [m.id for m in lobby.members]
 
+        game = GameUI(self.bot, player_ids)
+
         await Stats.create_new_users(player_ids)
         
-        await Stats.update_on_lobby_start(player_ids)
+        await Stats.update_on_lobby_start(player_ids, lobby.leader.id, game.session_id, interaction.guild_id)
 
-        await game.run(interaction.channel) # type: ignore
+        channel = interaction.channel
 
-        await Stats.update_on_game_end(
-            player_ids,
-            game._end_time, # type: ignore
-            game.runtime
-        )
+        # Games in their own threads get their own rate limit buckets
+        if thread:
+            channel = await GameThreads.open(
+                await interaction.original_response(),
+                f"Fact-or-Freak: {lobby_name.removesuffix(' [Players Waiting]')}"
+            ) or channel
+
+        # The game plays out through the dispatcher, which also records the end-of-game statistics
+        game.start(channel) # type: ignore
 
 
 async def setup(bot):
+    # Lets every game's player picker be found from its custom ID, even after a restart
+    bot.add_dynamic_items(PlayerSelect, PageButton)
+
     await bot.add_cog(FactOrFreakGame(bot))
\ No newline at end of file
@@ -1,3 +1,8 @@
+from .aggregates import *
+from .badges import *
 from .display import *
+from .events import *
+from .leaderboard import *
 from .menu import *
+from .rollups import *
 from .update import *
\ No newline at end of file
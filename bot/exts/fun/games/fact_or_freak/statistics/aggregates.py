@@ -0,0 +1,123 @@
+from bot.utils.database import MeteredPool
+from dataclasses import dataclass
+from logging import getLogger
+from time import perf_counter, time
+import numpy as np
+
+logger = getLogger(__name__)
+
+@dataclass(frozen = True, slots = True)
+class GlobalSummary:
+    "Statistics across every player who's played at least one game."
+
+    players: int
+
+    ranked: int
+    "The number of players with enough games for their win rate to count."
+
+    win_rate_bins: tuple[int, ...]
+    "How many ranked players have a win rate in each tenth, from 0-10% up to 90-100%."
+
+    median_win_rate: float
+    median_play_time: int
+
+    truths: int
+    dares: int
+    passes: int
+
+    computed_at: int
+    took: float
+    "How long loading and aggregating took, in seconds."
+
+    @property
+    def truth_share(self) -> float:
+        "The fraction of categories chosen that were truths."
+
+        return self.truths / (self.truths + self.dares) if self.truths + self.dares else 0.0
+
+    @property
+    def pass_rate(self) -> float:
+        "The fraction of questions that were passed on rather than answered."
+
+        return self.passes / (self.truths + self.dares) if self.truths + self.dares else 0.0
+
+
+class GlobalStatistics:
+    """
+    Works out a `GlobalSummary` from the whole `statistics` table.
+
+    Each column is read as one comma-separated string and parsed straight
+    into a NumPy array, so the work stays in bulk however many players
+    there are. The summary is kept until `UpdateStatistics` next writes
+    to the table.
+    """
+
+    reader: MeteredPool
+
+    MIN_GAMES = 5
+    "How many games a player needs before their win rate counts, the same as the win rate leaderboard."
+
+    COLUMNS = ("games_played", "games_won", "play_time", "truths_selected", "dares_selected", "passes_made")
+
+    _summary: GlobalSummary | None = None
+
+    _generation = 0
+    "Bumped on every invalidation, so a summary worked out from data that's since changed isn't kept."
+
+    computes = 0
+    "The number of times the summary has been worked out since the bot started."
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls._summary = None
+        cls._generation += 1
+
+    @classmethod
+    async def _load(cls) -> dict[str, np.ndarray]:
+        async with cls.reader.acquire() as conn:
+            row = await conn.fetchone(
+                f"SELECT {', '.join(f"group_concat({column}) AS {column}" for column in cls.COLUMNS)} FROM statistics WHERE games_played > 0"
+            )
+
+        return {
+            column: np.fromstring(row[column], dtype = np.int64, sep = ',') if row[column] else np.zeros(0, dtype = np.int64)
+            for column in cls.COLUMNS
+        }
+
+    @classmethod
+    async def get(cls) -> GlobalSummary:
+        "Returns the current summary, working it out again if the table has changed since."
+
+        if cls._summary is not None:
+            return cls._summary
+
+        generation = cls._generation
+        started = perf_counter()
+        data = await cls._load()
+
+        played = data["games_played"]
+        ranked = played >= cls.MIN_GAMES
+        rates = data["games_won"][ranked] / played[ranked]
+
+        bins, _ = np.histogram(rates, bins = 10, range = (0.0, 1.0))
+
+        summary = GlobalSummary(
+            players = len(played),
+            ranked = len(rates),
+            win_rate_bins = tuple(bins.tolist()),
+            median_win_rate = float(np.median(rates)) if len(rates) else 0.0,
+            median_play_time = int(np.median(data["play_time"])) if len(played) else 0,
+            truths = int(data["truths_selected"].sum()),
+            dares = int(data["dares_selected"].sum()),
+            passes = int(data["passes_made"].sum()),
+            computed_at = int(time()),
+            took = perf_counter() - started
+        )
+
+        cls.computes += 1
+        logger.debug(f"Worked out global statistics for {len(played)} players in {summary.took:.3f}s")
+
+        if generation == cls._generation:
+            cls._summary = summary
+
+        return summary
@@ -0,0 +1,138 @@
+from asqlite import Connection
+from bot.utils.database import MeteredPool
+from collections import Counter
+from dataclasses import dataclass
+from ..decals import BRONZE, SILVER, GOLD, DIAMOND
+from logging import getLogger
+from time import time
+
+logger = getLogger(__name__)
+
+@dataclass(frozen = True, slots = True)
+class BadgeRule:
+    "A badge earned once a column in the `statistics` table reaches a threshold."
+
+    key: str
+    "The name the badge is stored under in the `user_badges` table."
+
+    family: str
+    "What the badge is for, like `wins`. Only the best badge of each family is shown."
+
+    column: str
+    "The `statistics` column the badge is earned from."
+
+    threshold: int
+
+    emoji: str
+
+    @property
+    def condition(self) -> str:
+        return f"{self.column} >= {self.threshold}"
+
+
+BADGE_RULES: list[BadgeRule] = [
+    BadgeRule("wins_bronze",  "wins",  "games_won",  1, BRONZE),
+    BadgeRule("wins_silver",  "wins",  "games_won", 10, SILVER),
+    BadgeRule("wins_gold",    "wins",  "games_won", 25, GOLD),
+    BadgeRule("wins_diamond", "wins",  "games_won", 50, DIAMOND),
+
+    BadgeRule("play_time_bronze",  "play_time", "play_time",  3 * 60 * 60, BRONZE),
+    BadgeRule("play_time_silver",  "play_time", "play_time",  6 * 60 * 60, SILVER),
+    BadgeRule("play_time_gold",    "play_time", "play_time", 12 * 60 * 60, GOLD),
+    BadgeRule("play_time_diamond", "play_time", "play_time", 24 * 60 * 60, DIAMOND)
+]
+"""
+Every badge that can be earned, from worst to best within each family.
+
+New rules can be added anywhere, and are awarded to everyone who already
+qualifies by `Badges.backfill` the next time the bot starts.
+"""
+
+class Badges:
+    """
+    Awards the badges in `BADGE_RULES`.
+
+    Badges are checked when `UpdateStatistics` writes the columns their
+    rules depend on, rather than whenever someone looks at their
+    statistics, and are stored in the `user_badges` table once earned.
+    """
+
+    reader: MeteredPool
+
+    RULES_BY_COLUMN: dict[str, list[BadgeRule]] = {
+        column: [rule for rule in BADGE_RULES if rule.column == column]
+        for column in {rule.column for rule in BADGE_RULES}
+    }
+    "Every rule, keyed by the column it depends on."
+
+    awarded = 0
+    "The number of badges awarded since the bot started, not counting backfills."
+
+    @classmethod
+    async def evaluate(cls, conn: Connection, changes: dict[int, Counter[str]]) -> None:
+        """
+        Award any badges the users in `changes` have just earned, checking only
+        rules for the columns that changed for each user.
+
+        This is run on the same connection, and in the same transaction, as
+        the write that changed them.
+        """
+
+        now = int(time())
+        candidates: dict[BadgeRule, list[tuple[str, int, int]]] = {}
+
+        for user_id, columns in changes.items():
+            for column in columns:
+                for rule in cls.RULES_BY_COLUMN.get(column, ()):
+                    candidates.setdefault(rule, []).append((rule.key, now, user_id))
+
+        for rule, rows in candidates.items():
+            cursor = await conn.executemany(
+                f"""
+                INSERT OR IGNORE INTO user_badges (user_id, badge, earned_at)
+                SELECT user_id, ?, ? FROM statistics
+                WHERE user_id = ? AND {rule.condition}
+                """,
+                rows
+            )
+
+            cls.awarded += cursor.get_cursor().rowcount
+
+    @classmethod
+    async def backfill(cls, conn: Connection, rules: list[BadgeRule] = BADGE_RULES) -> int:
+        """
+        Award every badge in `rules` to everyone who qualifies but doesn't
+        have it yet, in a single statement over the `statistics` table.
+
+        Returns the number of badges awarded.
+        """
+
+        cursor = await conn.execute(
+            "INSERT OR IGNORE INTO user_badges (user_id, badge, earned_at)\n"
+          + "\nUNION ALL\n".join(f"SELECT user_id, '{rule.key}', :now FROM statistics WHERE {rule.condition}" for rule in rules),
+            {"now": int(time())}
+        )
+
+        awarded = cursor.get_cursor().rowcount
+
+        if awarded:
+            logger.info(f"Backfilled {awarded} badges")
+
+        return awarded
+
+    @classmethod
+    async def fetch(cls, user_id: int) -> dict[str, tuple[BadgeRule, int]]:
+        "Returns the best badge `user_id` has earned in each family, with when they earned it, keyed by family."
+
+        async with cls.reader.acquire() as conn:
+            rows = await conn.fetchall("SELECT badge, earned_at FROM user_badges WHERE user_id = ?", user_id)
+
+        earned = {row["badge"]: row["earned_at"] for row in rows}
+        best: dict[str, tuple[BadgeRule, int]] = {}
+
+        # Rules are listed from worst to best, so better badges overwrite worse ones
+        for rule in BADGE_RULES:
+            if rule.key in earned:
+                best[rule.family] = (rule, earned[rule.key])
+
+        return best
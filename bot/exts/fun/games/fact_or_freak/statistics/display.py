@@ -1,44 +1,76 @@
 from bot import MyBot
-from discord import Interaction, Member
-from discord.app_commands import command as app_command
+from discord import Embed, Interaction, Member
+from discord.app_commands import command as app_command, Group
 from discord.ext.commands import Cog
-from . import StatisticsPageMenu, UpdateStatistics as Stats
+from . import GlobalStatistics, StatisticsPageMenu, UpdateStatistics as Stats
+from .menu import format_seconds
 
 class DisplayStatistics(Cog):
     def __init__(self, bot: MyBot) -> None:
         self.bot = bot
         self.pool = bot.pool
     
-    @app_command(name = "statistics", description = "View all your statistics on Fact-or-Freak.")
+    statistics = Group(name = "statistics", description = "View statistics on Fact-or-Freak.")
+
+    @statistics.command(name = "player", description = "View all your statistics on Fact-or-Freak.")
     async def show_statistics(self, interaction: Interaction, member: Member | None = None):
-        if member:
-            if not await Stats.user_is_present(member.id):
-                return await interaction.response.send_message(
-                    "The person you chose doesn't have any statistics!",
-                    ephemeral = True
-                )
-        
-        else:
-            if not await Stats.user_is_present(interaction.user.id):
-                return await interaction.response.send_message(
-                    "You don't have any statistics!",
-                    ephemeral = True
-                )
+        target = member or interaction.user
+        data = await Stats.fetch(target.id)
+
+        if data is None:
+            return await interaction.response.send_message(
+                "The person you chose doesn't have any statistics!" if member else "You don't have any statistics!",
+                ephemeral = True
+            )
         
         menu = StatisticsPageMenu(
             owner = interaction.user, # type: ignore
-            target = member or interaction.user # type: ignore
+            target = target, # type: ignore
+            data = data
         )
-        
-        await menu.create_pages()
 
         await interaction.response.send_message(
-            embed = menu.pages[0],
+            embed = await menu.page(0),
             view = menu
         )
 
         if await menu.wait():
             await interaction.delete_original_response()
+
+    @statistics.command(name = "global", description = "See how everyone plays Fact-or-Freak.")
+    async def show_global_statistics(self, interaction: Interaction):
+        summary = await GlobalStatistics.get()
+        peak = max(summary.win_rate_bins, default = 0)
+
+        # One row per tenth of win rate, with bars scaled to the most common
+        distribution = '\n'.join(
+            f"{tenth * 10:>3}%  {'█' * round(count / peak * 20) if peak else ''} {count}"
+            for tenth, count in enumerate(summary.win_rate_bins)
+        )
+
+        await interaction.response.send_message(
+            embed = Embed(
+                title = "🌍 Global Statistics",
+                description = f"Across **{summary.players}** players.",
+                colour = 0x5865F2
+            ).add_field(
+                name = "Win Rates",
+                value = f"```\n{distribution}\n```Median: **{summary.median_win_rate:.1%}**, of {summary.ranked} players with {GlobalStatistics.MIN_GAMES}+ games.",
+                inline = False
+            ).add_field(
+                name = "Median Time Played",
+                value = format_seconds(summary.median_play_time)
+            ).add_field(
+                name = "Truth or Dare?",
+                value = f"{summary.truth_share:.0%} truths, {1 - summary.truth_share:.0%} dares"
+                    if summary.truths + summary.dares else "Nothing chosen yet."
+            ).add_field(
+                name = "Pass Rate",
+                value = f"{summary.pass_rate:.1%} of questions were passed on."
+            ).set_footer(
+                text = f"Worked out in {summary.took * 1000:.0f}ms"
+            )
+        )
     
     @app_command(name = "badges", description = "See a list of badges you can achieve in this bot.")
     async def show_badges(self, interaction: Interaction):
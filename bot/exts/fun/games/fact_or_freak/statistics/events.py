@@ -0,0 +1,192 @@
+from asqlite import Connection
+from bot.utils.database import MeteredPool
+from collections import Counter
+from dataclasses import dataclass, field
+from ..enums import CategorySelectionResponse
+from logging import getLogger
+from time import time
+
+logger = getLogger(__name__)
+
+type EventRow = tuple[int, int | None, int, str, int | None, int | None, int]
+
+@dataclass(slots = True)
+class ReplayReport:
+    "What replaying the `game_events` log found."
+
+    events: int = 0
+    "The number of events read."
+
+    users: int = 0
+    "The number of users the log has events for."
+
+    mismatched: list[int] = field(default_factory = list)
+    "The IDs of users whose row in `statistics` doesn't match the log."
+
+    applied: bool = False
+    "Whether the `statistics` table was overwritten with the log's totals."
+
+
+class GameEvents:
+    """
+    An append-only log of everything that happens in a game, stored in
+    the `game_events` table.
+
+    Events are written in the same transaction as the counters they
+    affect - most are buffered and written by `UpdateStatistics.flush` -
+    so the `statistics` table can always be rebuilt from the log, on top
+    of the `statistics_baseline` table of totals from before it, with `replay`.
+    """
+
+    KINDS = ("lobby_start", "category_chosen", "answered", "passed", "timed_out", "death", "win", "game_end")
+
+    COLUMNS = (
+        "games_played", "lobbies_made", "games_won", "games_lost", "truths_selected", "dares_selected",
+        "truths_answered", "dares_completed", "passes_made", "play_time"
+    )
+    "The `statistics` columns that can be worked out from the log."
+
+    REPLAY_BATCH = 5000
+    "How many events `replay` reads from the database at a time."
+
+    _pending: list[EventRow] = []
+
+    recorded = 0
+    "The number of events recorded since the bot started."
+
+    @classmethod
+    def event(cls, kind: str, session_id: int, user_id: int, guild_id: int | None = None, question_id: int | None = None, value: int | None = None) -> EventRow:
+        "Returns an event as the row it's written as, to be written with `write` straight away rather than buffered."
+
+        if kind not in cls.KINDS:
+            raise ValueError(f"Invalid game event kind: '{kind}'")
+
+        cls.recorded += 1
+
+        return (session_id, guild_id, user_id, kind, question_id, value, int(time()))
+
+    @classmethod
+    def record(cls, kind: str, session_id: int, user_id: int, guild_id: int | None = None, question_id: int | None = None, value: int | None = None) -> None:
+        "Buffer an event to be written with the next statistics flush."
+
+        cls._pending.append(cls.event(kind, session_id, user_id, guild_id, question_id, value))
+
+    @classmethod
+    def buffer_depth(cls) -> int:
+        return len(cls._pending)
+
+    @classmethod
+    def take(cls) -> list[EventRow]:
+        "Remove and return every buffered event."
+
+        pending, cls._pending = cls._pending, []
+        return pending
+
+    @classmethod
+    def put_back(cls, events: list[EventRow]) -> None:
+        "Buffer `events` again after a flush failed, ahead of any recorded since."
+
+        cls._pending = events + cls._pending
+
+    @classmethod
+    async def write(cls, conn: Connection, events: list[EventRow]) -> None:
+        await conn.executemany(
+            """
+            INSERT INTO game_events (session_id, guild_id, user_id, kind, question_id, value, occurred_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            events
+        )
+
+    @staticmethod
+    def materialize(totals: Counter[str], kind: str, value: int | None) -> None:
+        "Apply one event's effect on a user's `statistics` row to `totals`."
+
+        match kind, value:
+            case "lobby_start", _:
+                totals["games_played"] += 1
+                totals["lobbies_made"] += int(value == 1)
+
+            case "category_chosen", CategorySelectionResponse.ChoseTruth.value: totals["truths_selected"] += 1
+            case "category_chosen", CategorySelectionResponse.ChoseDare.value:  totals["dares_selected"] += 1
+            case "answered", CategorySelectionResponse.ChoseTruth.value:        totals["truths_answered"] += 1
+            case "answered", CategorySelectionResponse.ChoseDare.value:         totals["dares_completed"] += 1
+
+            case "passed",   _: totals["passes_made"] += 1
+            case "death",    _: totals["games_lost"] += 1
+            case "win",      _: totals["games_won"] += 1
+            case "game_end", _: totals["play_time"] += value or 0
+
+    @classmethod
+    async def replay(cls, reader: MeteredPool, pool: MeteredPool, apply: bool = False) -> ReplayReport:
+        """
+        Work out every user's statistics from their baseline and the log,
+        reading it a batch at a time, and compare them to the `statistics` table.
+
+        Everything is read from `reader` in one transaction, so the log and
+        the table are compared as of the same moment. If `apply` is set, the
+        difference is added to the row of every user that doesn't match, in
+        one transaction on `pool`, so anything written since isn't lost.
+        """
+
+        report = ReplayReport()
+        totals: dict[int, Counter[str]] = {}
+        last_played: dict[int, int] = {}
+        columns = cls.COLUMNS
+        through = 0
+
+        async with reader.acquire() as conn:
+            async with conn.transaction():
+                # Everyone's totals from before the log started, and the last event they already include
+                for row in await conn.fetchall(f"SELECT user_id, through_event_id, when_last_played, {', '.join(columns)} FROM statistics_baseline"):
+                    totals[row["user_id"]] = Counter({column: row[column] for column in columns})
+                    last_played[row["user_id"]] = row["when_last_played"]
+                    through = row["through_event_id"]
+
+                cursor = await conn.execute(
+                    "SELECT user_id, kind, value, occurred_at FROM game_events WHERE event_id > ? ORDER BY event_id",
+                    through
+                )
+
+                while rows := await cursor.fetchmany(cls.REPLAY_BATCH):
+                    report.events += len(rows)
+
+                    for row in rows:
+                        cls.materialize(totals.setdefault(row["user_id"], Counter()), row["kind"], row["value"])
+
+                        if row["kind"] == "game_end":
+                            last_played[row["user_id"]] = row["occurred_at"]
+
+                current = {
+                    row["user_id"]: row
+                    for row in await conn.fetchall(f"SELECT user_id, {', '.join(columns)} FROM statistics")
+                }
+
+        report.users = len(totals)
+        corrections: list[tuple] = []
+
+        for user_id, counts in totals.items():
+            row = current.get(user_id)
+
+            if row is None or any(row[column] != counts[column] for column in columns):
+                report.mismatched.append(user_id)
+                corrections.append((user_id, last_played.get(user_id), *(counts[column] - (row[column] if row else 0) for column in columns)))
+
+        if apply and corrections:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(
+                        f"""
+                        INSERT INTO statistics (user_id, when_last_played, {', '.join(columns)})
+                        VALUES (?, ?, {', '.join('?' for _ in columns)})
+                        ON CONFLICT (user_id) DO UPDATE SET
+                            when_last_played = COALESCE(MAX(when_last_played, excluded.when_last_played), when_last_played, excluded.when_last_played),
+                            {', '.join(f'{column} = {column} + excluded.{column}' for column in columns)}
+                        """,
+                        corrections
+                    )
+
+            report.applied = True
+            logger.warning(f"Rebuilt the statistics of {len(report.mismatched)} users from {report.events} game events.")
+
+        return report
@@ -0,0 +1,354 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
+from bot import MyBot
+from bot.utils.bases import OwnedView
+from bot.utils.database import MeteredPool
+from dataclasses import dataclass
+from discord import ButtonStyle as BS, Embed, Guild, Interaction, Member
+from discord.app_commands import command as app_command, describe as arg_describe, allowed_contexts, Choice, choices
+from discord.ext.commands import Cog
+from discord.ui import button, Button
+from json import dumps
+from logging import getLogger
+from math import ceil
+from sqlite3 import Row
+from time import monotonic
+from typing import Callable, Iterable
+
+logger = getLogger(__name__)
+
+@dataclass(frozen = True, slots = True)
+class LeaderboardMetric:
+    "Something players can be ranked by."
+
+    label: str
+
+    expression: str
+    "The SQL expression players are ranked by. An index on `(expression DESC, user_id DESC)` has to exist for it."
+
+    condition: str
+    "Which players are ranked at all. This has to match the `WHERE` clause of the metric's index, if it's a partial index."
+
+    columns: tuple[str, ...]
+    "The `statistics` columns the metric depends on."
+
+    format: Callable[[float], str]
+
+
+METRICS: dict[str, LeaderboardMetric] = {
+    "wins": LeaderboardMetric(
+        "Wins", "games_won", "games_won > 0", ("games_won",),
+        lambda value: f"{value:.0f} win{'s' if value != 1 else ''}"
+    ),
+    "play_time": LeaderboardMetric(
+        "Play Time", "play_time", "play_time > 0", ("play_time",),
+        lambda value: f"{value // 3600:.0f}h {value % 3600 // 60:.0f}m"
+    ),
+    "win_rate": LeaderboardMetric(
+        "Win Rate", "games_won * 1.0 / games_played", "games_played >= 5", ("games_won", "games_played"),
+        lambda value: f"{value * 100:.1f}%"
+    ),
+    "dares": LeaderboardMetric(
+        "Dares Completed", "dares_completed", "dares_completed > 0", ("dares_completed",),
+        lambda value: f"{value:.0f} dare{'s' if value != 1 else ''}"
+    )
+}
+"Every leaderboard, keyed by the name it's chosen by. Win rates only count players with at least 5 games."
+
+@dataclass(slots = True)
+class RankCache:
+    "Every value on one leaderboard, kept sorted so ranks can be found by bisecting."
+
+    values: list[float]
+    "Every ranked value, in ascending order."
+
+    by_user: dict[int, float]
+    "Each ranked player's value, so it can be found in `values` when it changes."
+
+    members: set[int] | None
+    "The IDs of the guild's members when the cache was built, or `None` if it ranks everyone."
+
+    built_at: float
+
+    def move(self, user_id: int, value: float | None) -> None:
+        "Replace a player's value, or take them off the leaderboard if `value` is `None`."
+
+        old = self.by_user.pop(user_id, None)
+
+        if old is not None:
+            del self.values[bisect_left(self.values, old)]
+
+        if value is not None:
+            insort(self.values, value)
+            self.by_user[user_id] = value
+
+
+class Leaderboard:
+    """
+    Pages through the `statistics` table in the order of a metric.
+
+    Pages are found by keyset - by the last row of the previous page -
+    so deep pages cost the same as the first. Ranks come from a sorted
+    copy of every value for each metric, which is built once and then
+    kept up to date as `UpdateStatistics` writes, by moving only the
+    values of the players whose columns changed.
+    """
+
+    reader: MeteredPool
+
+    PAGE_SIZE = 10
+
+    GUILD_CACHE_TTL = 300.0
+    "How long a guild's rank caches are kept, in seconds, so members who join or leave are picked up."
+
+    MAX_GUILD_CACHES = 64
+    "How many guild rank caches are kept at once, dropping the least recently used."
+
+    _ranks: dict[tuple[str, int], RankCache] = {}
+    "Every rank cache, keyed by metric name and guild ID, or 0 for everyone, from least to most recently used."
+
+    rebuilds = 0
+    "The number of times a rank cache has been built from the whole table since the bot started."
+
+    moves = 0
+    "The number of values moved within rank caches since the bot started."
+
+    _refreshes = 0
+
+    @classmethod
+    def invalidate(cls, columns: Iterable[str]) -> None:
+        "Forget the ranks of every metric that depends on one of `columns`."
+
+        columns = set(columns)
+        stale = {name for name, metric in METRICS.items() if not columns.isdisjoint(metric.columns)}
+
+        for key in [key for key in cls._ranks if key[0] in stale]:
+            del cls._ranks[key]
+
+    @classmethod
+    async def refresh(cls, user_ids: Iterable[int], columns: Iterable[str]) -> None:
+        """
+        Move the values of `user_ids` in every rank cache whose metric depends
+        on one of `columns`, after they've been written to.
+
+        The new values are read in one query, for only those players.
+        """
+
+        columns = set(columns)
+        user_ids = list(user_ids)
+        names = {name for name, metric in METRICS.items() if not columns.isdisjoint(metric.columns)}
+
+        cls._refreshes += 1
+
+        if not user_ids or not any(key[0] in names for key in cls._ranks):
+            return
+
+        # Players who don't meet a metric's condition come back as NULL, and are taken off its leaderboard
+        selected = ', '.join(f"CASE WHEN {METRICS[name].condition} THEN {METRICS[name].expression} END AS {name}" for name in names)
+
+        try:
+            async with cls.reader.acquire() as conn:
+                rows = await conn.fetchall(
+                    f"SELECT user_id, {selected} FROM statistics WHERE user_id IN (SELECT value FROM json_each(?))",
+                    dumps(user_ids)
+                )
+
+        except Exception:
+            logger.exception("Failed to refresh rank caches, so they'll be rebuilt instead")
+            cls.invalidate(columns)
+            return
+
+        for (name, _), cache in cls._ranks.items():
+            if name not in names:
+                continue
+
+            for row in rows:
+                if cache.members is None or row["user_id"] in cache.members:
+                    cache.move(row["user_id"], row[name])
+                    cls.moves += 1
+
+    @staticmethod
+    def _scope(guild: Guild | None) -> tuple[str, tuple]:
+        if guild is None:
+            return "", ()
+
+        return " AND user_id IN (SELECT value FROM json_each(?))", (dumps([member.id for member in guild.members if not member.bot]),)
+
+    @classmethod
+    async def _values(cls, name: str, guild: Guild | None) -> list[float]:
+        key = (name, guild.id if guild else 0)
+        cache = cls._ranks.pop(key, None)
+
+        if cache is None or guild is not None and monotonic() - cache.built_at > cls.GUILD_CACHE_TTL:
+            metric = METRICS[name]
+            scope, parameters = cls._scope(guild)
+            refreshes = cls._refreshes
+
+            async with cls.reader.acquire() as conn:
+                rows = await conn.fetchall(
+                    f"SELECT user_id, {metric.expression} AS value FROM statistics WHERE {metric.condition}{scope} ORDER BY {metric.expression}",
+                    parameters
+                )
+
+            cache = RankCache(
+                values = [row["value"] for row in rows],
+                by_user = {row["user_id"]: row["value"] for row in rows},
+                members = {member.id for member in guild.members if not member.bot} if guild else None,
+                built_at = monotonic()
+            )
+
+            cls.rebuilds += 1
+
+            # A refresh that ran while this was being read couldn't move anything in it, so it may already be out of date
+            if refreshes != cls._refreshes:
+                return cache.values
+
+        # Put back as the most recently used, dropping the least recently used guilds if there are too many
+        cls._ranks[key] = cache
+
+        guild_keys = [other for other in cls._ranks if other[1]]
+
+        for other in guild_keys[:max(0, len(guild_keys) - cls.MAX_GUILD_CACHES)]:
+            del cls._ranks[other]
+
+        return cache.values
+
+    @classmethod
+    async def rank(cls, name: str, value: float, guild: Guild | None = None) -> int:
+        "Returns the rank of `value` on a leaderboard. Tied values share a rank."
+
+        values = await cls._values(name, guild)
+
+        return len(values) - bisect_right(values, value) + 1
+
+    @classmethod
+    async def size(cls, name: str, guild: Guild | None = None) -> int:
+        "Returns the number of players on a leaderboard."
+
+        return len(await cls._values(name, guild))
+
+    @classmethod
+    async def page(cls, name: str, after: tuple[float, int] | None = None, guild: Guild | None = None) -> list[Row]:
+        "Returns the next `PAGE_SIZE` players on a leaderboard, after the `(value, user_id)` of the previous page's last row."
+
+        metric = METRICS[name]
+        scope, parameters = cls._scope(guild)
+        keyset = ""
+
+        # Spelled out rather than as a row value, so SQLite can seek to it in expression indexes too
+        if after is not None:
+            keyset = f" AND {metric.expression} <= ? AND ({metric.expression} < ? OR user_id < ?)"
+            parameters += (after[0], *after)
+
+        async with cls.reader.acquire() as conn:
+            return await conn.fetchall(
+                f"""
+                SELECT user_id, {metric.expression} AS value FROM statistics
+                WHERE {metric.condition}{scope}{keyset}
+                ORDER BY {metric.expression} DESC, user_id DESC
+                LIMIT {cls.PAGE_SIZE}
+                """,
+                parameters
+            )
+
+    @classmethod
+    async def value_of(cls, name: str, user_id: int) -> float | None:
+        "Returns a player's value for a metric, or `None` if they aren't ranked on it."
+
+        metric = METRICS[name]
+
+        async with cls.reader.acquire() as conn:
+            row = await conn.fetchone(f"SELECT {metric.expression} AS value FROM statistics WHERE user_id = ? AND {metric.condition}", user_id)
+
+        return row["value"] if row else None
+
+
+class LeaderboardMenu(OwnedView):
+    def __init__(self, owner: Member, name: str, guild: Guild | None) -> None:
+        super().__init__(owner, timeout = 60.0)
+
+        self.name = name
+        self.metric = METRICS[name]
+        self.guild = guild
+
+        # The keyset each page was fetched after, so pages can be gone back to
+        self._keysets: list[tuple[float, int] | None] = [None]
+        self._last: tuple[float, int] | None = None
+
+    async def render(self) -> Embed:
+        "Fetch the current page and return its embed."
+
+        rows = await Leaderboard.page(self.name, self._keysets[-1], self.guild)
+
+        lines = [
+            f"{await Leaderboard.rank(self.name, row['value'], self.guild)}. <@{row['user_id']}>  {self.metric.format(row['value'])}"
+            for row in rows
+        ]
+
+        self._last = (rows[-1]["value"], rows[-1]["user_id"]) if rows else None
+
+        total = await Leaderboard.size(self.name, self.guild)
+        pages = max(1, ceil(total / Leaderboard.PAGE_SIZE))
+
+        self.previous_page.disabled = len(self._keysets) == 1
+        self.next_page.disabled = len(rows) < Leaderboard.PAGE_SIZE or len(self._keysets) == pages
+
+        embed = Embed(
+            title = f"🏆  {self.metric.label}",
+            description = '\n'.join(lines) or "Nobody's on this leaderboard yet.",
+            colour = 0xFFC83D
+        ).set_author(
+            name = self.guild.name if self.guild else "Everyone",
+            icon_url = self.guild.icon.url if self.guild and self.guild.icon else None
+        )
+
+        own = await Leaderboard.value_of(self.name, self.owner.id)
+
+        return embed.set_footer(
+            text = f"Page {len(self._keysets)} of {pages}"
+                 + (f"  •  You're #{await Leaderboard.rank(self.name, own, self.guild)}" if own is not None else "")
+        )
+
+    @button(label = "Previous", style = BS.grey)
+    async def previous_page(self, interaction: Interaction, _: Button):
+        self._keysets.pop()
+
+        await interaction.response.edit_message(embed = await self.render(), view = self)
+
+    @button(label = "Next", style = BS.grey)
+    async def next_page(self, interaction: Interaction, _: Button):
+        self._keysets.append(self._last)
+
+        await interaction.response.edit_message(embed = await self.render(), view = self)
+
+
+class Leaderboards(Cog):
+    def __init__(self, bot: MyBot) -> None:
+        self.bot = bot
+        Leaderboard.reader = bot.reader
+
+    @allowed_contexts(guilds = True, dms = False, private_channels = False)
+    @app_command(name = "leaderboard", description = "See who's top of Fact-or-Freak.")
+    @arg_describe(
+        metric = "What to rank players by.",
+        scope = "Whether to rank only this server's members, or everyone."
+    )
+    @choices(
+        metric = [Choice(name = metric.label, value = name) for name, metric in METRICS.items()],
+        scope = [Choice(name = "This server", value = "guild"), Choice(name = "Everyone", value = "global")]
+    )
+    async def show_leaderboard(self, interaction: Interaction, metric: str = "wins", scope: str = "guild"):
+        menu = LeaderboardMenu(
+            owner = interaction.user, # type: ignore
+            name = metric,
+            guild = interaction.guild if scope == "guild" else None
+        )
+
+        await interaction.response.send_message(embed = await menu.render(), view = menu)
+
+        if await menu.wait():
+            await interaction.edit_original_response(view = None)
+
+
+async def setup(bot: MyBot) -> None:
+    await bot.add_cog(Leaderboards(bot))
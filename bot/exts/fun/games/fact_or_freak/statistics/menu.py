@@ -2,7 +2,11 @@ from ..decals import BRONZE, SILVER, GOLD, DIAMOND, DEVELOPER, PURPLE_BADGE
 from discord import Embed, Interaction, Member, SelectOption
 from discord.ui import Select
 from bot.utils.bases import OwnedView
-from . import UpdateStatistics as Stats
+from .badges import BadgeRule, Badges
+from .rollups import day_of, Rollups, sparkline
+from sqlite3 import Row
+from time import time
+from typing import Any
 
 def format_seconds(seconds: int) -> str:
     if seconds == 0:
@@ -59,6 +63,12 @@ class StatisticSelection(Select):
                     description = "See all the badges you can get from this bot.",
                     value = 4,
                     emoji = PURPLE_BADGE
+                ),
+                SelectOption(
+                    label = "History",
+                    description = "Shows games, wins and play time over the last 30 days.",
+                    value = 5,
+                    emoji = "📈"
                 )
             ]
         )
@@ -72,7 +82,7 @@ class StatisticSelection(Select):
         self.options[option - 1].default = True
 
         await interaction.response.edit_message(
-            embed = self.view.pages[option],
+            embed = await self.view.page(option),
             view = self.view
         )
 
@@ -105,116 +115,165 @@ class StatisticsPageMenu(OwnedView):
         text = "Note that you can achieve two of the same badge by completing both requirements."
     )
 
-    def __init__(self, owner: Member, target: Member) -> None:
-        super().__init__(owner)
-        self.timeout = 30.0
+    def __init__(self, owner: Member, target: Member, data: Row | dict[str, Any]) -> None:
+        super().__init__(owner, timeout = 30.0)
         self.target = target
+        self.data = data
+
+        self.pages: dict[int, Embed] = {}
+        "Every page that's been shown so far, keyed by its option's value, or 0 for the home page."
+
+        self._badges: dict[str, tuple[BadgeRule, int]] | None = None
 
         self.add_item(StatisticSelection())
-    
-    async def create_pages(self) -> None:
-        data = await Stats.fetch(self.owner.id)
-
-        # =============================
-        #         Wins Awards
-        # =============================
-        # Diamond for winning 50+ games
-        # Gold for winning 25+ games
-        # Silver for winning 10+ games
-        # Bronze for winning 1+ game
-        match 1:
-            case 1 if data["games_won"] >= 50:  wins_award = DIAMOND
-            case 1 if data["games_won"] >= 25:  wins_award =    GOLD
-            case 1 if data["games_won"] >= 10:  wins_award =  SILVER
-            case 1 if data["games_won"] >=  1:  wins_award =  BRONZE
-            case                            _:  wins_award =    None
-        
-        # =============================
-        #       Playtime Awards
-        # =============================
-        # Diamond for playing 24+ hours
-        # Gold for playing 12+ hours
-        # Silver for playing 6+ hours
-        # Bronze for playing 3+ hours
-        match 1:
-            case 1 if data["play_time"] >= 24 * 60 * 60:  wins_award = DIAMOND
-            case 1 if data["play_time"] >= 12 * 60 * 60:  wins_award =    GOLD
-            case 1 if data["play_time"] >=  6 * 60 * 60:  wins_award =  SILVER
-            case 1 if data["play_time"] >=  3 * 60 * 60:  wins_award =  BRONZE
-            case                                      _:  wins_award =    None
-
-        # Constructing the pages to display
-        self.pages = [
-            # Home page
-            Embed(
-                title = "🏠 Home",
-                description = "Select an option from the dropdown below to see your statistics.",
-                colour = 0xF2F2F2
-            ).set_author(
-                name = f"{self.target.name}'s Statistics",
-                icon_url = self.target.display_avatar.url
-            ).add_field(
-                name = "Badges",
-                value = f"For statistics like win count and play-time, users are awarded badges based on their progress.\n\nSee the `Badges` section for more information.",
-                inline = False
-            ),
-
-            # Shows special statistics (W/L ratio, time played, etc)
-            Embed(
-                title = "⭐ Special",
-                colour = 0xFFC83D,
-            ).set_author(
-                name = f"{self.target.name}'s Statistics",
-                icon_url = self.target.display_avatar.url
-            ).add_field(
-                name = "Time Played",
-                value = f"You've played for **{format_seconds(data["play_time"])}**.",
-                inline = False
-            ).add_field(
-                name = "Wins",
-                value = f"You've won **{data["games_won"]}** game{'s' if data["games_won"] != 1 else ''}{f" {wins_award} " if wins_award else ""} so far.{f"\n\n> That's a winrate of **{data["games_won"] / data["games_played"] * 100:.2f}%**." if data["games_played"] > 0 else ""}",
-                inline = False
-            ),
-
-            # Shows game statistics (lobbies made and joined, and games won and lost, including winrate)
-            Embed(
-                title = "🎮 Games",
-                colour = 0x383838
-            ).set_author(
-                name = f"{self.target.name}'s Statistics",
-                icon_url = self.target.display_avatar.url
-            ).add_field(
-                name = "Lobbies",
-                value = f"Made: {data["lobbies_made"]}\nJoined: {data["games_played"] - data["lobbies_made"]}",
-                inline = False
-            ).add_field(
-                name = "Wins / Losses",
-                value = f"Won: **{data["games_won"]}**{f" {wins_award}" if wins_award else ""}\nLost: **{data["games_lost"]}**\nWinrate: " \
-                + (f"**{data["games_won"] / data["games_played"] * 100:.2f}%**." if data["games_played"] > 0 else "N/A"),
-                inline = False
-            ),
-
-            # Shows interaction statistics (truths chosen and answered, dares chosen and completed, etc)
-            Embed(
-                title = "📲 Interactions",
-                colour = 0x0794BD
-            ).set_author(
-                name = f"{self.target.name}'s Statistics",
-                icon_url = self.target.display_avatar.url
-            ).add_field(
-                name = "👼 Truths",
-                value = f"Chosen: {data["truths_selected"]}\nAnswered: {data["truths_answered"]}{f"\nAnswer rate: **{data["truths_answered"] / data["truths_selected"] * 100:.2f}%**.\n-# After selecting `Truth`." if data["truths_selected"] > 0 else ""}",
-                inline = False
-            ).add_field(
-                name = "😈 Dares",
-                value = f"Chosen: {data["dares_selected"]}\nCompleted: {data["dares_completed"]}{f"\nCompletion rate: **{data["dares_completed"] / data["dares_selected"] * 100:.2f}%**.\n-# After selecting `Dare`." if data["dares_selected"] > 0 else ""}",
-                inline = False
-            ).add_field(
-                name = "🙄 Passes (boring)",
-                value = f"Passes: {data["passes_made"]}\nPass rate: {data["passes_made"] / (data["truths_selected"] + data['dares_selected']) if data["truths_selected"] + data['dares_selected'] > 0 else "N/A"}",
+
+    async def page(self, option: int) -> Embed:
+        "Returns the page for an option, building it the first time it's chosen."
+
+        if option not in self.pages:
+            match option:
+                case 0: embed = self.create_home_page()
+                case 1: embed = await self.create_special_page()
+                case 2: embed = await self.create_games_page()
+                case 3: embed = self.create_interactions_page()
+                case 4: embed = self.BADGES_EMBED
+                case 5: embed = await self.create_history_page()
+                case _: raise ValueError(f"Invalid statistics page: '{option}'")
+
+            self.pages[option] = embed
+
+        return self.pages[option]
+
+    async def awards(self) -> tuple[str | None, str | None]:
+        "Returns the emojis of the target's best wins and play time badges, if they have them."
+
+        if self._badges is None:
+            self._badges = await Badges.fetch(self.target.id)
+
+        return (
+            self._badges["wins"][0].emoji if "wins" in self._badges else None,
+            self._badges["play_time"][0].emoji if "play_time" in self._badges else None
+        )
+
+    def create_home_page(self) -> Embed:
+        return Embed(
+            title = "🏠 Home",
+            description = "Select an option from the dropdown below to see your statistics.",
+            colour = 0xF2F2F2
+        ).set_author(
+            name = f"{self.target.name}'s Statistics",
+            icon_url = self.target.display_avatar.url
+        ).add_field(
+            name = "Badges",
+            value = f"For statistics like win count and play-time, users are awarded badges based on their progress.\n\nSee the `Badges` section for more information.",
+            inline = False
+        )
+
+    # Shows special statistics (W/L ratio, time played, etc)
+    async def create_special_page(self) -> Embed:
+        data = self.data
+        wins_award, play_time_award = await self.awards()
+
+        return Embed(
+            title = "⭐ Special",
+            colour = 0xFFC83D,
+        ).set_author(
+            name = f"{self.target.name}'s Statistics",
+            icon_url = self.target.display_avatar.url
+        ).add_field(
+            name = "Time Played",
+            value = f"You've played for **{format_seconds(data["play_time"])}**{f" {play_time_award}" if play_time_award else ""}.",
+            inline = False
+        ).add_field(
+            name = "Wins",
+            value = f"You've won **{data["games_won"]}** game{'s' if data["games_won"] != 1 else ''}{f" {wins_award} " if wins_award else ""} so far.{f"\n\n> That's a winrate of **{data["games_won"] / data["games_played"] * 100:.2f}%**." if data["games_played"] > 0 else ""}",
+            inline = False
+        )
+
+    # Shows game statistics (lobbies made and joined, and games won and lost, including winrate)
+    async def create_games_page(self) -> Embed:
+        data = self.data
+        wins_award, _ = await self.awards()
+
+        return Embed(
+            title = "🎮 Games",
+            colour = 0x383838
+        ).set_author(
+            name = f"{self.target.name}'s Statistics",
+            icon_url = self.target.display_avatar.url
+        ).add_field(
+            name = "Lobbies",
+            value = f"Made: {data["lobbies_made"]}\nJoined: {data["games_played"] - data["lobbies_made"]}",
+            inline = False
+        ).add_field(
+            name = "Wins / Losses",
+            value = f"Won: **{data["games_won"]}**{f" {wins_award}" if wins_award else ""}\nLost: **{data["games_lost"]}**\nWinrate: " \
+            + (f"**{data["games_won"] / data["games_played"] * 100:.2f}%**." if data["games_played"] > 0 else "N/A"),
+            inline = False
+        )
+
+    # Shows interaction statistics (truths chosen and answered, dares chosen and completed, etc)
+    def create_interactions_page(self) -> Embed:
+        data = self.data
+
+        return Embed(
+            title = "📲 Interactions",
+            colour = 0x0794BD
+        ).set_author(
+            name = f"{self.target.name}'s Statistics",
+            icon_url = self.target.display_avatar.url
+        ).add_field(
+            name = "👼 Truths",
+            value = f"Chosen: {data["truths_selected"]}\nAnswered: {data["truths_answered"]}{f"\nAnswer rate: **{data["truths_answered"] / data["truths_selected"] * 100:.2f}%**.\n-# After selecting `Truth`." if data["truths_selected"] > 0 else ""}",
+            inline = False
+        ).add_field(
+            name = "😈 Dares",
+            value = f"Chosen: {data["dares_selected"]}\nCompleted: {data["dares_completed"]}{f"\nCompletion rate: **{data["dares_completed"] / data["dares_selected"] * 100:.2f}%**.\n-# After selecting `Dare`." if data["dares_selected"] > 0 else ""}",
+            inline = False
+        ).add_field(
+            name = "🙄 Passes (boring)",
+            value = f"Passes: {data["passes_made"]}\nPass rate: {data["passes_made"] / (data["truths_selected"] + data['dares_selected']) if data["truths_selected"] + data['dares_selected'] > 0 else "N/A"}",
+            inline = False
+        )
+
+    # Shows activity over the last 30 days
+    async def create_history_page(self) -> Embed:
+        today = day_of(int(time()))
+        history = await Rollups.user_history(self.target.id, today)
+
+        games = [day.games for day in history]
+        wins = [day.wins for day in history]
+        play_time = [day.play_time for day in history]
+
+        embed = Embed(
+            title = "📈 History",
+            colour = 0x57F287
+        ).set_author(
+            name = f"{self.target.name}'s Statistics",
+            icon_url = self.target.display_avatar.url
+        ).add_field(
+            name = "Games",
+            value = f"`{sparkline(games)}`\n{sum(games[-7:])} this week, {sum(games)} in the last 30 days.",
+            inline = False
+        ).add_field(
+            name = "Wins",
+            value = f"`{sparkline(wins)}`\n{sum(wins[-7:])} this week, {sum(wins)} in the last 30 days.",
+            inline = False
+        ).add_field(
+            name = "Time Played",
+            value = f"`{sparkline(play_time)}`\n{format_seconds(sum(play_time))} in the last 30 days.",
+            inline = False
+        ).set_footer(
+            text = "Each bar is one day, oldest first."
+        )
+
+        if isinstance(self.target, Member):
+            server = [day.games for day in await Rollups.guild_history(self.target.guild.id, today)]
+
+            embed.add_field(
+                name = f"Games in {self.target.guild.name}",
+                value = f"`{sparkline(server)}`\n{sum(server)} in the last 30 days.",
                 inline = False
-            ),
+            )
 
-            # Shows information on the badges you can get
-            self.BADGES_EMBED
-        ]
\ No newline at end of file
+        return embed
\ No newline at end of file
@@ -0,0 +1,106 @@
+from bot.utils.database import MeteredPool
+from dataclasses import dataclass
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+SPARKS = "▁▂▃▄▅▆▇█"
+
+def sparkline(values: list[int]) -> str:
+    "Draw `values` as a line of block characters, scaled to the largest value."
+
+    peak = max(values, default = 0)
+
+    if not peak:
+        return SPARKS[0] * len(values)
+
+    return ''.join(SPARKS[round(value / peak * (len(SPARKS) - 1))] for value in values)
+
+def day_of(timestamp: int) -> int:
+    "Returns the number of whole days between the Unix epoch and `timestamp`, in UTC."
+
+    return timestamp // 86400
+
+
+@dataclass(slots = True)
+class DailyTotals:
+    "One day of activity, for a user or a guild."
+
+    day: int
+    games: int = 0
+    wins: int = 0
+    passes: int = 0
+    play_time: int = 0
+
+
+class Rollups:
+    """
+    Keeps daily totals of games, wins, passes and play time for every user
+    and guild, in the `daily_user_stats` and `daily_guild_stats` tables.
+
+    They're added to once per game, when it ends, so reading a stretch of
+    history only ever touches one row a day.
+    """
+
+    pool: MeteredPool
+    reader: MeteredPool
+
+    COLUMNS = ("games", "wins", "passes", "play_time")
+
+    @classmethod
+    async def record_game(cls, guild_id: int | None, ended_at: int, totals: dict[int, tuple[int, int, int, int]]) -> None:
+        """
+        Add a finished game to the rollups for the day it ended on.
+
+        `totals` maps each player's ID to their `(games, wins, passes, play_time)`
+        in the game. The guild's rollup counts it as one game, with the sum
+        of every player's wins and passes, lasting as long as the longest
+        anyone played.
+        """
+
+        day = day_of(ended_at)
+        updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in cls.COLUMNS)
+
+        async with cls.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(
+                    f"""
+                    INSERT INTO daily_user_stats (user_id, day, games, wins, passes, play_time) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (user_id, day) DO UPDATE SET {updates}
+                    """,
+                    [(user_id, day, *values) for user_id, values in totals.items()]
+                )
+
+                if guild_id is not None:
+                    await conn.execute(
+                        f"""
+                        INSERT INTO daily_guild_stats (guild_id, day, games, wins, passes, play_time) VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (guild_id, day) DO UPDATE SET {updates}
+                        """,
+                        guild_id, day, 1,
+                        sum(wins for _, wins, _, _ in totals.values()),
+                        sum(passes for _, _, passes, _ in totals.values()),
+                        max(play_time for *_, play_time in totals.values())
+                    )
+
+    @classmethod
+    async def history(cls, table: str, key: str, id: int, today: int, days: int = 30) -> list[DailyTotals]:
+        "Returns the last `days` days of totals from a rollup table, oldest first, with days of no activity filled in."
+
+        async with cls.reader.acquire() as conn:
+            rows = await conn.fetchall(
+                f"SELECT day, {', '.join(cls.COLUMNS)} FROM {table} WHERE {key} = ? AND day > ?",
+                id, today - days
+            )
+
+        found = {row["day"]: DailyTotals(**dict(row)) for row in rows}
+
+        return [found.get(day) or DailyTotals(day) for day in range(today - days + 1, today + 1)]
+
+    @classmethod
+    async def user_history(cls, user_id: int, today: int, days: int = 30) -> list[DailyTotals]:
+        return await cls.history("daily_user_stats", "user_id", user_id, today, days)
+
+    @classmethod
+    async def guild_history(cls, guild_id: int, today: int, days: int = 30) -> list[DailyTotals]:
+        return await cls.history("daily_guild_stats", "guild_id", guild_id, today, days)
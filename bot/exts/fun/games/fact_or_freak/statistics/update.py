@@ -1,10 +1,55 @@
-from asqlite import Pool
+from .aggregates import GlobalStatistics
+from asyncio import create_task, gather, shield, sleep, Task
+from .badges import Badges
+from .events import GameEvents
+from .leaderboard import Leaderboard
+from bot.utils.database import MeteredPool
+from collections import Counter
 from ..enums import CategorySelectionResponse
+from logging import getLogger
 from sqlite3 import Row
-from typing import overload
+from time import monotonic, perf_counter
+from typing import Any, Iterable, overload
+
+logger = getLogger(__name__)
 
 class UpdateStatistics:
-    pool: Pool
+    pool: MeteredPool
+    reader: MeteredPool
+
+    FLUSH_INTERVAL = 5.0
+    "How often buffered increments are written to the database, in seconds."
+
+    FLUSH_THRESHOLD = 256
+    "How many `(user, column)` pairs can be buffered before a flush is started early."
+
+    _pending: dict[int, Counter[str]] = {}
+    "Increments that haven't been written yet, keyed by user ID and then by column."
+
+    _flushing: dict[int, Counter[str]] = {}
+    "Increments a flush has taken out of `_pending` but not committed yet, so `fetch` still counts them."
+
+    CACHE_TTL = 10.0
+    "How long a whole row read by `fetch` is reused for, in seconds, unless it's written to first."
+
+    CACHE_SIZE = 1024
+    "How many rows can be cached before expired ones are cleared out."
+
+    _rows: dict[int, tuple[float, Row]] = {}
+    "Whole rows read by `fetch`, keyed by user ID, with when they expire."
+
+    _generation = 0
+    "Bumped whenever cached rows are dropped, so a read that overlapped a write isn't cached."
+
+    _flusher: Task | None = None
+    _early_flush: Task | None = None
+
+    _periodic_flush: Task | None = None
+    "The flush `_flusher` last started, kept apart so stopping the loop never cancels it halfway through."
+
+    flushes = 0
+    last_flush_latency = 0.0
+    max_flush_latency = 0.0
 
     @classmethod
     async def create_new_user(cls, user_id: int) -> None:
@@ -44,7 +89,7 @@ class UpdateStatistics:
     async def user_is_present(cls, user_id: int) -> bool:
         "Returns `True` if the user ID given exists in the `statistics` table."
 
-        async with cls.pool.acquire() as conn:
+        async with cls.reader.acquire() as conn:
             req = await conn.execute(
                 """
                 SELECT EXISTS(
@@ -60,10 +105,133 @@ class UpdateStatistics:
         
         return bool(row["x"]) # type: ignore
 
+    @classmethod
+    def forget(cls, user_ids: Iterable[int] | None = None) -> None:
+        "Drop the cached rows of `user_ids`, or of everyone."
+
+        cls._generation += 1
+
+        if user_ids is None:
+            cls._rows.clear()
+            return
+
+        for user_id in user_ids:
+            cls._rows.pop(user_id, None)
+
     @classmethod
     async def _increment(cls, column_name: str, user_id: int) -> None:
-        async with cls.pool.acquire() as conn:
-            await conn.execute(f"UPDATE statistics SET {column_name} = {column_name} + 1 WHERE user_id = ?", user_id)
+        cls._pending.setdefault(user_id, Counter())[column_name] += 1
+
+        if cls.buffer_depth() >= cls.FLUSH_THRESHOLD and not (cls._early_flush and not cls._early_flush.done()):
+            cls._early_flush = create_task(cls.flush())
+
+    @classmethod
+    def buffer_depth(cls) -> int:
+        "Returns the number of `(user, column)` pairs waiting to be written."
+
+        return sum(len(columns) for columns in cls._pending.values())
+
+    @classmethod
+    async def flush(cls) -> None:
+        """
+        Write every buffered increment to the database in one transaction,
+        along with every buffered `GameEvents` event.
+
+        Increments to the same column are combined into a single `UPDATE`
+        per user, and every update for a column is sent in one batch.
+        """
+
+        if not cls._pending and not GameEvents.buffer_depth():
+            return
+        
+        pending, cls._pending = cls._pending, {}
+        events = GameEvents.take()
+
+        for user_id, columns in pending.items():
+            cls._flushing.setdefault(user_id, Counter()).update(columns)
+
+        by_column: dict[str, list[tuple[int, int]]] = {}
+
+        for user_id, columns in pending.items():
+            for column, amount in columns.items():
+                by_column.setdefault(column, []).append((amount, user_id))
+
+        started = perf_counter()
+
+        try:
+            async with cls.pool.acquire() as conn:
+                async with conn.transaction():
+                    for column, rows in by_column.items():
+                        await conn.executemany(f"UPDATE statistics SET {column} = {column} + ? WHERE user_id = ?", rows)
+
+                    await Badges.evaluate(conn, pending)
+                    await GameEvents.write(conn, events)
+        
+        # Put the increments back so the next flush can retry them, even if this one was cancelled
+        except BaseException as error:
+            cls._settle(pending)
+
+            for user_id, columns in pending.items():
+                cls._pending.setdefault(user_id, Counter()).update(columns)
+
+            GameEvents.put_back(events)
+
+            if not isinstance(error, Exception):
+                raise
+
+            logger.exception(f"Failed to flush {sum(map(len, pending.values()))} buffered statistics.")
+            return
+
+        cls._settle(pending)
+        cls.forget(pending)
+        GlobalStatistics.invalidate()
+
+        cls.flushes += 1
+        cls.last_flush_latency = perf_counter() - started
+        cls.max_flush_latency = max(cls.max_flush_latency, cls.last_flush_latency)
+
+        await Leaderboard.refresh(pending, by_column)
+
+    @classmethod
+    def _settle(cls, pending: dict[int, Counter[str]]) -> None:
+        "Take a flush's increments back out of `_flushing`, once they've been committed or put back."
+
+        for user_id, columns in pending.items():
+            left = cls._flushing[user_id]
+            left.subtract(columns)
+
+            if not +left:
+                del cls._flushing[user_id]
+            else:
+                cls._flushing[user_id] = +left
+
+    @classmethod
+    async def _flush_periodically(cls) -> None:
+        while True:
+            await sleep(cls.FLUSH_INTERVAL)
+
+            cls._periodic_flush = create_task(cls.flush())
+            await shield(cls._periodic_flush)
+
+    @classmethod
+    def start_flushing(cls) -> None:
+        "Start writing buffered increments to the database every `FLUSH_INTERVAL` seconds."
+
+        if cls._flusher is None or cls._flusher.done():
+            cls._flusher = create_task(cls._flush_periodically())
+
+    @classmethod
+    async def stop_flushing(cls) -> None:
+        "Stop the periodic flush and write anything still buffered."
+
+        if cls._flusher:
+            cls._flusher.cancel()
+            cls._flusher = None
+
+        # Cancelling the loop leaves a flush it already started running, so it's waited on like an early one
+        await gather(*(task for task in (cls._periodic_flush, cls._early_flush) if task), return_exceptions = True)
+
+        await cls.flush()
 
     @classmethod
     async def update_on_category_choice(cls, response: CategorySelectionResponse, user_id: int) -> None:
@@ -104,24 +272,33 @@ class UpdateStatistics:
         await cls._increment("passes_made", user_id)
     
     @classmethod
-    async def update_on_lobby_creation(cls, user_id: int) -> None:
-        "Increments `lobbies_made` for the `user_id` given."
-
-        await cls._increment("lobbies_made", user_id)
-    
-    @classmethod
-    async def update_on_lobby_start(cls, player_ids: list[int]) -> None:
-        "Increments `games_played` for all `player_ids` given."
+    async def update_on_lobby_start(cls, player_ids: list[int], leader_id: int, session_id: int, guild_id: int | None) -> None:
+        """
+        Increments `games_played` for all `player_ids` given, and `lobbies_made`
+        for the leader, logging their `lobby_start` events in the same transaction.
+        """
 
         async with cls.pool.acquire() as conn:
-            await conn.executemany(
-                """
-                UPDATE statistics
-                SET games_played = games_played + 1
-                WHERE user_id = ?
-                """,
-                [(x,) for x in player_ids]
-            )
+            async with conn.transaction():
+                await conn.executemany(
+                    """
+                    UPDATE statistics
+                    SET
+                        games_played = games_played + 1,
+                        lobbies_made = lobbies_made + ?
+                    WHERE user_id = ?
+                    """,
+                    [(int(x == leader_id), x) for x in player_ids]
+                )
+
+                await GameEvents.write(conn, [
+                    GameEvents.event("lobby_start", session_id, x, guild_id, value = int(x == leader_id))
+                    for x in player_ids
+                ])
+
+        cls.forget(player_ids)
+        await Leaderboard.refresh(player_ids, {"games_played", "lobbies_made"})
+        GlobalStatistics.invalidate()
     
     @classmethod
     async def update_on_death(cls, user_id: int) -> None:
@@ -136,20 +313,35 @@ class UpdateStatistics:
         await cls._increment("games_won", user_id)
     
     @classmethod
-    async def update_on_game_end(cls, player_ids: list[int], closing_timestamp: int, runtime: int) -> None:
-        "Updates `when_last_played` and `play_time` for all the `player_ids` given."
+    async def update_on_game_end(cls, player_ids: list[int], closing_timestamp: int, runtime: int, session_id: int, guild_id: int | None) -> None:
+        """
+        Updates `when_last_played` and `play_time` for all the `player_ids` given,
+        logging their `game_end` events in the same transaction.
+        """
 
         async with cls.pool.acquire() as conn:
-            await conn.executemany(
-                """
-                UPDATE statistics
-                SET
-                    when_last_played = ?,
-                    play_time = play_time + ?
-                WHERE user_id = ?
-                """,
-                map(lambda ID: (closing_timestamp, runtime, ID), player_ids)
-            )
+            async with conn.transaction():
+                await conn.executemany(
+                    """
+                    UPDATE statistics
+                    SET
+                        when_last_played = ?,
+                        play_time = play_time + ?
+                    WHERE user_id = ?
+                    """,
+                    map(lambda ID: (closing_timestamp, runtime, ID), player_ids)
+                )
+
+                await Badges.evaluate(conn, {ID: Counter(play_time = runtime) for ID in player_ids})
+
+                await GameEvents.write(conn, [
+                    GameEvents.event("game_end", session_id, ID, guild_id, value = runtime)
+                    for ID in player_ids
+                ])
+
+        cls.forget(player_ids)
+        await Leaderboard.refresh(player_ids, {"play_time"})
+        GlobalStatistics.invalidate()
     
     @overload
     @classmethod
@@ -172,19 +364,57 @@ class UpdateStatistics:
         user_id: int,
         column: str | None = None,
         columns: str | list[str] = "*"
-    ) -> Row | None:
+    ) -> Row | dict[str, Any] | None:
+        """
+        Fetch a row from the database, with any increments that haven't
+        been committed yet added on top.
+
+        Whole rows are cached for `CACHE_TTL` seconds, or until they're next
+        written to, whichever comes first.
+        """
+
         if column and columns or not column and not columns:
             raise ValueError("you must provide an argument for either 'column' or 'columns'.")
             
         columns_to_search = column or ', '.join(columns)
-    
-        async with cls.pool.acquire() as conn:
-            req = await conn.execute(
-                f"""
-                SELECT {columns_to_search} FROM statistics
-                WHERE user_id = ?
-                """,
-                user_id
-            )
+        cached = cls._rows.get(user_id) if columns_to_search == "*" else None
 
-            return await req.fetchone()
\ No newline at end of file
+        if cached and cached[0] > monotonic():
+            row = cached[1]
+
+        else:
+            generation = cls._generation
+
+            async with cls.reader.acquire() as conn:
+                req = await conn.execute(
+                    f"""
+                    SELECT {columns_to_search} FROM statistics
+                    WHERE user_id = ?
+                    """,
+                    user_id
+                )
+
+                row = await req.fetchone()
+
+            # A write that committed during the read may or may not be in it
+            if row and columns_to_search == "*" and generation == cls._generation:
+                now = monotonic()
+
+                if len(cls._rows) >= cls.CACHE_SIZE:
+                    cls._rows = {ID: entry for ID, entry in cls._rows.items() if entry[0] > now}
+
+                cls._rows[user_id] = (now + cls.CACHE_TTL, row)
+
+        buffered = [counter for counter in (cls._pending.get(user_id), cls._flushing.get(user_id)) if counter]
+
+        if not row or not buffered:
+            return row
+        
+        data = dict(row)
+
+        for counter in buffered:
+            for name, amount in counter.items():
+                if name in data:
+                    data[name] += amount
+        
+        return data
\ No newline at end of file
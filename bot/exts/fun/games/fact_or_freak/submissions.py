@@ -1,14 +1,63 @@
 from bot import MyBot
+from bot.utils.minhash import MinHashIndex
 from datetime import datetime as dt
 from .decals import CHECK, CROSS
+from .decks import QuestionBank
 from discord import ButtonStyle as BS, Colour, Embed, Interaction, Member, TextStyle
 from discord.app_commands import Group
 from discord.ext.commands import Cog
 from discord.ui import View, button, Button, Modal, TextInput
 from .enums import Category
-from re import match
+from json import dumps
+from re import compile
 from sqlite3 import IntegrityError
 
+SUBMISSION_FORMAT = compile(r"(truth|dare) - (.+)")
+
+type Rejection = tuple[int, str, str]
+"The line number, text and reason for a line of a bulk submission that won't be added."
+
+def format_when(when: dt) -> str:
+    "Format a time like `4:05pm`, with the date in front if it isn't today."
+
+    is_pm, hour = divmod(when.hour, 12)
+    formatted = f"{hour}:{when.minute:0>2}{['a', 'p'][is_pm]}m"
+
+    if when.date() == dt.now().date():
+        return f"today at {formatted}"
+
+    return f"{when.day}/{when.month}/{when.year:0>4} at {formatted}"
+
+def parse_submission(text: str) -> tuple[dict[str, tuple[int, int]], list[Rejection]]:
+    """
+    Check every line of a bulk submission, without touching the database.
+
+    Returns the questions that can be added, mapped to their line number and
+    category, and every line that can't be, in order. Blank lines are skipped.
+    """
+
+    questions: dict[str, tuple[int, int]] = {}
+    rejected: list[Rejection] = []
+
+    for line, raw in enumerate(text.split('\n'), 1):
+        if not (raw := raw.strip()):
+            continue
+
+        if not (result := SUBMISSION_FORMAT.fullmatch(raw)):
+            rejected.append((line, raw, "This isn't written as `[truth|dare] - [question]`."))
+            continue
+
+        question = result[2].strip()
+
+        if question in questions:
+            rejected.append((line, question, f"This is the same as line {questions[question][0]}."))
+            continue
+
+        questions[question] = (line, 1 if result[1] == "truth" else 2)
+
+    return questions, rejected
+
+
 class BulkSubmissionModal(Modal):
     field = TextInput(
         label = "Questions",
@@ -25,79 +74,115 @@ class BulkSubmissionModal(Modal):
 
     async def on_submit(self, interaction: Interaction):
         now = dt.now()
-        is_pm, hour = divmod(now.hour, 12)
-        formatted_datetime = f"{hour}:{now.minute:0>2}{['a', 'p'][is_pm]}m"
+        questions, rejected = parse_submission(self.field.value)
 
         async with interaction.client.pool.acquire() as conn: # type: ignore
-            for position, question in enumerate(self.field.value.split('\n')):
-                result = match(r"(truth|dare) - .+", question)
-
-                if not result:
-                    return await interaction.response.send_message(
-                        embed = Embed(
-                            title = f"{CROSS}  Already taken!",
-                            description = f"This wasn't written in the correct format. It should be `[truth|dare] - [question]`, like `truth - How many times in a day do you go outside?`" '\n\n'
-                                          f"The question at fault was on line {position + 1}:\n```yml\n{question}\n```",
-                            colour = Colour.brand_red(),
-                        ).set_footer(
-                            text = f'When was it submitted, you ask? It was {formatted_datetime}.'
-                        ),
-                        ephemeral = True
-                    )
-                
-                category = 1 if question.split(' ')[0] == "truth" else 2
-                question = question.split(' - ')[1]
+            taken = await conn.fetchall(
+                "SELECT content, submitter_id, when_submitted FROM questions WHERE content IN (SELECT value FROM json_each(?))",
+                dumps(list(questions))
+            )
+
+            for row in taken:
+                line, _ = questions.pop(row["content"])
+                submitter = interaction.client.profiles.get(row["submitter_id"]) # type: ignore
+
+                rejected.append((
+                    line, row["content"],
+                    f"{submitter.mention} got there first, {format_when(dt.fromtimestamp(row['when_submitted']))}."
+                ))
 
-                try:
-                    await conn.execute(
-                        "INSERT INTO questions (submitter_id, when_submitted, category, content) VALUES (?, ?, ?, ?)",
-                        interaction.user.id, int(now.timestamp()), category, question
+            # Questions that only differ from existing ones by case, punctuation or a word or two
+            near = {question: found for question in questions if (found := QuestionBank.closest(question))}
+
+            if near:
+                originals = {
+                    row["question_id"]: row
+                    for row in await conn.fetchall(
+                        "SELECT question_id, content, submitter_id FROM questions WHERE question_id IN (SELECT value FROM json_each(?))",
+                        dumps([question_id for question_id, _ in near.values()])
                     )
-                
-                # Found a duplicate question
-                except IntegrityError:
-                    req = await conn.execute("SELECT submitter_id, when_submitted FROM questions WHERE content = ?", question)
-                    row = await req.fetchone()
-
-                    user_who_submitted = interaction.client.get_user(row['submitter_id']) or await interaction.client.fetch_user(row['submitter_id'])
-                    
-                    when_question_was_submitted = dt.fromtimestamp(row['when_submitted'])
-                    time_since = when_question_was_submitted.date() - dt.now().date()
-                    
-                    is_pm, hour = divmod(when_question_was_submitted.hour, 12)
-                    formatted_datetime = f"{hour}:{when_question_was_submitted.minute:0>2}{['a', 'p'][is_pm]}m"
-                    
-                    # If it's not the same day, add the date at the start.
-                    if time_since.days > 0:
-                        _date = f"{when_question_was_submitted.day}/{when_question_was_submitted.month}/{when_question_was_submitted.year:0>4}"
-                    else:
-                        _date = "today"
-                    
-                    formatted_datetime = f"{_date} at {formatted_datetime}"
-
-                    return await interaction.response.send_message(
-                        embed = Embed(
-                            title = f"{CROSS}  Already taken!",
-                            description = f"Looks like {user_who_submitted.mention} got there first! You'll need another question to submit because this one is already there." '\n\n'
-                                          f"The question at fault was on line {position + 1}:\n```yml\n{question}\n```",
-                            colour = Colour.brand_red(),
-                        ).set_footer(
-                            text = f'When was it submitted, you ask? It was {formatted_datetime}.'
-                        ),
-                        ephemeral = True,
-                        delete_after = 5.0
+                }
+
+                for question, (question_id, similarity) in near.items():
+                    # The index can point at a question that's since been deleted
+                    if (original := originals.get(question_id)) is None:
+                        continue
+
+                    line, _ = questions.pop(question)
+                    submitter = interaction.client.profiles.get(original["submitter_id"]) # type: ignore
+
+                    rejected.append((
+                        line, question,
+                        f"This is too close ({similarity:.0%}) to {submitter.mention}'s question:\n> {original['content']}"
+                    ))
+
+            # And ones that are too close to an earlier line of the same submission
+            batch = MinHashIndex()
+
+            for question, (line, _) in sorted(questions.items(), key = lambda item: item[1][0]):
+                if found := batch.closest(question):
+                    del questions[question]
+                    rejected.append((line, question, f"This is too close ({found[1]:.0%}) to line {found[0]}."))
+                else:
+                    batch.add(line, question)
+
+            if questions:
+                async with conn.transaction():
+                    # Ignored rather than failing the whole batch, if someone else submits one of them in the meantime
+                    await conn.executemany(
+                        "INSERT OR IGNORE INTO questions (submitter_id, when_submitted, category, content) VALUES (?, ?, ?, ?)",
+                        [(interaction.user.id, int(now.timestamp()), category, question) for question, (_, category) in questions.items()]
+                    )
+
+                    added = await conn.fetchall(
+                        "SELECT question_id, category, content FROM questions WHERE submitter_id = ? AND when_submitted = ? AND content IN (SELECT value FROM json_each(?))",
+                        interaction.user.id, int(now.timestamp()), dumps(list(questions))
                     )
+
+                for row in added:
+                    QuestionBank.add(row["question_id"], row["category"], row["content"])
+
+                # Lost a race with someone else submitting the same question
+                for question in questions.keys() - {row["content"] for row in added}:
+                    rejected.append((questions[question][0], question, "Someone else submitted this while yours was being added."))
+
+            else:
+                added = []
+
+        rejected.sort()
+
+        if not rejected:
+            title = f"{CHECK}  All done!"
+            description = f"All **{len(added)}** of your questions went through perfectly fine! You'll see them in future rounds."
+        
+        elif added:
+            title = f"{CHECK}  Mostly done!"
+            description = f"**{len(added)}** of your questions went through, but these didn't:"
         
+        else:
+            title = f"{CROSS}  Nothing went through!"
+            description = "None of your questions could be added:"
+
+        for position, (line, text, reason) in enumerate(rejected):
+            entry = f"\n\n**Line {line}:** {reason}\n```yml\n{text}\n```"
+
+            # Embed descriptions can only be 4096 characters long
+            if len(description) + len(entry) > 4000:
+                description += f"\n\n...and {len(rejected) - position} more."
+                break
+
+            description += entry
+
         await interaction.response.send_message(
             embed = Embed(
-                title = f"{CHECK}  All done!",
-                description = "Your question went through perfectly fine! You'll see it in future rounds.",
-                colour = Colour.brand_green()
+                title = title,
+                description = description,
+                colour = Colour.brand_red() if not added else Colour.brand_green() if not rejected else Colour.gold()
             ).set_footer(
-                text = f"Submission time: {formatted_datetime}"
+                text = f"Submission time: {format_when(now)}"
             ),
             ephemeral = True,
-            delete_after = 5.0
+            delete_after = 5.0 if not rejected else None
         )
 
         self.stop()
@@ -145,17 +230,35 @@ class SingleSubmissionModal(Modal):
         is_pm, hour = divmod(now.hour, 12)
         formatted_datetime = f"{hour}:{now.minute:0>2}{['a', 'p'][is_pm]}m"
 
+        if (found := QuestionBank.closest(self.question.value)) and (original := await QuestionBank.fetch(found[0])):
+            user_who_submitted = interaction.client.profiles.get(original['submitter_id']) # type: ignore
+
+            return await interaction.response.send_message(
+                embed = Embed(
+                    title = f"{CROSS}  Already taken!" if found[1] == 1.0 else f"{CROSS}  Too similar!",
+                    description = f"Looks like {user_who_submitted.mention} got there first! You'll need another question to submit because this one is too close to theirs:"
+                                  f"\n```yml\n{original['content']}\n```",
+                    colour = Colour.brand_red(),
+                ).set_footer(
+                    text = f'When was it submitted, you ask? It was {format_when(dt.fromtimestamp(original["when_submitted"]))}.'
+                ),
+                ephemeral = True,
+                delete_after = 10.0
+            )
+
         async with interaction.client.pool.acquire() as conn: # type: ignore
             try:
-                await conn.execute(
+                req = await conn.execute(
                     "INSERT INTO questions (submitter_id, when_submitted, category, content, addressed_to) VALUES (?, ?, ?, ?, ?)",
                     interaction.user.id, int(now.timestamp()), self.category.value, self.question.value, addressed_to_id
                 )
+
+                QuestionBank.add(req.get_cursor().lastrowid, self.category.value, self.question.value, addressed_to_id) # type: ignore
             except IntegrityError:
                 req = await conn.execute("SELECT submitter_id, when_submitted FROM questions WHERE content = ?", self.question.value)
                 row = await req.fetchone()
 
-                user_who_submitted = interaction.client.get_user(row['submitter_id']) or await interaction.client.fetch_user(row['submitter_id'])
+                user_who_submitted = interaction.client.profiles.get(row['submitter_id']) # type: ignore
                 
                 return await interaction.response.send_message(
                     embed = Embed(
@@ -1,19 +1,17 @@
 from discord import Interaction, Member, ButtonStyle as BS
 from discord.ui import button, Button
 from ..enums import CategorySelectionResponse
-from ....utils.bases import OwnedView
+from bot.utils.bases import OwnedView
 
 class CategorySelectionUI(OwnedView):
     children: list[Button] # type: ignore
     
     def __init__(self, deciding_member: Member) -> None:
-        super().__init__(deciding_member)
-
-        self.timeout = 20.0
+        super().__init__(deciding_member, timeout = 20.0)
         
         self.response = CategorySelectionResponse.NoResponse
     
-    @button(label = "Truth", style = BS.blurple)
+    @button(label = "Truth", style = BS.blurple, custom_id = "fact_or_freak:truth")
     async def selected_truth(self, interaction: Interaction, this: Button):
         self.response = CategorySelectionResponse.ChoseTruth
         
@@ -27,7 +25,7 @@ class CategorySelectionUI(OwnedView):
         
         self.stop()
     
-    @button(label = "Dare", style = BS.red)
+    @button(label = "Dare", style = BS.red, custom_id = "fact_or_freak:dare")
     async def selected_dare(self, interaction: Interaction, this: Button):
         self.response = CategorySelectionResponse.ChoseDare
         
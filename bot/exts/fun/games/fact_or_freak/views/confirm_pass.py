@@ -1,7 +1,8 @@
 from discord import Interaction, ButtonStyle as BS
-from discord.ui import View, button
+from discord.ui import button
+from bot.utils.bases import TimedView
 
-class ConfirmPassUI(View):
+class ConfirmPassUI(TimedView):
     def __init__(self) -> None:
         super().__init__(timeout = 10)
 
@@ -1,38 +1,134 @@
+from __future__ import annotations
+from asyncio import create_task, Task
+from collections import Counter
 from bot import MyBot, OWNER_ID
+from bot.utils.profiles import Profile
+from bot.utils.turns import Effect, Event, GameDispatcher, GameSession
 from .category_select import CategorySelectionUI
+from dataclasses import dataclass
+from ..decks import QuestionBank, QuestionDeck
 from ..decals import GOLD, SILVER, BRONZE, DEVELOPER, CROSS, HEART_SHINE, HEART_BREAK
-from discord import Colour, Embed, Interaction, Member, Message, TextChannel
+from ..engine import FactOrFreakEngine
+from discord import Colour, Embed, Forbidden, HTTPException, Interaction, Member, Message, Object, PartialMessage, TextChannel
 from discord.ui import View
-from ..enums import PromptExitCode
+from ..enums import CategorySelectionResponse, PromptExitCode
+from logging import getLogger
 from .get_response import GetResponseUI
 from .pass_on_turn import PassOnTurnUI
-from random import choice
 from sqlite3 import Row
-from ..statistics import UpdateStatistics as Stats
+from ..statistics import GameEvents, Rollups, UpdateStatistics as Stats
 from time import time
+from typing import Any
+
+logger = getLogger(__name__)
 
 def get_current_timestamp() -> int:
     return int(time())
 
-class GameUI(View):
+@dataclass(slots = True)
+class PrefetchedQuestion:
+    "A question drawn ahead of time, along with who submitted it."
+
+    id: int
+    "The ID of the question in the `questions` table."
+
+    data: Row
+    "The question's row from the database."
+
+    submitter: Profile
+    "The name and avatar of the user who submitted the question."
+
+@GameDispatcher.register
+class GameUI(GameSession, View):
+    """
+    Plays a game of Fact-or-Freak in a channel.
+
+    The rules live in `FactOrFreakEngine`. This class only carries out the
+    engine's effects, and turns button clicks and timeouts back into events.
+    """
+
     _start_time: int | None
     _end_time: int | None
 
-    message: Message
+    KIND = "fact_or_freak"
+    ENGINE = FactOrFreakEngine
+
+    engine: FactOrFreakEngine
+    channel: TextChannel
+
+    EDIT_IN_PLACE = True
+    """
+    Whether each turn edits one message through its phases, instead of
+    deleting and sending a new message every time the phase changes.
+    """
+
+    PREFETCH_LIMIT = 3
+    """
+    The most players whose questions are fetched while the current player
+    chooses who's next. In bigger games, only the chosen player's are.
+    """
+
+    total_rest_calls = 0
+    "The number of channel REST calls made by every game since the bot started."
 
-    def __init__(self, members: list[Member], bot: MyBot) -> None:
-        super().__init__()
+    total_turns = 0
+    "The number of turns played in every game since the bot started."
+
+    bot: MyBot
+
+    def __init__(self, bot: MyBot, player_ids: list[int], engine: FactOrFreakEngine | None = None) -> None:
+        GameSession.__init__(self, bot, player_ids, engine)
+        View.__init__(self)
 
-        self.bot = bot
         self.pool = bot.pool
 
-        self.players = {member: 3 for member in members}
-        self.dead_players: list[Member] = []
-        self.current_player: Member = choice(members)
+        self.deck = QuestionDeck()
+
+        # Questions being fetched ahead of time for each player,
+        # keyed by player ID and then by category
+        self._prefetches: dict[int, Task[dict[int, PrefetchedQuestion | None]]] = {}
+
+        # IDs of messages that are only useful during the game, deleted in bulk once it ends
+        self._leftovers: list[int] = []
+
+        # The message the current turn is being played out on, and the question asked in it
+        self._turn_message_id: int | None = None
+        self._question: PrefetchedQuestion | None = None
+        self._category: CategorySelectionResponse = CategorySelectionResponse.NoResponse
+
+        # How many times each player passed, for the daily rollups
+        self._passes: Counter[int] = Counter()
+
+        # Reused for every turn's choice of who goes next
+        self.picker: PassOnTurnUI | None = None
+
+        self.rest_calls = 0
 
         self._start_time = None
         self._end_time = None
-    
+
+    @property
+    def players(self) -> dict[Member, int]:
+        "A mapping of every player still in the game to their lives left."
+
+        return {self.member(player_id): lives for player_id, lives in self.engine.lives.items()}
+
+    @property
+    def dead_players(self) -> list[Member]:
+        return [self.member(player_id) for player_id in self.engine.dead]
+
+    @property
+    def current_player(self) -> Member:
+        return self.member(self.engine.current)
+
+    @property
+    def turn_message(self) -> PartialMessage:
+        return self.channel.get_partial_message(self._turn_message_id) # type: ignore
+
+    @property
+    def turns(self) -> int:
+        return self.engine.turns
+
     @property
     def runtime(self) -> int:
         "Return the number of seconds since the game started running."
@@ -40,11 +136,208 @@ class GameUI(View):
         if not self._start_time:
             raise ReferenceError(
                 "cannot determine runtime before the game has begun. "
-                "Start the round using .run() before calling this property."
+                "Start the round using .start() before calling this property."
             )
         
         return (self._end_time or get_current_timestamp()) - self._start_time
 
+    def start(self, channel: TextChannel) -> None:
+        self._start_time = int(get_current_timestamp())
+
+        super().start(channel)
+
+    def snapshot(self) -> dict[str, Any]:
+        return super().snapshot() | {
+            "message": self._turn_message_id,
+            "leftovers": self._leftovers,
+            "question": self._question.id if self._question else None,
+            "category": self._category.value,
+            "started": self._start_time,
+            "rest_calls": self.rest_calls,
+            "passes": list(self._passes.items())
+        }
+
+    async def reattach(self, state: dict[str, Any]) -> None:
+        self._turn_message_id = state["message"]
+        self._leftovers = state["leftovers"]
+        self._category = CategorySelectionResponse(state["category"])
+        self._start_time = state["started"]
+        self.rest_calls = state["rest_calls"]
+        self._passes = Counter(dict(state.get("passes", [])))
+
+        if state["question"] is not None:
+            self._question = await self.load_question(state["question"])
+
+        # The question was deleted while the bot was down, so there's nothing to answer
+        if self.engine.phase == "answering" and self._question is None:
+            self._inbox.append(Event("no_question", turn = self.engine.turns))
+            return
+
+        match self.engine.phase:
+            case "choosing_category":    view = self.category_view()
+            case "answering":            view = self.response_view()
+            case "choosing_next_player": view = self.next_player_view()
+            case                      _: return
+
+        self.bot.add_view(view, message_id = self._turn_message_id)
+
+    async def load_question(self, question_id: int) -> PrefetchedQuestion | None:
+        "Fetch a question and its submitter by the question's ID, or `None` if it's been deleted."
+
+        if (data := await QuestionBank.fetch(question_id)) is None:
+            return None
+
+        return PrefetchedQuestion(question_id, data, self.bot.profiles.get(data["submitter_id"]))
+
+    def log(self, kind: str, user_id: int, **kwargs) -> None:
+        "Record an event in this game to the `game_events` log."
+
+        GameEvents.record(kind, self.session_id, user_id, self.channel.guild.id, **kwargs)
+
+    # ==================================================================================================================== #
+    #                                                       Views                                                          #
+    # ==================================================================================================================== #
+
+    def category_view(self) -> CategorySelectionUI:
+        "Create the view for choosing a category, posting its result to the dispatcher once it stops."
+
+        view = CategorySelectionUI(self.current_player)
+
+        self.post_when_finished(
+            view,
+            lambda timed_out: Event("timed_out") if timed_out else Event("category_chosen", view.response)
+        )
+
+        return view
+
+    def response_view(self) -> GetResponseUI:
+        "Create the view for responding to the turn's question, posting its result to the dispatcher once it stops."
+
+        view = GetResponseUI(self._question.data["content"], self.current_player, self.engine.lives[self.engine.current]) # type: ignore
+
+        def response_event(_: bool) -> Event:
+            match view.exit_code:
+                case PromptExitCode.Normal: return Event("answered", view.response)
+                case PromptExitCode.Passed: return Event("passed")
+                case                     _: return Event("timed_out")
+
+        self.post_when_finished(view, response_event)
+
+        return view
+
+    def next_player_view(self) -> PassOnTurnUI:
+        "Create the view for passing the turn on, posting its result to the dispatcher once it stops."
+
+        if self.picker is None:
+            self.picker = PassOnTurnUI(self.session_id, self.current_player, list(self.players))
+        else:
+            self.picker.reset(self.current_player, list(self.players))
+
+        view = self.picker
+
+        self.post_when_finished(
+            view,
+            lambda timed_out: Event("timed_out") if timed_out else Event("next_player_chosen", view.selected_member.id) # type: ignore
+        )
+
+        return view
+
+    async def _prefetch(self, player: Member) -> dict[int, PrefetchedQuestion | None]:
+        "Draw and fetch both a truth and a dare for `player`."
+
+        questions: dict[int, PrefetchedQuestion | None] = {}
+
+        for category in (CategorySelectionResponse.ChoseTruth.value, CategorySelectionResponse.ChoseDare.value):
+            question = None
+
+            while question is None and (question_id := self.deck.draw(category, player.id)) is not None:
+                # A question deleted since the bank was loaded is dropped from it, and another is drawn
+                if (question := await self.load_question(question_id)) is None:
+                    QuestionBank.discard(question_id)
+
+            questions[category] = question
+
+        return questions
+
+    def start_prefetch(self, player: Member) -> None:
+        "Start fetching questions for `player` in the background, if that isn't happening already."
+
+        if player.id not in self._prefetches:
+            self._prefetches[player.id] = create_task(self._prefetch(player))
+
+    def discard_prefetch(self, player_id: int) -> None:
+        "Drop the questions fetched for a player, putting them back into the deck."
+
+        task = self._prefetches.pop(player_id, None)
+
+        if not task:
+            return
+
+        # Cancelling it would lose whatever it's already drawn, so it's left to finish
+        if not task.done():
+            task.add_done_callback(self._put_back_prefetched)
+            return
+
+        self._put_back_prefetched(task)
+
+    def _put_back_prefetched(self, task: Task[dict[int, PrefetchedQuestion | None]]) -> None:
+        if task.cancelled() or task.exception():
+            return
+
+        for question in task.result().values():
+            if question:
+                self.deck.put_back(question.id)
+
+    async def take_prefetched(self, player: Member, category: int) -> PrefetchedQuestion | None:
+        """
+        Take the prefetched question in `category` for `player`, waiting for
+        the fetch to finish if need be. The question for the other category
+        is put back into the deck.
+        """
+
+        self.start_prefetch(player)
+
+        questions = await self._prefetches.pop(player.id)
+
+        for other_category, question in questions.items():
+            if other_category != category and question:
+                self.deck.put_back(question.id)
+
+        return questions[category]
+
+    async def send(self, channel: TextChannel, *args, **kwargs) -> Message:
+        "Send a message to `channel`, counting it towards this game's REST calls."
+
+        self.rest_calls += 1
+        return await channel.send(*args, **kwargs)
+
+    async def edit(self, message: Message | PartialMessage, **kwargs) -> Message:
+        "Edit `message`, counting it towards this game's REST calls."
+
+        self.rest_calls += 1
+        return await message.edit(**kwargs)
+
+    async def delete(self, message: Message | PartialMessage) -> None:
+        "Delete `message`, counting it towards this game's REST calls."
+
+        self.rest_calls += 1
+        await message.delete()
+
+    async def delete_leftovers(self, channel: TextChannel) -> None:
+        "Delete every leftover message in bulk, 100 at a time."
+
+        for start in range(0, len(self._leftovers), 100):
+            self.rest_calls += 1
+
+            try:
+                await channel.delete_messages([Object(message_id) for message_id in self._leftovers[start:start + 100]])
+            
+            # Missing permissions, or the messages were already deleted
+            except (Forbidden, HTTPException):
+                logger.warning(f"Couldn't delete {len(self._leftovers[start:start + 100])} leftover messages in channel {channel.id}.")
+        
+        self._leftovers.clear()
+
     async def interaction_check(self, interaction: Interaction) -> bool:
         if interaction.user in self.dead_players:
             await interaction.response.send_message(
@@ -70,127 +363,189 @@ class GameUI(View):
 
         return True
     
-    async def prompt_for_response(
-        self,
-        channel: TextChannel,
-        person_to_prompt: Member
-    ) -> tuple[Message, Row, str] | PromptExitCode:
-        """
-        Prompt a user for a response, returning a tuple of the message
-        sent, the question data from the database and the prompted user's
-        response, or a `PromptExitCode` if no response was given.
-        """
 
-        category_select = CategorySelectionUI(person_to_prompt)
+    # ==================================================================================================================== #
+    #                                                      Effects                                                         #
+    # ==================================================================================================================== #
 
-        # Ask to select between `Truth` or `Dare`
-        category_selection_message = await channel.send(
-            person_to_prompt.mention,
+    async def on_prompt_category(self, effect: Effect) -> None:
+        "Ask the current player to choose between a truth or a dare."
+
+        GameUI.total_turns += 1
+
+        # Usually already started while the turn was being passed
+        self.start_prefetch(self.current_player)
+
+        message = await self.send(
+            self.channel,
+            self.current_player.mention,
             embed = Embed(
                 title = "Category Selection",
                 description = f"Select a category of questions from the options below.\n\nYou must answer: <t:{int(get_current_timestamp()) + 22}:R>",
                 colour = Colour.blurple()
             ),
-            view = category_select
+            view = self.category_view()
         )
 
-        if await category_select.wait():
-            return PromptExitCode.TimedOut
+        self._turn_message_id = message.id
+
+    async def on_show_question(self, effect: Effect) -> None:
+        "Show the current player a question from the category they chose, and ask for a response."
+
+        self._category = effect.value
 
         await Stats.update_on_category_choice(
-            response = category_select.response,
+            response = self._category,
             user_id = self.current_player.id
         )
 
-        # Get question data from database
-        async with self.pool.acquire() as conn:
-            req = await conn.execute(
-                """
-                SELECT
-                    submitter_id,
-                    when_submitted,
-                    category,
-                    content
-                FROM questions
-                WHERE category = ?
-                AND (addressed_to = -1 OR addressed_to = ?)
-                ORDER BY random() LIMIT 1
-                """,
-                category_select.response.value,
-                self.current_player.id
-            )
+        # Take the question that was fetched while the category was being chosen
+        self._question = prefetched = await self.take_prefetched(self.current_player, self._category.value)
 
-            question_data = await req.fetchone()
+        self.log("category_chosen", self.current_player.id, question_id = prefetched.id if prefetched else None, value = self._category.value)
 
-        # Find the user who made the question
-        submitter = self.bot.get_user(question_data["submitter_id"]) # type: ignore
+        if prefetched is None:
+            await self.edit(
+                self.turn_message,
+                embed = Embed(
+                    title = f"{CROSS}  Nothing to ask.",
+                    description = f"There aren't any {self._category.name.removeprefix("Chose").lower()} questions for {self.current_player.mention} yet, so the turn goes to someone else.\n\nYou can add some with `/submit`.",
+                    colour = Colour.brand_red()
+                ),
+                view = None
+            )
 
-        question = question_data["content"] # type: ignore
+            self.post(Event("no_question", turn = self.engine.turns))
+            return
 
-        # Prepare a method to get a response from the user
-        get_response_menu = GetResponseUI(question, person_to_prompt, self.players[person_to_prompt])
+        question = prefetched.data["content"]
+        submitter = prefetched.submitter
 
         # Show selected question and ask for response
-        await category_selection_message.delete()
+        question_embed = Embed(
+            title = f"{self._category.name.removeprefix("Chose")}: {question[0].lower()}{question[1:]}",
+            description = f"Respond to this by:\n- clicking the `Submit` button to submit an answer.\n- passing on the question using the `Pass` button.\n\nYou have to respond: <t:{int(get_current_timestamp()) + 46}:R>"
+        ).set_author(
+            name = f"From {submitter.name}",
+            icon_url = submitter.avatar_url
+        )
 
-        question_message = await channel.send(
-            self.current_player.mention,
+        if self.EDIT_IN_PLACE:
+            await self.edit(
+                self.turn_message,
+                embed = question_embed,
+                view = self.response_view()
+            )
+
+        else:
+            await self.delete(self.turn_message)
 
+            message = await self.send(
+                self.channel,
+                self.current_player.mention,
+                embed = question_embed,
+                view = self.response_view()
+            )
+
+            self._turn_message_id = message.id
+
+    async def on_show_passed(self, effect: Effect) -> None:
+        question = self._question.data["content"] # type: ignore
+
+        await self.edit(
+            self.turn_message,
             embed = Embed(
-                title = f"{category_select.response.name.removeprefix("Chose")}: {question[0].lower()}{question[1:]}",
-                description = f"Respond to this by:\n- clicking the `Submit` button to submit an answer.\n- passing on the question using the `Pass` button.\n\nYou have to respond: <t:{int(get_current_timestamp()) + 46}:R>"
-            ).set_author(
-                name = f"From {submitter.name}", # type: ignore
-                icon_url = submitter.display_avatar.url # type: ignore
+                title = f"{HEART_BREAK}  Passed away.",
+                description = f"Looks like {self.current_player.mention} passed on such an amazing question:\n\n> **{self._category.name.removeprefix("Chose")}**: {question[0].lower()}{question[1:]}\n\nAnother life lost, like in the tragic events of 2001 when Al Qaeda-",
+                colour = Colour.brand_red()
             ),
-            
-            view = get_response_menu
+
+            view = None
         )
 
-        await get_response_menu.wait()
-
-        # View timed out or the user didn't respond normally
-        if get_response_menu.exit_code != PromptExitCode.Normal:
-            match get_response_menu.exit_code:
-                case PromptExitCode.Passed:
-                    await question_message.edit(
-                        embed = Embed(
-                            title = f"{HEART_BREAK}  Passed away.",
-                            description = f"Looks like {self.current_player.mention} passed on such an amazing question:\n\n> **{category_select.response.name.removeprefix("Chose")}**: {question[0].lower()}{question[1:]}\n\nAnother life lost, like in the tragic events of 2001 when Al Qaeda-",
-                            colour = Colour.brand_red()
-                        ),
-
-                        view = None
-                    )
-
-                    await Stats.update_on_pass(self.current_player.id)
-
-                case PromptExitCode.TimedOut:
-                    await question_message.edit(
-                        embed = Embed(
-                            title = f"{HEART_BREAK}  Got aired in a game I made.",
-                            description = f"Looks like {self.current_player.mention} couldn't come up with a response to the question:\n\n> **{category_select.response.name.removeprefix("Chose")}**: {question[0].lower()}{question[1:]}\n\nWhat a fucking retard.",
-                            colour = Colour.brand_red()
-                        ),
-
-                        view = None
-                    )
-            
-            return get_response_menu.exit_code
+        await Stats.update_on_pass(self.current_player.id)
+        self._passes[self.current_player.id] += 1
+        self.log("passed", self.current_player.id, question_id = self._question.id, value = self._category.value) # type: ignore
 
-        answer = get_response_menu.response
+    async def on_show_answer_timed_out(self, effect: Effect) -> None:
+        question = self._question.data["content"] # type: ignore
 
-        return question_message, question_data, answer # type: ignore
-    
-    async def get_next_player(self, channel: TextChannel) -> Member:
+        await self.edit(
+            self.turn_message,
+            embed = Embed(
+                title = f"{HEART_BREAK}  Got aired in a game I made.",
+                description = f"Looks like {self.current_player.mention} couldn't come up with a response to the question:\n\n> **{self._category.name.removeprefix("Chose")}**: {question[0].lower()}{question[1:]}\n\nWhat a fucking retard.",
+                colour = Colour.brand_red()
+            ),
+
+            view = None
+        )
+
+        self.log("timed_out", self.current_player.id, question_id = self._question.id, value = self._category.value) # type: ignore
+
+    async def on_announce_death(self, effect: Effect) -> None:
+        member = self.member(effect.player_id) # type: ignore
+
+        await self.send(
+            self.channel,
+            member.mention,
+
+            embed = Embed(
+                title = f"{HEART_BREAK}  \"break my heart - oh no, she didn't\"",
+                description = f"Looks like you ran out of lives, meaning you cannot participate in this game anymore.\n\nTough luck and do better!",
+                colour = Colour.brand_red()
+            )
+        )
+
+        await Stats.update_on_death(member.id)
+        self.log("death", member.id)
+
+        self.discard_prefetch(member.id)
+
+    async def on_show_answer(self, effect: Effect) -> None:
+        "Show what the current player put in the chat."
+
+        qdata = self._question.data # type: ignore
+        submitter = self._question.submitter # type: ignore
+        question = qdata["content"]
+
+        answer_embed = Embed(
+            title = f"{"Dare" if qdata["category"] else "Truth"}: {question[0].lower()}{question[1:]}",
+            description = "> " + effect.value.replace('\n', '\n> '),
+            colour = Colour.brand_green()
+        ).set_author(
+            name = f"Answered by {self.current_player}",
+            icon_url = self.current_player.display_avatar.url
+        ).set_footer(
+            text = f"Asked by {submitter.name}",
+            icon_url = submitter.avatar_url
+        )
+
+        if self.EDIT_IN_PLACE:
+            await self.edit(self.turn_message, embed = answer_embed, view = None)
+        else:
+            await self.delete(self.turn_message)
+            await self.send(self.channel, embed = answer_embed)
+
+        await Stats.update_on_completion(self._category, self.current_player.id)
+        self.log("answered", self.current_player.id, question_id = self._question.id, value = self._category.value) # type: ignore
+
+    async def on_prompt_next_player(self, effect: Effect) -> None:
         """
         Get the next player to continue the game. If the user doesn't
-        respond in time, another player will be randomly chosen.
+        respond in time, the engine randomly chooses another player.
         """
 
-        view = PassOnTurnUI(self.current_player, [p for p in self.players])
+        others = [player for player in self.players if player != self.current_player]
+
+        # In small games any of the others could be next, so get their questions ready.
+        # Otherwise it's started once someone's chosen.
+        if len(others) <= self.PREFETCH_LIMIT:
+            for player in others:
+                self.start_prefetch(player)
 
-        message = await channel.send(
+        message = await self.send(
+            self.channel,
             self.current_player.mention,
 
             embed = Embed(
@@ -198,91 +553,46 @@ class GameUI(View):
                 description = f"{'\n'.join(f"{n + 1}. {p.mention}  {' '.join(HEART_SHINE for _ in range(self.players[p]))}" for n, p in enumerate(self.players))}\n\nSelect the person you want to pass the turn onto.\nThis must be done: <t:{int(get_current_timestamp()) + 22}:R>",
                 colour = Colour.blurple()
             ),
-            view = view
+            view = self.next_player_view()
         )
 
-        if await view.wait():
-            randomly_chosen_player = choice([m for m in self.players if m != self.current_player])
+        self._turn_message_id = message.id
 
-            await message.edit(
-                embed = Embed(
-                    title = f"{CROSS}  Silence is not consent.",
-                    description = f"{self.current_player.mention}, because you didn't choose a member, one of your lives has been deducted. You now have **{self.players[self.current_player] - 1}** {"lives" if self.players[self.current_player] - 1 != 1 else "life"} remaining.\n\n{randomly_chosen_player.mention} has been chosen to continue the game instead.",
-                    colour = Colour.brand_red()
-                ),
-                view = None
-            )
-        
-            return randomly_chosen_player
-        
-        return view.selected_member # type: ignore
-    
-    async def run(self, channel: TextChannel) -> None:
-        self._start_time = int(get_current_timestamp())
-
-        while True:
-            # Prompt for a response from the current player
-            response = await self.prompt_for_response(channel, self.current_player)
-
-            # Timed out or passed on the question - take away a life
-            if isinstance(response, PromptExitCode) and response != PromptExitCode.Normal:                
-                self.players[self.current_player] -= 1
-
-                if self.players[self.current_player] == 0:
-                    await channel.send(
-                        self.current_player.mention,
-
-                        embed = Embed(
-                            title = f"{HEART_BREAK}  \"break my heart - oh no, she didn't\"",
-                            description = f"Looks like you ran out of lives, meaning you cannot participate in this game anymore.\n\nTough luck and do better!",
-                            colour = Colour.brand_red()
-                        )
-                    )
-
-                    await Stats.update_on_death(self.current_player.id)
+        if self.EDIT_IN_PLACE:
+            self._leftovers.append(message.id)
 
-                    self.dead_players.append(self.current_player)
-                    self.players.pop(self.current_player)
+    async def on_show_random_next_player(self, effect: Effect) -> None:
+        chosen = self.member(effect.value)
 
-                    # Last man standing, end game
-                    if len(self.players) == 1:
-                        return await self.game_over(channel)
+        await self.edit(
+            self.turn_message,
+            embed = Embed(
+                title = f"{CROSS}  Silence is not consent.",
+                description = f"{self.current_player.mention}, because you didn't choose a member, one of your lives has been deducted. You now have **{self.players[self.current_player] - 1}** {"lives" if self.players[self.current_player] - 1 != 1 else "life"} remaining.\n\n{chosen.mention} has been chosen to continue the game instead.",
+                colour = Colour.brand_red()
+            ),
+            view = None
+        )
 
-                self.current_player = choice(list(self.players))
-                
-                continue
+        self.log("timed_out", self.current_player.id)
 
-            qmsg, qdata, qreply = response # type: ignore
-            question = qdata["content"]
-            submitter = self.bot.get_user(qdata["submitter_id"])
+    async def on_keep_prefetch(self, effect: Effect) -> None:
+        "Only the chosen player's questions are needed now."
 
-            # Delete the other message
-            await qmsg.delete()
+        for player_id in list(self._prefetches):
+            if player_id != effect.value:
+                self.discard_prefetch(player_id)
 
-            # Send what the user put in the chat
-            await channel.send(
-                embed = Embed(
-                    title = f"{"Dare" if qdata["category"] else "Truth"}: {question[0].lower()}{question[1:]}",
-                    description = "> " + qreply.replace('\n', '\n> '),
-                    colour = Colour.brand_green()
-                ).set_author(
-                    name = f"Answered by {self.current_player}",
-                    icon_url = self.current_player.display_avatar.url
-                ).set_footer(
-                    text = f"Asked by {submitter.name}", # type: ignore
-                    icon_url = submitter.display_avatar.url # type: ignore
-                )
-            )
-
-            # Get the next member to participate
-            self.current_player = await self.get_next_player(channel)
-
-    async def game_over(self, channel: TextChannel) -> None:
+    async def on_game_over(self, effect: Effect) -> None:
         "End the game and announce the winners."
 
         self._end_time = int(get_current_timestamp())
 
+        for player_id in list(self._prefetches):
+            self.discard_prefetch(player_id)
+
         await Stats.update_on_win(self.current_player.id)
+        self.log("win", self.current_player.id)
 
         players_who_need_awards = self.dead_players[::-1][:2]
         award_emojis = [SILVER, BRONZE]
@@ -312,9 +622,33 @@ class GameUI(View):
                 value = '\n'.join(f"{n + 4}. ~~{other_dead_players[n].mention}~~" for n in range(len(other_dead_players)))
             )
 
-        await channel.send(
+        await self.send(
+            self.channel,
             ' '.join(p.mention for p in list(self.players) + self.dead_players),
             embed = scores_embed
         )
 
-        self.stop()
\ No newline at end of file
+        await self.delete_leftovers(self.channel)
+
+        await Stats.update_on_game_end(
+            list(self.engine.lives) + self.engine.dead,
+            self._end_time,
+            self.runtime,
+            self.session_id,
+            self.channel.guild.id
+        )
+
+        await Rollups.record_game(
+            self.channel.guild.id,
+            self._end_time,
+            {
+                player_id: (1, int(player_id == self.current_player.id), self._passes[player_id], self.runtime)
+                for player_id in list(self.engine.lives) + self.engine.dead
+            }
+        )
+
+        GameUI.total_rest_calls += self.rest_calls
+
+        logger.info(f"Game finished after {self.turns} turns and {self.rest_calls} channel REST calls.")
+
+        self.stop()
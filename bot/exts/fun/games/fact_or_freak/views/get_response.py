@@ -5,7 +5,7 @@ from discord.ui import button
 from ..enums import PromptExitCode
 from ..modals.response_box import ResponseBoxModal
 from time import time
-from ....utils.bases import OwnedView
+from bot.utils.bases import OwnedView
 
 class GetResponseUI(OwnedView):
     def __init__(self, question: str, deciding_member: Member, member_lives_left: int) -> None:
@@ -18,7 +18,7 @@ class GetResponseUI(OwnedView):
         self.response = None
         self.exit_code = PromptExitCode.TimedOut
     
-    @button(label = "Submit", style = BS.blurple)
+    @button(label = "Submit", style = BS.blurple, custom_id = "fact_or_freak:submit")
     async def submit(self, interaction: Interaction, _):
         modal = ResponseBoxModal()
 
@@ -32,7 +32,7 @@ class GetResponseUI(OwnedView):
 
         self.stop()
     
-    @button(label = "Pass", style = BS.red)
+    @button(label = "Pass", style = BS.red, custom_id = "fact_or_freak:pass")
     async def pass_turn(self, interaction: Interaction, _):
         confirmation_menu = ConfirmPassUI()
 
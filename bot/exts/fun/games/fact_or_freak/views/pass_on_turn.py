@@ -1,59 +1,178 @@
 from __future__ import annotations
 from ..decals import CHECK
-from discord import ButtonStyle as BS, Colour, Embed, Interaction, Member
-from discord.ui import Button
-from ....utils.bases import OwnedView
+from discord import ButtonStyle as BS, Colour, Embed, Interaction, Member, SelectOption
+from discord.ui import Button, DynamicItem, Item, Select
+from math import ceil
+from re import Match
+from bot.utils.bases import OwnedView
+from bot.utils.turns import GameDispatcher
 
-class UserOptionButton(Button):
-    view: PassOnTurnUI # type: ignore
+class PlayerSelect(DynamicItem[Select], template = r"fact_or_freak:pass_to:(?P<session_id>\d+)"):
+    "The menu of players the turn can be passed onto."
 
-    def __init__(self, deciding_member: Member, user_as_option: Member) -> None:
+    def __init__(self, session_id: int) -> None:
         super().__init__(
-            label = user_as_option.name,
-            style = BS.blurple
+            Select(
+                custom_id = f"fact_or_freak:pass_to:{session_id}",
+                placeholder = "Choose who goes next..."
+            )
         )
 
-        self.user_as_option = user_as_option
-        self.deciding_member = deciding_member
-    
+        self.session_id = session_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: Interaction, item: Item, match: Match[str]) -> PlayerSelect:
+        return cls(int(match["session_id"]))
+
     async def callback(self, interaction: Interaction) -> None:
-        if interaction.user != self.deciding_member:
-            return await interaction.response.send_message(
-                "This is not your interaction.",
-                ephemeral = True
+        if picker := await PassOnTurnUI.find(interaction, self.session_id):
+            await picker.choose(interaction, int(self.item.values[0]))
+
+
+class PageButton(DynamicItem[Button], template = r"fact_or_freak:pass_page:(?P<session_id>\d+):(?P<step>-?1)"):
+    "Turns the player menu to the previous or next page."
+
+    def __init__(self, session_id: int, step: int) -> None:
+        super().__init__(
+            Button(
+                label = "Previous" if step < 0 else "Next",
+                style = BS.grey,
+                custom_id = f"fact_or_freak:pass_page:{session_id}:{step}"
             )
-        
-        for child in self.view.children:
-            child.disabled = True
-            child.style = BS.grey
-        
-        self.style = BS.green
-        
-        self.view.selected_member = self.user_as_option
+        )
+
+        self.session_id = session_id
+        self.step = step
+
+    @classmethod
+    async def from_custom_id(cls, interaction: Interaction, item: Item, match: Match[str]) -> PageButton:
+        return cls(int(match["session_id"]), int(match["step"]))
+
+    async def callback(self, interaction: Interaction) -> None:
+        if picker := await PassOnTurnUI.find(interaction, self.session_id):
+            picker.page += self.step
+            picker.render()
+
+            await interaction.response.edit_message(view = picker)
+
+
+class PassOnTurnUI(OwnedView):
+    """
+    Lets a player choose who to pass the turn onto, from a menu showing
+    `PAGE_SIZE` players a page, so lobbies of any size fit.
+
+    Each game keeps one of these, and `reset`s it every turn instead of
+    building a new one. Its items are dynamic, and look the picker up by
+    the game's session ID, so nothing is registered for each message it's
+    sent with.
+    """
+
+    PAGE_SIZE = 25
+    "The most players shown at once. This is the most options a select menu can have."
+
+    # Flicking through pages shouldn't buy more time
+    refresh_on_interaction = False
+
+    def __init__(self, session_id: int, member_to_decide: Member, all_members: list[Member]) -> None:
+        super().__init__(owner = member_to_decide, timeout = 20.0)
+
+        self.session_id = session_id
+        self.menu = PlayerSelect(session_id)
+        self.previous_page = PageButton(session_id, -1)
+        self.next_page = PageButton(session_id, 1)
+
+        self.add_item(self.menu)
+
+        # Every option made so far, keyed by member ID, so they're only made once a game
+        self._options: dict[int, SelectOption] = {}
+
+        self.reset(member_to_decide, all_members)
+
+    @classmethod
+    async def find(cls, interaction: Interaction, session_id: int) -> PassOnTurnUI | None:
+        "Returns the picker for `session_id` if it's waiting on whoever used it, telling them why if not."
+
+        picker = getattr(GameDispatcher.sessions.get(session_id), "picker", None)
+
+        if picker is None or not picker.waiting:
+            await interaction.response.send_message("This choice has already been made.", ephemeral = True)
+            return None
+
+        if not await picker.interaction_check(interaction):
+            return None
+
+        return picker
+
+    @property
+    def waiting(self) -> bool:
+        "Whether this turn's choice is yet to be made."
+
+        return self._on_finish is not None
+
+    @property
+    def pages(self) -> int:
+        return max(1, ceil(len(self.candidates) / self.PAGE_SIZE))
+
+    def reset(self, member_to_decide: Member, all_members: list[Member]) -> None:
+        "Ready the picker for another turn, with `member_to_decide` choosing one of `all_members`."
+
+        self.owner = member_to_decide
+        self.candidates = [member for member in all_members if member != member_to_decide]
+        self.selected_member: Member | None = None
+        self.page = 0
+
+        self._timer = None
+        self._timed_out = False
+        self._timeout_task = None
+
+        self.render()
+
+    def option(self, member: Member) -> SelectOption:
+        if member.id not in self._options:
+            self._options[member.id] = SelectOption(label = member.display_name[:100], value = str(member.id), description = f"@{member.name}")
+
+        return self._options[member.id]
+
+    def render(self) -> None:
+        "Fill the menu with the current page of players."
+
+        start = self.page * self.PAGE_SIZE
+
+        self.menu.item.options = [self.option(member) for member in self.candidates[start:start + self.PAGE_SIZE]]
+        self.menu.item.disabled = False
+        self.menu.item.placeholder = "Choose who goes next..." + (f" (page {self.page + 1} of {self.pages})" if self.pages > 1 else "")
+
+        for button in (self.previous_page, self.next_page):
+            if self.pages > 1 and button not in self.children:
+                self.add_item(button)
+            elif self.pages == 1 and button in self.children:
+                self.remove_item(button)
+
+        self.previous_page.item.disabled = self.page == 0
+        self.next_page.item.disabled = self.page == self.pages - 1
+
+    async def choose(self, interaction: Interaction, member_id: int) -> None:
+        self.selected_member = next(member for member in self.candidates if member.id == member_id)
+
+        # Get their questions ready while the choice is being shown
+        if (session := GameDispatcher.sessions.get(self.session_id)) is not None:
+            session.start_prefetch(self.selected_member) # type: ignore
+
+        for item in (self.menu, self.previous_page, self.next_page):
+            item.item.disabled = True
 
         await interaction.response.edit_message(
             embed = Embed(
                 title = f"{CHECK}  Chosen!",
-                description = f"You have selected {self.user_as_option.mention} to continue the game.",
+                description = f"You have selected {self.selected_member.mention} to continue the game.",
                 colour = Colour.brand_green()
             ),
-            view = self.view
+            view = self
         )
 
-        self.view.stop()
-
-class PassOnTurnUI(OwnedView):
-    children: list[UserOptionButton] # type: ignore
-
-    def __init__(self, member_to_decide: Member, all_members: list[Member]) -> None:
-        super().__init__(owner = member_to_decide)
-        
-        self.timeout = 20.0
-        self.selected_member: Member | None = None
-        self.all_members = all_members
-
-        for opponent in self.all_members:
-            if opponent == self.owner:
-                continue
+        self._resolve()
 
-            self.add_item(UserOptionButton(self.owner, opponent))
\ No newline at end of file
+    def _expire(self) -> None:
+        # The picker is used again next turn, so it's never stopped
+        self._timed_out = True
+        self._resolve()
@@ -0,0 +1,95 @@
+from bot.utils.turns import Effect, Event, TurnEngine
+from typing import Any, Self
+
+class OneSentenceEachEngine(TurnEngine):
+    """
+    The rules of One Sentence Each.
+
+    Players take turns in a fixed order, each adding one sentence to a
+    shared story. Running out of time costs a life. The story ends after
+    `SENTENCES_PER_PLAYER` rounds, or once only one writer is left.
+    """
+
+    __slots__ = ("order", "story", "length")
+
+    PHASES = ("waiting", "writing", "over")
+
+    LIVES = 2
+
+    SENTENCES_PER_PLAYER = 3
+
+    def __init__(self, player_ids: list[int], **kwargs) -> None:
+        super().__init__(player_ids, self.LIVES, **kwargs)
+
+        self.order = list(player_ids)
+        "Every player, in the order they take turns."
+
+        self.story: list[tuple[int, str]] = []
+        "Every sentence written so far, along with the ID of who wrote it."
+
+        self.length = self.SENTENCES_PER_PLAYER * len(player_ids)
+        "The number of sentences the story ends after."
+
+    def snapshot(self) -> dict[str, Any]:
+        return super().snapshot() | {
+            "order": self.order,
+            "story": self.story,
+            "length": self.length
+        }
+
+    @classmethod
+    def restore(cls, state: dict[str, Any]) -> Self:
+        engine = super().restore(state)
+
+        engine.order = state["order"]
+        engine.story = [(player_id, sentence) for player_id, sentence in state["story"]]
+        engine.length = state["length"]
+
+        return engine
+
+    def on_turn_start(self) -> list[Effect]:
+        self.phase = "writing"
+
+        return [Effect("prompt_sentence", self.current)]
+
+    def next_player(self) -> int:
+        "Returns the ID of the next player in the order who's still alive."
+
+        position = self.order.index(self.current)
+
+        for offset in range(1, len(self.order) + 1):
+            player_id = self.order[(position + offset) % len(self.order)]
+
+            if player_id in self.lives:
+                return player_id
+
+        return self.current
+
+    def transition(self, event: Event) -> list[Effect]:
+        match self.phase, event.kind:
+            case "waiting", "start":
+                return self.begin_turn(self.current)
+
+            case "writing", "written":
+                self.story.append((self.current, event.value))
+                effects = [Effect("show_sentence", self.current, event.value)]
+
+                if len(self.story) >= self.length:
+                    self.phase = "over"
+
+                    return effects + [Effect("game_over", None, self.story)]
+
+                return effects + self.begin_turn(self.next_player())
+
+            case "writing", "timed_out":
+                # Work out who's next before the current player might be removed
+                next_player = self.next_player()
+                effects = [Effect("show_timed_out", self.current)] + self.lose_life()
+
+                if self.is_over:
+                    # `lose_life` ended it on a winner, but the story is what gets shown
+                    return effects[:-1] + [Effect("game_over", None, self.story)]
+
+                return effects + self.begin_turn(next_player)
+
+        return []
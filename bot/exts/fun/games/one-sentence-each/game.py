@@ -1,11 +1,89 @@
 from bot import MyBot
+from bot.utils.game_threads import GameThreads
+from bot.utils.lobby import Lobby
+from discord import Colour, Embed, Interaction
+from discord.app_commands import command as app_command, rename as arg_rename, describe as arg_describe, allowed_contexts, allowed_installs
 from discord.ext.commands import Cog
+from ..fact_or_freak.decals import CROSS, OWNER_CROWN
+from ..fact_or_freak.enums import LobbyExitCodes
+from .views.game_ui import OneSentenceEachUI
 
 class OneSentenceEachGame(Cog):
     def __init__(self, bot: MyBot) -> None:
         self.bot = bot
         self.pool = bot.pool
 
+    @allowed_installs(guilds = True, users = False)
+    @allowed_contexts(guilds = True, dms = False, private_channels = False)
+    @app_command(name = "story", description = "Play a game of One Sentence Each.")
+    @arg_rename(lobby_name = "name")
+    @arg_describe(
+        lobby_name = "Set a custom name for the lobby you're about to create.",
+        thread = "Whether to write in a thread of its own. On by default."
+    )
+    async def play_story(self, interaction: Interaction, lobby_name: str | None = None, thread: bool = True):
+        if interaction.user in Lobby.in_lobbies:
+            return await interaction.response.send_message(
+                embed = Embed(
+                    title = f"{CROSS}  Not so fast!",
+                    description = "You're already inside a lobby, so you can't create one. Leave it to join this one.",
+                    colour = Colour.brand_red()
+                ),
+                ephemeral = True
+            )
+
+        lobby_name = (lobby_name or "📖") + " [Writers Wanted]"
+
+        lobby = Lobby(
+            timeout = 30.0,
+            leader = interaction.user, # type: ignore
+            name = lobby_name
+        )
+
+        await interaction.response.send_message(
+            embed = Embed(
+                title = lobby_name,
+                description = f"1. {interaction.user.mention}  {OWNER_CROWN}\n\n-# A story needs more than one writer.",
+                colour = Colour.brand_red()
+            ),
+            view = lobby
+        )
+
+        await lobby.wait()
+
+        if lobby.exit_code == LobbyExitCodes.LeaderLeft:
+            return
+
+        if len(lobby.members) == 1:
+            return await interaction.edit_original_response(
+                embed = Embed(
+                    title = "Lobby Failed",
+                    description = f"~~1. {lobby.leader.mention}~~\n-# Nobody wanted to write with you.",
+                    colour = Colour.brand_red()
+                ),
+                view = None
+            )
+
+        await interaction.edit_original_response(
+            embed = Embed(
+                title = "Story Commencing...",
+                description = '\n'.join(f"- {member.mention}" for member in lobby.members),
+                colour = Colour.brand_green()
+            ),
+            view = None
+        )
+
+        channel = interaction.channel
+
+        if thread:
+            channel = await GameThreads.open(
+                await interaction.original_response(),
+                f"One Sentence Each: {lobby_name.removesuffix(' [Writers Wanted]')}"
+            ) or channel
+
+        # Runs on the same dispatcher as Fact-or-Freak
+        OneSentenceEachUI(self.bot, [m.id for m in lobby.members]).start(channel) # type: ignore
+
 
 async def setup(bot: MyBot) -> None:
-    await bot.add_cog(OneSentenceEachGame(bot))
\ No newline at end of file
+    await bot.add_cog(OneSentenceEachGame(bot))
@@ -0,0 +1,166 @@
+from __future__ import annotations
+from bot.utils.bases import OwnedView
+from bot.utils.turns import Effect, Event, GameDispatcher, GameSession
+from discord import ButtonStyle as BS, Client, Colour, Embed, Interaction, Member, PartialMessage, TextChannel, TextStyle
+from discord.ui import button, Modal, TextInput
+from ...fact_or_freak.decals import CROSS, HEART_BREAK, HEART_SHINE
+from ..engine import OneSentenceEachEngine
+from logging import getLogger
+from time import time
+from typing import Any
+
+logger = getLogger(__name__)
+
+class SentenceModal(Modal):
+    def __init__(self) -> None:
+        super().__init__(
+            title = "Your Sentence",
+            timeout = 45
+        )
+
+    sentence = TextInput(
+        label = "Add one sentence to the story.",
+        style = TextStyle.short,
+        min_length = 3,
+        max_length = 200,
+        placeholder = "And then, out of nowhere..."
+    )
+
+    async def on_submit(self, interaction: Interaction):
+        await interaction.response.defer()
+
+
+class WriteSentenceUI(OwnedView):
+    def __init__(self, writer: Member) -> None:
+        super().__init__(writer, timeout = 60.0)
+
+        self.sentence: str | None = None
+
+    @button(label = "Write", style = BS.blurple, custom_id = "one_sentence_each:write")
+    async def write(self, interaction: Interaction, _):
+        modal = SentenceModal()
+
+        await interaction.response.send_modal(modal)
+
+        if await modal.wait():
+            return
+
+        self.sentence = modal.sentence.value.strip()
+        self.stop()
+
+
+@GameDispatcher.register
+class OneSentenceEachUI(GameSession):
+    "Plays a game of One Sentence Each in a channel, carrying out the effects of `OneSentenceEachEngine`."
+
+    KIND = "one_sentence_each"
+    ENGINE = OneSentenceEachEngine
+
+    engine: OneSentenceEachEngine
+    channel: TextChannel
+
+    def __init__(self, bot: Client, player_ids: list[int], engine: OneSentenceEachEngine | None = None) -> None:
+        super().__init__(bot, player_ids, engine)
+
+        self._turn_message_id: int | None = None
+
+    @property
+    def turn_message(self) -> PartialMessage:
+        return self.channel.get_partial_message(self._turn_message_id) # type: ignore
+
+    def snapshot(self) -> dict[str, Any]:
+        return super().snapshot() | {"message": self._turn_message_id}
+
+    async def reattach(self, state: dict[str, Any]) -> None:
+        self._turn_message_id = state["message"]
+
+        if self.engine.phase == "writing":
+            self.bot.add_view(self.sentence_view(), message_id = self._turn_message_id)
+
+    def sentence_view(self) -> WriteSentenceUI:
+        "Create the view for writing the next sentence, posting its result to the dispatcher once it stops."
+
+        view = WriteSentenceUI(self.member(self.engine.current))
+
+        self.post_when_finished(
+            view,
+            lambda timed_out: Event("timed_out") if timed_out or not view.sentence else Event("written", view.sentence)
+        )
+
+        return view
+
+    def render_story(self) -> str:
+        if not self.engine.story:
+            return "-# Nothing yet. No pressure."
+
+        return ' '.join(sentence for _, sentence in self.engine.story)
+
+    async def on_prompt_sentence(self, effect: Effect) -> None:
+        writer = self.member(effect.player_id) # type: ignore
+
+        message = await self.channel.send(
+            writer.mention,
+            embed = Embed(
+                title = f"Sentence {len(self.engine.story) + 1} of {self.engine.length}",
+                description = f"> {self.render_story()}\n\nIt's your turn to continue the story.\nYou must write: <t:{int(time()) + 61}:R>",
+                colour = Colour.blurple()
+            ),
+            view = self.sentence_view()
+        )
+
+        self._turn_message_id = message.id
+
+    async def on_show_sentence(self, effect: Effect) -> None:
+        writer = self.member(effect.player_id) # type: ignore
+
+        await self.turn_message.edit(
+            content = None,
+            embed = Embed(
+                description = f"> {effect.value}",
+                colour = Colour.brand_green()
+            ).set_author(
+                name = f"Written by {writer}",
+                icon_url = writer.display_avatar.url
+            ),
+            view = None
+        )
+
+    async def on_show_timed_out(self, effect: Effect) -> None:
+        writer = self.member(effect.player_id) # type: ignore
+
+        await self.turn_message.edit(
+            embed = Embed(
+                title = f"{CROSS}  Writer's block.",
+                description = f"{writer.mention} didn't write anything in time, and lost a life.",
+                colour = Colour.brand_red()
+            ),
+            view = None
+        )
+
+    async def on_announce_death(self, effect: Effect) -> None:
+        writer = self.member(effect.player_id) # type: ignore
+
+        await self.channel.send(
+            writer.mention,
+            embed = Embed(
+                title = f"{HEART_BREAK}  Out of ink.",
+                description = "You ran out of lives, so the story will have to go on without you.",
+                colour = Colour.brand_red()
+            )
+        )
+
+    async def on_game_over(self, effect: Effect) -> None:
+        writers = {player_id for player_id, _ in self.engine.story}
+
+        await self.channel.send(
+            ' '.join(f"<@{player_id}>" for player_id in self.engine.order),
+            embed = Embed(
+                title = f"{HEART_SHINE}  The End",
+                description = f"> {self.render_story()}",
+                colour = 0xffcc4d
+            ).set_footer(
+                text = f"{len(self.engine.story)} sentences by {len(writers)} writer{'s' if len(writers) != 1 else ''}."
+            )
+        )
+
+        logger.info(f"Story finished after {self.engine.turns} turns with {len(self.engine.story)} sentences.")
@@ -1,6 +1,6 @@
 from bot import MyBot
 from discord import ClientUser, Colour, Embed
-from discord.ext.commands import BucketType, Command, Cog, CooldownMapping, Group, HelpCommand
+from discord.ext.commands import BucketType, Command, Cog, Context, CooldownMapping, Group, HelpCommand
 from ..source import SourceCode, add_link_button
 from typing import Generator
 
@@ -16,6 +16,13 @@ class Help(HelpCommand):
             "cooldown": CooldownMapping.from_cooldown(2, 5.0, BucketType.user)
         }
     
+    async def prepare_help_command(self, ctx: Context, command: str | None = None) -> None:
+        # Placeholders for lazy extensions' commands have no help of their own
+        if command:
+            await ctx.bot.load_lazy_command(command)
+
+        await super().prepare_help_command(ctx, command)
+
     async def send_bot_help(self, _) -> None:
         this_bot: ClientUser = self.context.bot.user # type: ignore
         
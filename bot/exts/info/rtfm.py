@@ -1,12 +1,22 @@
 import logging, re
 from bot import MyBot
+from sys import intern
 from discord import Colour, Embed
 from discord.app_commands import allowed_contexts, allowed_installs, describe
 from discord.ext.commands import Cog, Context, hybrid_command
 
 logger = logging.getLogger(__name__)
 
+# For clarity in typehints
+type Symbol = tuple[str, str, str, str, str]
+"A row from the `sphinx-symbols` table, as `(name, link, usage, description, module_name)`."
+
 class RTFM(Cog):
+    PRELOAD = True
+    "Whether to hold the whole `sphinx-symbols` table in memory instead of querying it for every lookup."
+
+    index: dict[str, Symbol]
+
     def __init__(self, bot: MyBot) -> None:
         self.bot = bot
         self.docs_db_pool = bot.docs_db_pool
@@ -15,6 +25,35 @@ class RTFM(Cog):
         # self.discord_py_docs_prefixes = ["discord", "discord.ext", "discord.ui", "discord.ext.commands"]
 
         self.discord_py_docs_regex = re.compile(r"^(?:discord\.)?(?:(?:ext\.(?:commands\.))|(?:ui\.))?(.+)")
+
+        self.index = {}
+
+    async def cog_load(self) -> None:
+        if not self.PRELOAD:
+            return
+        
+        async with self.docs_db_pool.acquire() as conn:
+            rows = await conn.fetchall("SELECT name, link, usage, description, module_name FROM 'sphinx-symbols'")
+
+        # Module names repeat for every symbol, so only keep one copy of each
+        self.index = {
+            row["name"]: (row["name"], row["link"], row["usage"], row["description"], intern(row["module_name"]))
+            for row in rows
+        }
+
+        logger.info(f"Preloaded {len(self.index)} documentation symbols.")
+
+    async def lookup(self, query: str) -> Symbol | None:
+        "Find a symbol by its exact name, from the preloaded index if there is one."
+
+        if self.index:
+            return self.index.get(query)
+        
+        async with self.docs_db_pool.acquire() as conn:
+            req = await conn.execute("SELECT name, link, usage, description, module_name FROM 'sphinx-symbols' WHERE name = ?", query)
+            row = await req.fetchone()
+
+        return tuple(row) if row else None # type: ignore
     
     @hybrid_command(
         name = "docs",
@@ -25,11 +64,9 @@ class RTFM(Cog):
     @allowed_contexts(guilds = True, dms = True, private_channels = True)
     @describe(query = "the Python or discord.py object to search for.")
     async def get_documentation(self, ctx: Context, query: str):
-        async with self.docs_db_pool.acquire() as conn:
-            req = await conn.execute("SELECT name, link, usage, description, module_name FROM 'sphinx-symbols' WHERE name = ?", query)
-            row = await req.fetchone()
+        symbol = await self.lookup(query)
 
-        if not row:
+        if not symbol:
             return await ctx.reply(
                 embed = Embed(
                     title = "Nope.",
@@ -39,25 +76,25 @@ class RTFM(Cog):
                 ephemeral = True
             )
         
-        obj_name = row["name"]
+        obj_name, link, usage, description, module_name = symbol
 
-        if row["module_name"] == "discord.py":
+        if module_name == "discord.py":
             obj_name = re.sub(self.discord_py_docs_regex, r'\1', obj_name)
 
         await ctx.reply(
             embed = Embed(
                 title = obj_name,
-                url = row["link"],
+                url = link,
 
                 # If there are no usages, add the description.
                 # If there ARE usages, separate with two newlines.
                 description = '\n\n'.join([
-                    row["usage"], row["description"]
+                    usage, description
                 ]),
 
                 colour = MyBot.EMBED_COLOUR
             ).set_footer(
-                text = f"This is a {row["module_name"].capitalize()} object."
+                text = f"This is a {module_name.capitalize()} object."
             )
         )
 
@@ -114,6 +114,9 @@ class SourceCode(Cog):
                 view = add_link_button(self.github_repo_url, "Go to GitHub")
             )
 
+        # Commands from lazy extensions only exist once they're loaded
+        await self.bot.load_lazy_command(name)
+
         if not (command := self.bot._commands.get(name)):
             return await interaction.response.send_message(
                 embed = Embed(
@@ -139,9 +142,9 @@ class SourceCode(Cog):
 
         return [
             Choice(name = cmd_name, value = cmd_name)
-            for cmd_name in commands
+            for cmd_name in [*commands, *interaction.client.deferred_command_names()] # type: ignore
             if current in cmd_name
-        ]
+        ][:25]
 
 
 async def setup(bot: MyBot) -> None:
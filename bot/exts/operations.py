@@ -1,9 +1,19 @@
 from aiofiles import open as aopen
 from asyncio import sleep as wait
 from bot import MyBot
+from bot.utils.coalescer import EditCoalescer
+from bot.utils.game_threads import GameThreads
+from bot.utils.timers import TimerWheel
+from bot.utils.turns import GameDispatcher
 from discord import Embed
 from discord.ext.commands import check, command, errors, group, Cog, Context
 from frontmatter import Frontmatter
+from .fun.games.fact_or_freak.statistics.aggregates import GlobalStatistics
+from .fun.games.fact_or_freak.statistics.badges import Badges
+from .fun.games.fact_or_freak.statistics.events import GameEvents
+from .fun.games.fact_or_freak.statistics.leaderboard import Leaderboard
+from .fun.games.fact_or_freak.statistics.update import UpdateStatistics as Stats
+from .fun.games.fact_or_freak.views.game_ui import GameUI
 from .info.guide import Guides
 from logging import getLogger
 
@@ -97,10 +107,14 @@ class BotUtils(Cog):
             return
         
         if extension == "all":
-            for ext in self.bot._extensions:
-                await self.bot.reload_extension(ext)
-            
-            return await ctx.reply("Reloaded `all` extensions.")
+            report = await self.bot.reload_extensions(list(self.bot._extensions))
+            failed = {name: error for name, error in report.items() if isinstance(error, Exception)}
+            timings = [seconds for seconds in report.values() if isinstance(seconds, float)]
+
+            return await ctx.reply(
+                f"Reloaded {len(timings)} extensions in {max(timings, default = 0) * 1000:.0f}ms."
+              + ''.join(f"\n- `{name}` failed: {type(error).__name__}: {error}" for name, error in failed.items())
+            )
         
         # If extension is an alias, correct it to the default name
         extension = self.reload_aliases.get(extension, extension)
@@ -144,6 +158,9 @@ class BotUtils(Cog):
     @is_owner()
     @command(name = 'sync')
     async def sync(self, ctx: Context):
+        # Lazy extensions need their app commands in the tree, or syncing would remove them
+        await self.bot.load_deferred_extensions()
+
         synced = await self.bot.tree.sync()
 
         await ctx.reply(f"Synced {len(synced)} commands:\n{'\n'.join(f"{x}. `/{cmd}`" for x, cmd in enumerate(synced))}")
@@ -159,19 +176,18 @@ class BotUtils(Cog):
             
             return
         
-        async with self.pool.acquire() as conn:
-            req = await conn.execute("SELECT prefix FROM custom_prefixes WHERE user_id = ?", ctx.author.id)
-            row = await req.fetchone()
-
-            current_prefix = row["prefix"] if row else self.bot.command_prefix
+        current_prefix = self.bot.prefixes.get(ctx.author.id)
 
-            if prefix == current_prefix:
-                await ctx.reply("You already have that as your default prefix!")
-                return
-            
+        if prefix == current_prefix:
+            await ctx.reply("You already have that as your default prefix!")
+            return
+        
+        async with self.pool.acquire() as conn:
             if prefix == "reset":
                 await conn.execute("DELETE FROM custom_prefixes WHERE user_id = ?", ctx.author.id)
 
+                self.bot.prefixes.reset(ctx.author.id)
+
                 await ctx.reply(f"Your prefix has been reset to the default `{self.bot.command_prefix}`")
 
                 return
@@ -190,9 +206,116 @@ class BotUtils(Cog):
                 }
             )
 
-            await ctx.reply(f"Your prefix has been changed from `{current_prefix}` to `{prefix}`")
+        self.bot.prefixes.set(ctx.author.id, prefix)
 
-            return
+        await ctx.reply(f"Your prefix has been changed from `{current_prefix}` to `{prefix}`")
+
+    @is_owner()
+    @command(name = 'replay')
+    async def replay_events(self, ctx: Context, apply: bool = False):
+        "Rebuild the `statistics` table from the `game_events` log, or only check it against the log unless `apply` is set."
+
+        # Anything still buffered has to be in both the log and the table before they're compared
+        await Stats.flush()
+
+        report = await GameEvents.replay(self.bot.reader, self.pool, apply = apply)
+
+        if report.applied:
+            async with self.pool.acquire() as conn:
+                await Badges.backfill(conn)
+
+            Leaderboard.invalidate(GameEvents.COLUMNS)
+            GlobalStatistics.invalidate()
+            Stats.forget()
+
+        await ctx.reply(
+            f"Replayed **{report.events}** events for **{report.users}** users. "
+          + (f"**{len(report.mismatched)}** users didn't match the log" if report.mismatched else "Everyone matched the log")
+          + (", and have been rebuilt from it." if report.applied else "." if not report.mismatched else f". Run `{ctx.prefix}replay true` to rebuild them.")
+        )
+
+    @is_owner()
+    @command(name = 'metrics')
+    async def show_metrics(self, ctx: Context):
+        prefixes = self.bot.prefixes
+
+        embed = Embed(
+            title = "Metrics",
+            colour = self.bot.EMBED_COLOUR
+        )
+
+        embed.add_field(
+            name = "Prefix Cache",
+            value = f"Entries: {len(prefixes)}\nLookups: {prefixes.lookups}\nHit rate: {prefixes.hit_rate:.2%}\nRejected early: {prefixes.rejected}",
+            inline = False
+        )
+
+        profiles = self.bot.profiles
+
+        embed.add_field(
+            name = "Profile Cache",
+            value = f"Entries: {len(profiles)}\nHit rate: {profiles.hit_rate:.2%}\nUnresolved: {profiles.unresolved}",
+            inline = False
+        )
+
+        for pool in (self.bot.pool, self.bot.reader):
+            embed.add_field(
+                name = f"Database ({pool.name.capitalize()})",
+                value = f"In use: {pool.in_use}/{pool.size} ({pool.saturation:.0%})\nWaiting: {pool.waiting}\nAverage wait: {pool.average_wait * 1000:.2f}ms\nLongest wait: {pool.max_wait * 1000:.2f}ms",
+                inline = True
+            )
+
+        embed.add_field(
+            name = "Statistics Buffer",
+            value = f"Depth: {Stats.buffer_depth()}\nEvents waiting: {GameEvents.buffer_depth()}\nEvents recorded: {GameEvents.recorded}\nFlushes: {Stats.flushes}\nLast flush: {Stats.last_flush_latency * 1000:.2f}ms\nSlowest flush: {Stats.max_flush_latency * 1000:.2f}ms",
+            inline = False
+        )
+
+        embed.add_field(
+            name = "Leaderboards",
+            value = f"Rank caches: {len(Leaderboard._ranks)}\nRebuilds: {Leaderboard.rebuilds}\nValues moved: {Leaderboard.moves}\nGlobal summaries: {GlobalStatistics.computes}",
+            inline = False
+        )
+
+        embed.add_field(
+            name = "Games",
+            value = f"Turns played: {GameUI.total_turns}\nChannel REST calls: {GameUI.total_rest_calls}\nCalls per turn: {GameUI.total_rest_calls / GameUI.total_turns if GameUI.total_turns else 0:.2f}",
+            inline = False
+        )
+
+        embed.add_field(
+            name = "Lobby Edits",
+            value = f"Requested: {EditCoalescer.total_requested}\nSent: {EditCoalescer.total_sent}\nSaved: {EditCoalescer.total_saved()}",
+            inline = False
+        )
+
+        embed.add_field(
+            name = "View Timers",
+            value = f"Active: {TimerWheel.active}\nFired: {TimerWheel.fired}",
+            inline = False
+        )
+
+        embed.add_field(
+            name = "Game Dispatcher",
+            value = f"Games in progress: {len(GameDispatcher.sessions)}\nEvents handled: {GameDispatcher.dispatched}\nEvents queued: {GameDispatcher.queued()}\nEngine memory: {GameDispatcher.footprint() / 1024:.1f}KiB\nAborted: {GameDispatcher.aborted}\nCheckpoints saved: {GameDispatcher.checkpoints}\nAverage checkpoint: {GameDispatcher.average_snapshot_size():.0f} bytes",
+            inline = False
+        )
+
+        embed.add_field(
+            name = "Game Threads",
+            value = f"Opened: {GameThreads.opened}\nArchived: {GameThreads.archived}\nAwaiting archive: {len(GameThreads.pending)}",
+            inline = False
+        )
+
+        slowest = sorted(self.bot.extension_load_times.items(), key = lambda x: x[1], reverse = True)[:5]
+
+        embed.add_field(
+            name = "Slowest Extensions",
+            value = '\n'.join(f"- `{name}`: {seconds * 1000:.1f}ms" for name, seconds in slowest) or "Nothing loaded yet.",
+            inline = False
+        )
+
+        await ctx.reply(embed = embed)
 
 
 async def setup(bot: MyBot) -> None:
@@ -1,33 +1,78 @@
 from aiohttp import ClientSession
-from asqlite import create_pool, Pool
+from asyncio import create_task, gather, Task
 from discord.ext.commands import Bot
 from discord import Activity, ActivityType, Colour, Embed, Forbidden, HTTPException, Member, Message, Intents, User
 from discord.app_commands import Group
-from discord.ext.commands import Command, Context, errors
+from discord.ext.commands import Command, Context, errors, HybridCommand, HybridGroup
+from bot.exts.fun.games.fact_or_freak.decks import QuestionBank
+from bot.exts.fun.games.fact_or_freak.statistics.aggregates import GlobalStatistics
+from bot.exts.fun.games.fact_or_freak.statistics.badges import Badges
+from bot.exts.fun.games.fact_or_freak.statistics.rollups import Rollups
 from bot.exts.fun.games.fact_or_freak.statistics.update import UpdateStatistics
+from bot.utils.database import create_immutable_pool, create_pools, MeteredPool
+from bot.utils.extensions import ExtensionRegistry, make_placeholder
 from bot.utils.mentionable_tree import MentionableTree
-from glob import glob as find
+from bot.utils.migrations import apply_migrations, verify_query_plans
+from bot.utils.prefixes import PrefixCache
+from bot.utils.profiles import ProfileCache
+from bot.utils.turns import GameDispatcher
 from gidgethub.aiohttp import GitHubAPI
 from .log import get_handler
-from typing import Generator
+from logging import getLogger
+from time import perf_counter
+from typing import Awaitable, Callable, Generator, Iterable
+
+logger = getLogger(__name__)
 
 OWNER_ID = 566653183774949395
 
 class MyBot(Bot):
-    pool: Pool
+    pool: MeteredPool
+    "The writer pool for the main database."
+
+    reader: MeteredPool
+    "The read-only pool for the main database."
+
     tree: MentionableTree # type: ignore
     owner: User
     github_api: GitHubAPI
+    registry: ExtensionRegistry
+    schema_version: int
+
+    prefixes: PrefixCache
+    "An in-memory copy of every user's custom prefix."
+
+    profiles: ProfileCache
+    "A cache of the names and avatars of users who submitted questions."
 
     _extensions: list[str]
     "A list of module paths for extensions loaded by the bot."
 
+    extension_load_times: dict[str, float]
+    "A mapping of extension module paths to how long they last took to load, in seconds."
+
     _commands: dict[str, Command]
     "A dictionary mapping names to their `Command` instances."
 
+    _deferred: set[str]
+    "A set of module paths for lazy extensions that haven't been loaded yet."
+
+    _deferred_app_commands: dict[str, str]
+    "A dictionary mapping app command names to the lazy extension that registers them."
+
+    _lazy_loads: dict[str, Task[tuple[str, float]]]
+
     EMBED_COLOUR = 0x2c89c9
+
+    LAZY_EXTENSIONS = {
+        "bot.exts.fun.bible",
+        "bot.exts.info.github_lookup",
+        "bot.exts.info.pypi",
+        "bot.exts.info.rtfm"
+    }
+    "Extensions that are only loaded the first time one of their commands is used, when running in lazy mode."
     
-    def __init__(self) -> None:
+    def __init__(self, *, lazy: bool = True) -> None:
         super().__init__(
             command_prefix = '?',
             help_command = None,
@@ -36,37 +81,95 @@ class MyBot(Bot):
         )
         
         self._extensions = []
+        self.extension_load_times = {}
+
+        self.registry = ExtensionRegistry()
+
+        self.lazy = lazy
+        self._deferred = set()
+        self._deferred_app_commands = {}
+        self._lazy_loads = {}
+
+        self.prefixes = PrefixCache(default = str(self.command_prefix))
     
     async def get_prefix(self, message: Message, /) -> str:
-        async with self.pool.acquire() as conn:
-            req = await conn.execute(
-                "SELECT prefix FROM custom_prefixes WHERE user_id = ?",
-                message.author.id
-            )
-            row = await req.fetchone()
-        
-        return row["prefix"] if row else str(self.command_prefix)
+        return self.prefixes.get(message.author.id)
+
+    async def process_commands(self, message: Message, /) -> None:
+        # Drop anything that can't be a command before doing any prefix lookups
+        if message.author.bot or not self.prefixes.could_match(message.content):
+            return
+
+        await super().process_commands(message)
     
     async def setup_hook(self) -> None:
         self._cs = ClientSession()
         self.github_api = GitHubAPI(self._cs, "")
 
-        self.pool = await create_pool('main-database.sql')
+        self.pool, self.reader = await create_pools('main-database.sql')
         UpdateStatistics.pool = self.pool
+        UpdateStatistics.reader = self.reader
+        UpdateStatistics.start_flushing()
+        Badges.reader = self.reader
+        GlobalStatistics.reader = self.reader
+        Rollups.pool, Rollups.reader = self.pool, self.reader
+
+        async with self.pool.acquire() as conn:
+            self.schema_version = await apply_migrations(conn)
+            await verify_query_plans(conn)
+
+            # Awards any badges added since the bot last started
+            await Badges.backfill(conn)
+
+        await self.prefixes.load(self.reader)
+        await QuestionBank.load(self.reader)
+
+        self.profiles = ProfileCache(self, self.pool, self.reader)
+        await self.profiles.warm()
+
+        await GameDispatcher.load_checkpoints(self.pool)
 
-        self.docs_db_pool = await create_pool('exts/utils/documentation.sql')
+        self.docs_db_pool = await create_immutable_pool('exts/utils/documentation.sql')
 
-        for path in find('bot/exts/**/*.py', recursive = True):
-            if 'async def setup' in open(path, errors = "ignore").read():
-                await self.load_extension(path.replace('.py', '').replace('\\', '.'))
+        started = perf_counter()
 
+        report = await self.load_extensions(
+            name
+            for name in self.registry.scan()
+            if not self.defer_extension(name)
+        )
+
+        timings = {name: seconds for name, seconds in report.items() if isinstance(seconds, float)}
+
+        for name, seconds in sorted(timings.items(), key = lambda x: x[1], reverse = True):
+            logger.info(f"Loaded '{name}' in {seconds * 1000:.1f}ms")
+
+        logger.info(
+            f"Loaded {len(timings)} extensions in {(perf_counter() - started) * 1000:.1f}ms, deferring {len(self._deferred)}"
+          + (f", and {len(report) - len(timings)} failed to load" if len(report) != len(timings) else "")
+        )
+
+        self._refresh_commands()
+
+        self.owner = self.get_user(566653183774949395) or await self.fetch_user(566653183774949395)
+
+        # Channels aren't cached until the bot is ready, so games are resumed in the background
+        create_task(self.resume_games())
+
+    async def resume_games(self) -> None:
+        "Resume every game that was in progress when the bot last shut down."
+
+        await self.wait_until_ready()
+
+        resumed = await GameDispatcher.resume(self)
+        logger.info(f"Resumed {resumed} games in progress")
+        
+    def _refresh_commands(self) -> None:
         self._commands = {
             cmd.qualified_name: cmd
             for cmd in self.get_all_commands()
         }
 
-        self.owner = self.get_user(566653183774949395) or await self.fetch_user(566653183774949395)
-        
     def get_all_commands(self) -> Generator[Command, None, None]:
         """
         Returns a generator of all the commands in the bot including
@@ -91,12 +194,168 @@ class MyBot(Bot):
                 else:
                     yield cmd # type: ignore
 
+    def add_command(self, command: Command, /) -> None:
+        # Real commands take the place of a lazy extension's placeholders
+        for name in (command.name, *command.aliases):
+            existing = self.all_commands.get(name)
+
+            if existing and "lazy" in existing.extras:
+                self.remove_command(existing.name)
+
+        super().add_command(command)
+
     async def load_extension(self, name: str, /): # type: ignore
         await super().load_extension(name)
         
         if name not in self._extensions:
             self._extensions.append(name)
 
+        # Clean up any placeholders the extension didn't replace
+        for cmd in list(self.commands):
+            if cmd.extras.get("lazy") == name:
+                self.remove_command(cmd.name)
+
+        self._deferred.discard(name)
+        self.registry.record_commands(name, *self._commands_from(name))
+
+    def _commands_from(self, name: str, /) -> tuple[list[str], list[str]]:
+        "Returns the prefix command names and app command names registered by the cogs in an extension."
+
+        commands: list[str] = []
+        app_commands: list[str] = []
+
+        for cog in self.cogs.values():
+            if cog.__module__ != name:
+                continue
+
+            for cmd in cog.get_commands():
+                commands.extend([cmd.name, *cmd.aliases])
+
+                if isinstance(cmd, (HybridCommand, HybridGroup)) and cmd.app_command:
+                    app_commands.append(cmd.app_command.name)
+
+            app_commands.extend(cmd.name for cmd in cog.get_app_commands())
+
+        return commands, app_commands
+
+    def defer_extension(self, name: str, /) -> bool:
+        """
+        Register placeholders for a lazy extension instead of loading it,
+        returning `True` if the extension was deferred.
+
+        Extensions are only deferred in lazy mode, and only once the
+        registry knows which commands they provide.
+        """
+
+        entry = self.registry.get(name)
+
+        if not self.lazy or name not in self.LAZY_EXTENSIONS or not entry or entry.commands is None:
+            return False
+
+        for cmd_name in entry.commands:
+            super().add_command(make_placeholder(name, cmd_name))
+
+        for cmd_name in entry.app_commands or []:
+            self._deferred_app_commands[cmd_name] = name
+
+        self._deferred.add(name)
+
+        return True
+
+    async def load_lazy_extension(self, name: str, /) -> None:
+        """
+        Load a deferred extension, waiting on the existing load
+        if one is already in progress.
+        """
+
+        if name not in self._lazy_loads:
+            if name not in self._deferred:
+                return
+
+            self._lazy_loads[name] = create_task(self._timed(self.load_extension, name))
+
+        await self._lazy_loads[name]
+
+        self._refresh_commands()
+
+    async def load_lazy_app_command(self, name: str, /) -> None:
+        "Load the deferred extension that registers the app command `name`, if there is one."
+
+        if extension := self._deferred_app_commands.get(name):
+            await self.load_lazy_extension(extension)
+
+    async def load_lazy_command(self, name: str, /) -> None:
+        """
+        Load the deferred extension that registers the prefix or app command
+        `name`, if there is one, so the real command can be looked up.
+        """
+
+        root = name.split(' ')[0]
+        placeholder = self.all_commands.get(root)
+
+        if placeholder and (extension := placeholder.extras.get("lazy")):
+            await self.load_lazy_extension(extension)
+
+        await self.load_lazy_app_command(root)
+
+    def deferred_command_names(self) -> list[str]:
+        "Returns the names of every command whose extension hasn't been loaded yet."
+
+        return [
+            *(cmd.name for cmd in self.commands if "lazy" in cmd.extras),
+            *(name for name, extension in self._deferred_app_commands.items() if extension in self._deferred)
+        ]
+
+    async def load_deferred_extensions(self) -> None:
+        "Load every extension that is still deferred."
+
+        await gather(*(self.load_lazy_extension(name) for name in list(self._deferred)))
+
+    async def _timed(self, method: Callable[[str], Awaitable[None]], name: str, /) -> tuple[str, float]:
+        started = perf_counter()
+        await method(name)
+
+        self.extension_load_times[name] = perf_counter() - started
+
+        return name, self.extension_load_times[name]
+
+    async def load_extensions(self, names: Iterable[str], /) -> dict[str, float | Exception]:
+        """
+        Load several extensions concurrently, returning a mapping of each
+        extension to how long it took to load in seconds, or to the
+        exception it raised if it failed to.
+        """
+
+        return await self._timed_all(self.load_extension, names)
+
+    async def reload_extensions(self, names: Iterable[str], /) -> dict[str, float | Exception]:
+        """
+        Reload several extensions concurrently, returning a mapping of each
+        extension to how long it took to reload in seconds, or to the
+        exception it raised if it failed to.
+        """
+
+        return await self._timed_all(self.reload_extension, names)
+
+    async def _timed_all(self, method: Callable[[str], Awaitable[None]], names: Iterable[str], /) -> dict[str, float | Exception]:
+        names = list(names)
+
+        # One extension failing shouldn't stop the report on the others, or leave them running unobserved
+        results = await gather(*(self._timed(method, name) for name in names), return_exceptions = True)
+        report: dict[str, float | Exception] = {}
+
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+
+                logger.error(f"Failed to {method.__name__.removesuffix('_extension')} '{name}'", exc_info = result)
+                report[name] = result
+            else:
+                report[name] = result[1]
+
+        return report
+
     async def can_dm(self, person: User | Member, /) -> bool: # type: ignore
         "Check to see if a user can be directly messaged."
         
@@ -133,7 +392,11 @@ class MyBot(Bot):
     async def close(self) -> None:
         await super().close()
 
+        await UpdateStatistics.stop_flushing()
+        await self.profiles.close()
+
         await self.docs_db_pool.close()
+        await self.reader.close()
         await self.pool.close()
 
         await self._cs.close()
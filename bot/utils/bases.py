@@ -1,8 +1,117 @@
-from asyncio import wait_for, TimeoutError as _TimeoutError
+from asyncio import create_task, Task
 from discord import Interaction, Member
 from discord.ui import View
+from logging import getLogger
+from .timers import Timer, TimerWheel
+from typing import Callable
 
-class FixedTimeView(View):
+logger = getLogger(__name__)
+
+class TimedView(View):
+    """
+    An abstract base subclass of `View` whose timeout is kept on the
+    shared `TimerWheel`, instead of discord.py starting a task for
+    every view.
+
+    Like a normal view, the timeout restarts whenever someone interacts
+    with it, `on_timeout` is called if it times out, and `wait` returns
+    `True` if it did.
+    """
+
+    refresh_on_interaction = True
+    "Whether interacting with the view restarts its timeout."
+
+    def __init__(self, timeout: float | None = 180.0) -> None:
+        # discord.py never sees the timeout, so it doesn't start a task of its own
+        super().__init__(timeout = None)
+
+        self.time_limit = timeout
+        "The number of seconds before the view times out, or `None` if it never does."
+
+        self._timer: Timer | None = None
+        self._timed_out = False
+        self._timeout_task: Task | None = None
+        self._on_finish: Callable[[bool], object] | None = None
+
+    def _expire(self) -> None:
+        self._timed_out = True
+        self.stop()
+
+    def refresh_timeout(self) -> None:
+        "Restart the view's timeout from now."
+
+        if self._timer and self._timer.active:
+            self._timer.reschedule(self.time_limit) # type: ignore
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        if self.refresh_on_interaction:
+            self.refresh_timeout()
+
+        return True
+
+    async def _call_on_timeout(self) -> None:
+        try:
+            await self.on_timeout()
+        except Exception:
+            logger.exception(f"Ignoring exception in the on_timeout of {type(self).__name__}")
+
+    def _resolve(self) -> None:
+        """
+        Cancel the timeout, start `on_timeout` if it timed out, and call the
+        callback given to `then`, if there is one.
+        """
+
+        if self._timer:
+            self._timer.cancel()
+
+        # Started here rather than in `wait`, so views that are never waited on still get it, but only once
+        if self._timed_out and self._timeout_task is None:
+            self._timeout_task = create_task(self._call_on_timeout())
+
+        if self._on_finish:
+            callback, self._on_finish = self._on_finish, None
+            callback(self._timed_out)
+
+    def stop(self) -> None:
+        super().stop()
+
+        self._resolve()
+
+    def _start_timer(self) -> None:
+        if self.time_limit is not None and self._timer is None and not self.is_finished():
+            self._timer = TimerWheel.schedule(self.time_limit, self._expire)
+
+    def then(self, callback: Callable[[bool], object]) -> None:
+        """
+        Start the view's timeout, and call `callback` once the view stops
+        instead of waiting on it. The callback is passed whether the view
+        timed out.
+        """
+
+        if self.is_finished():
+            callback(self._timed_out)
+            return
+
+        self._on_finish = callback
+        self._start_timer()
+
+    async def wait(self) -> bool:
+        """
+        Operates the same as `View.wait`, pausing the logic until the
+        view closes, and calling `.on_timeout()` if it timed out.
+        """
+
+        self._start_timer()
+
+        await super().wait()
+
+        if self._timeout_task:
+            await self._timeout_task
+
+        return self._timed_out
+
+
+class FixedTimeView(TimedView):
     """
     An abstract base subclass of `View` that allows you to set
     a hard limit on the amount of time it takes for a view to
@@ -22,31 +131,14 @@ class FixedTimeView(View):
 
         super().__init__(timeout = timeout)
 
-    async def wait(self) -> bool:
-        """
-        Operates the same as `View.wait` by pausing the logic until
-        the view closes, but uses `asyncio.wait_for` instead to enforce
-        a fixed time limit.
-        
-        This automatically stops itself with `.stop()` and calls
-        `.on_timeout()` like usual.
-        """
-        
-        try:
-            await wait_for(super().wait(), timeout = self.timeout)
-            return False
-        
-        except _TimeoutError:
-            await self.on_timeout()
-            self.stop()
-            
-            return True
-    
+    # The deadline is fixed from when `.wait()` is called, so interactions don't push it back
+    refresh_on_interaction = False
+
     def __repr__(self) -> str:
-        return f"<FixedTimeView timeout={self.timeout}>"
+        return f"<FixedTimeView timeout={self.time_limit}>"
 
 
-class OwnedView(View):
+class OwnedView(TimedView):
     """
     An abstract base subclass of `View` that allows you to
     make a view's interactions accessible by only one person.
@@ -55,7 +147,7 @@ class OwnedView(View):
     one person is meant to be interacting with the view.
     """
 
-    def __init__(self, owner: Member, message: str = "This is not your interaction.") -> None:
+    def __init__(self, owner: Member, message: str = "This is not your interaction.", timeout: float | None = 180.0) -> None:
         """
         Create an `OwnedView` that only the `owner` can interact with.
 
@@ -63,7 +155,7 @@ class OwnedView(View):
         someone, who is **not** the owner, tries to interact with the view.
         """
 
-        super().__init__()
+        super().__init__(timeout = timeout)
         
         self.owner = owner
         self._message = message
@@ -73,7 +165,7 @@ class OwnedView(View):
             await interaction.response.send_message(self._message, ephemeral = True)
             return False
 
-        return True
+        return await super().interaction_check(interaction)
 
     def __repr__(self) -> str:
         return f"<OwnedView owner={self.owner}>"
\ No newline at end of file
@@ -0,0 +1,87 @@
+from asyncio import create_task, sleep, Task
+from discord import HTTPException
+from logging import getLogger
+from time import monotonic
+from typing import Awaitable, Callable
+
+logger = getLogger(__name__)
+
+class EditCoalescer:
+    """
+    Collapses bursts of edits to a single message into at most one edit
+    per `window` seconds.
+
+    The edit itself is done by `render`, which is only called when an edit
+    is actually sent, so it always renders the latest state. Requests made
+    while an edit is waiting are absorbed into it.
+    """
+
+    WINDOW = 1.0
+    "The default minimum number of seconds between edits."
+
+    total_requested = 0
+    "The number of edits requested across every coalescer."
+
+    total_sent = 0
+    "The number of edits actually sent across every coalescer."
+
+    def __init__(self, render: Callable[[], Awaitable[object]], window: float = WINDOW) -> None:
+        self.render = render
+        self.window = window
+
+        self.requested = 0
+        self.sent = 0
+
+        self._dirty = False
+        self._last_sent = 0.0
+        self._task: Task | None = None
+
+    def request(self) -> None:
+        "Ask for the message to be edited. Returns straight away."
+
+        self.requested += 1
+        EditCoalescer.total_requested += 1
+
+        self._dirty = True
+
+        if self._task is None or self._task.done():
+            self._task = create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._dirty:
+            delay = self._last_sent + self.window - monotonic()
+
+            if delay > 0:
+                await sleep(delay)
+
+            self._dirty = False
+            self._last_sent = monotonic()
+
+            self.sent += 1
+            EditCoalescer.total_sent += 1
+
+            try:
+                await self.render()
+            except HTTPException as e:
+                logger.warning(f"A coalesced edit failed: {e}")
+
+    def cancel(self) -> None:
+        "Drop any edit that hasn't been sent yet."
+
+        self._dirty = False
+
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    @property
+    def saved(self) -> int:
+        "The number of edits that were absorbed into another one."
+
+        return self.requested - self.sent - self._dirty
+
+    @classmethod
+    def total_saved(cls) -> int:
+        return cls.total_requested - cls.total_sent
+
+    def __repr__(self) -> str:
+        return f"<EditCoalescer requested={self.requested} sent={self.sent} saved={self.saved}>"
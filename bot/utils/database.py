@@ -0,0 +1,148 @@
+import sqlite3
+from asqlite import create_pool, Pool, ProxiedConnection
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import AsyncGenerator
+
+READER_POOL_SIZE = 4
+"The number of read-only connections opened to the main database."
+
+PAGE_CACHE_KIB = 16 * 1024
+"The size of the page cache for each connection, in kibibytes."
+
+MMAP_SIZE = 256 * 1024 * 1024
+"The number of bytes of the database file that each connection memory-maps."
+
+IMMUTABLE_MMAP_SIZE = 1024 * 1024 * 1024
+"The number of bytes memory-mapped by connections to immutable databases."
+
+def tune_connection(connection: sqlite3.Connection) -> None:
+    """
+    Apply the pragmas shared by every connection to the main database.
+
+    `asqlite` already puts each connection into WAL mode, which lets
+    readers carry on while a write is in progress, so `synchronous`
+    can safely be relaxed to `NORMAL`.
+    """
+
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute(f"PRAGMA cache_size = -{PAGE_CACHE_KIB}")
+    connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    connection.execute("PRAGMA busy_timeout = 5000")
+
+
+def tune_immutable_connection(connection: sqlite3.Connection) -> None:
+    "Apply the pragmas for connections to databases that never change at runtime."
+
+    connection.execute(f"PRAGMA mmap_size = {IMMUTABLE_MMAP_SIZE}")
+    connection.execute("PRAGMA temp_store = MEMORY")
+
+
+class MeteredPool:
+    """
+    A wrapper around an `asqlite` pool that keeps track of how busy it is.
+
+    This is used the same way as `Pool.acquire`:
+
+    ```py
+    async with pool.acquire() as conn:
+        ...
+    ```
+    """
+
+    def __init__(self, pool: Pool, size: int, name: str) -> None:
+        self._pool = pool
+        self.size = size
+        self.name = name
+
+        self.in_use = 0
+        self.waiting = 0
+
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[ProxiedConnection, None]:
+        "Acquire a connection, recording how long it took to get one."
+
+        started = perf_counter()
+        self.waiting += 1
+
+        try:
+            conn = await self._pool.acquire()
+        finally:
+            self.waiting -= 1
+
+        waited = perf_counter() - started
+
+        self.acquisitions += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+        self.in_use += 1
+
+        try:
+            yield conn
+        finally:
+            self.in_use -= 1
+            await self._pool.release(conn)
+
+    @property
+    def saturation(self) -> float:
+        "The fraction of connections currently in use."
+
+        return self.in_use / self.size
+
+    @property
+    def average_wait(self) -> float:
+        "The average time spent waiting for a connection, in seconds."
+
+        return self.total_wait / self.acquisitions if self.acquisitions else 0.0
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+    def __repr__(self) -> str:
+        return f"<MeteredPool name='{self.name}' in_use={self.in_use}/{self.size} waiting={self.waiting}>"
+
+
+async def create_pools(path: str) -> tuple[MeteredPool, MeteredPool]:
+    """
+    Open the database at `path` and return a tuple of a writer pool and
+    a reader pool.
+
+    SQLite only allows one writer at a time, so the writer pool has a
+    single connection that writes queue up on. The reader pool opens the
+    database read-only, so reads never wait on the writer.
+    """
+
+    # The writer is opened first so the file exists and is in WAL mode before any readers connect
+    writer = await create_pool(path, size = 1, init = tune_connection)
+
+    reader = await create_pool(
+        f"file:{path}?mode=ro",
+        uri = True,
+        size = READER_POOL_SIZE,
+        init = tune_connection
+    )
+
+    return MeteredPool(writer, 1, "writer"), MeteredPool(reader, READER_POOL_SIZE, "reader")
+
+
+async def create_immutable_pool(path: str, size: int = 2) -> Pool:
+    """
+    Open the database at `path` as read-only and immutable.
+
+    SQLite skips all locking and change detection for immutable databases,
+    so this must only be used for files that are never written to while
+    the bot is running.
+    """
+
+    return await create_pool(
+        f"file:{path}?mode=ro&immutable=1",
+        uri = True,
+        size = size,
+        init = tune_immutable_connection
+    )
@@ -0,0 +1,159 @@
+import json
+from dataclasses import asdict, dataclass
+from discord.ext.commands import Command, Context
+from glob import glob as find
+from logging import getLogger
+from os import makedirs, path as ospath
+
+logger = getLogger(__name__)
+
+MANIFEST_PATH = ".cache/extensions.json"
+"Where the manifest is kept, outside the source tree so scanning it never sees its own output."
+
+@dataclass
+class ExtensionEntry:
+    "A record of one file under `bot/exts`, as of its last modification."
+
+    path: str
+    "The path of the file, relative to the working directory."
+
+    mtime: float
+    "The modification time of the file when it was last scanned."
+
+    has_setup: bool
+    "Whether the file defines a `setup()` function, making it an extension."
+
+    commands: list[str] | None = None
+    "The prefix command names and aliases the extension registers, or `None` if it hasn't been loaded since it last changed."
+
+    app_commands: list[str] | None = None
+    "The top-level app command names the extension registers, or `None` if it hasn't been loaded since it last changed."
+
+    @property
+    def module(self) -> str:
+        "The dotted module path used to load this extension."
+
+        return self.path.removesuffix(".py").replace("\\", "/").replace("/", ".")
+
+
+def make_placeholder(extension: str, name: str) -> Command:
+    """
+    Create a hidden command that loads a lazy `extension` the first
+    time it's used, and then runs the message again so the real
+    command can handle it.
+    """
+
+    async def placeholder(ctx: Context, *, arguments: str | None = None) -> None:
+        await ctx.bot.load_lazy_extension(extension)
+        await ctx.bot.process_commands(ctx.message)
+
+    return Command(placeholder, name = name, hidden = True, extras = {"lazy": extension})
+
+
+class ExtensionRegistry:
+    """
+    A manifest of every extension in `bot/exts`.
+
+    Files are only re-read when their modification time changes,
+    and the manifest is saved to disk so that restarts don't need
+    to read every file again either.
+    """
+
+    def __init__(self, root: str = "bot/exts", manifest_path: str = MANIFEST_PATH) -> None:
+        self.root = root
+        self.manifest_path = manifest_path
+
+        self.entries: dict[str, ExtensionEntry] = {}
+        self._load_manifest()
+
+    def _load_manifest(self) -> None:
+        if not ospath.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path) as f:
+                data = json.load(f)
+
+            self.entries = {
+                entry["path"]: ExtensionEntry(**entry)
+                for entry in data
+            }
+
+        except (ValueError, TypeError, KeyError):
+            logger.warning(f"'{self.manifest_path}' could not be read, so every extension will be rescanned.")
+
+            self.entries = {}
+
+    def _save_manifest(self) -> None:
+        makedirs(ospath.dirname(self.manifest_path) or ".", exist_ok = True)
+
+        with open(self.manifest_path, "w") as f:
+            json.dump([asdict(entry) for entry in self.entries.values()], f, indent = 2)
+
+    def scan(self) -> list[str]:
+        """
+        Bring the manifest up to date with the files on disk, and return
+        the module paths of every extension found.
+
+        Only files that are new or have been modified since the last
+        scan are opened.
+        """
+
+        changed = False
+        seen: set[str] = set()
+
+        for path in find(f"{self.root}/**/*.py", recursive = True):
+            seen.add(path)
+            mtime = ospath.getmtime(path)
+
+            entry = self.entries.get(path)
+
+            if entry and entry.mtime == mtime:
+                continue
+
+            with open(path, errors = "ignore") as f:
+                has_setup = 'async def setup' in f.read()
+
+            self.entries[path] = ExtensionEntry(path, mtime, has_setup)
+            changed = True
+
+        for path in self.entries.keys() - seen:
+            del self.entries[path]
+            changed = True
+
+        if changed:
+            self._save_manifest()
+
+        return [
+            entry.module
+            for entry in self.entries.values()
+            if entry.has_setup
+        ]
+
+    def get(self, module: str) -> ExtensionEntry | None:
+        "Returns the entry for the extension at the dotted `module` path, if there is one."
+
+        for entry in self.entries.values():
+            if entry.module == module:
+                return entry
+
+        return None
+
+    def record_commands(self, module: str, commands: list[str], app_commands: list[str]) -> None:
+        """
+        Record the commands an extension registered when it was loaded,
+        so it can be deferred with placeholders on the next start-up.
+        """
+
+        entry = self.get(module)
+
+        if not entry or (entry.commands, entry.app_commands) == (commands, app_commands):
+            return
+
+        entry.commands = commands
+        entry.app_commands = app_commands
+
+        self._save_manifest()
+
+    def __repr__(self) -> str:
+        return f"<ExtensionRegistry root='{self.root}' entries={len(self.entries)}>"
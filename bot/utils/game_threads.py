@@ -0,0 +1,82 @@
+from asyncio import create_task, gather
+from discord import ChannelType, Forbidden, HTTPException, InteractionMessage, Message, TextChannel, Thread
+from logging import getLogger
+from .timers import Timer, TimerWheel
+
+logger = getLogger(__name__)
+
+class GameThreads:
+    """
+    Gives each game its own thread, so games in the same channel don't
+    share a rate limit bucket or interleave their messages.
+
+    Finished games' threads are archived in bulk, a little while after
+    the last one ends.
+    """
+
+    ARCHIVE_DELAY = 60.0
+    "How many seconds to wait after a game ends before archiving its thread."
+
+    opened = 0
+    "The number of game threads opened since the bot started."
+
+    archived = 0
+    "The number of game threads archived since the bot started."
+
+    pending: dict[int, Thread] = {}
+    "Finished games' threads waiting to be archived, keyed by ID."
+
+    _timer: Timer | None = None
+
+    @classmethod
+    async def open(cls, message: Message | InteractionMessage, name: str) -> Thread | None:
+        """
+        Start a thread from `message` for a game to be played in, or return
+        `None` if one can't be made there.
+        """
+
+        if not isinstance(message.channel, TextChannel):
+            return None
+
+        try:
+            thread = await message.create_thread(name = name[:100], auto_archive_duration = 60)
+        except (Forbidden, HTTPException):
+            logger.warning(f"Couldn't open a game thread in channel {message.channel.id}, so the game will be played there instead.")
+            return None
+
+        cls.opened += 1
+
+        return thread
+
+    @classmethod
+    def archive_later(cls, thread: Thread) -> None:
+        "Queue `thread` to be archived with every other finished game's thread."
+
+        cls.pending[thread.id] = thread
+
+        if cls._timer is None or not cls._timer.active:
+            cls._timer = TimerWheel.schedule(cls.ARCHIVE_DELAY, lambda: create_task(cls.archive_pending()))
+
+    @classmethod
+    async def archive_pending(cls) -> None:
+        "Archive and lock every queued thread at once."
+
+        threads = list(cls.pending.values())
+        cls.pending.clear()
+
+        results = await gather(
+            *(thread.edit(archived = True, locked = True) for thread in threads),
+            return_exceptions = True
+        )
+
+        for thread, result in zip(threads, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Couldn't archive game thread {thread.id}: {result}")
+            else:
+                cls.archived += 1
+
+    @classmethod
+    def is_game_thread(cls, channel: object, bot_id: int) -> bool:
+        "Whether `channel` is a thread the bot opened for a game."
+
+        return isinstance(channel, Thread) and channel.type == ChannelType.public_thread and channel.owner_id == bot_id
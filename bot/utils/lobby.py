@@ -1,6 +1,7 @@
 from __future__ import annotations
 from bot import OWNER_ID
 from .bases import FixedTimeView
+from .coalescer import EditCoalescer
 from datetime import datetime as dt
 from discord import AllowedMentions, ButtonStyle as BS, Colour, Embed, Interaction, Member
 from discord.ui import button, Button
@@ -67,13 +68,29 @@ class Lobby(FixedTimeView):
 
         self.exit_code = LobbyExitCodes.Normal
 
+        # Joins and leaves come in bursts, so the member list is edited at most once a second
+        self.updates = EditCoalescer(self._render_player_list)
+        self._latest_interaction: Interaction | None = None
+
     # Overrided to release all users from the `in_lobbies` set
     def stop(self) -> None:
         self.in_lobbies -= set(self.members)
+        self.updates.cancel()
 
         super().stop()
 
     async def update_player_list(self, interaction: Interaction) -> None:
+        "Queue an edit to the lobby's member list, coalescing it with any others in the same window."
+
+        self._latest_interaction = interaction
+        self.updates.request()
+
+    async def _render_player_list(self) -> None:
+        interaction = self._latest_interaction
+
+        if interaction is None or self.is_finished():
+            return
+
         if len(self.members) < 2 and self.start_early_button in self.children:
             self.remove_item(self.start_early_button)
         
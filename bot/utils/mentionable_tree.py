@@ -1,5 +1,6 @@
 # Credits: https://gist.github.com/LeoCx1000/021dc52981299b95ea7790416e4f5ca4
 # fmt: off
+import asyncio
 from logging import getLogger
 from typing import Optional, List, Generator
 
@@ -11,6 +12,9 @@ __all__ = ('MentionableTree',)
 _log = getLogger(__name__)
 
 class MentionableTree(app_commands.CommandTree):
+    AUTOCOMPLETE_LOAD_TIMEOUT = 2.0
+    "How long an autocomplete waits on a lazy extension to load, in seconds, before giving up on that request."
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.application_commands: dict[Optional[int], List[app_commands.AppCommand]] = {}
@@ -32,6 +36,29 @@ class MentionableTree(app_commands.CommandTree):
         self.cache.pop(guild_id, None)
         return ret
 
+    async def interaction_check(self, interaction: discord.Interaction, /) -> bool:
+        """Method overwritten to load a lazy extension before its command is looked up."""
+        if not interaction.data:
+            return True
+
+        name = interaction.data.get("name", "")
+
+        if interaction.type is discord.InteractionType.application_command:
+            # Loading can take longer than the 3 seconds Discord gives us to respond, e.g. if cog_load downloads something
+            if name in self.client.deferred_command_names() and not interaction.response.is_done(): # type: ignore
+                await interaction.response.defer(thinking=True)
+
+            await self.client.load_lazy_app_command(name) # type: ignore
+
+        elif interaction.type is discord.InteractionType.autocomplete:
+            # Autocomplete can't be deferred, so a slow load carries on in the background and these suggestions are skipped
+            try:
+                await asyncio.wait_for(asyncio.shield(self.client.load_lazy_app_command(name)), timeout=self.AUTOCOMPLETE_LOAD_TIMEOUT) # type: ignore
+            except asyncio.TimeoutError:
+                return False
+
+        return True
+
     async def get_or_fetch_commands(self, *, guild: Optional[discord.abc.Snowflake] = None):
         """Method overwritten to store the commands."""
         try:
@@ -0,0 +1,355 @@
+from asqlite import Connection
+from datetime import datetime as dt
+from logging import getLogger
+from typing import Awaitable, Callable
+
+logger = getLogger(__name__)
+
+type Migration = Callable[[Connection], Awaitable[None]]
+
+# ======================================================================================================================== #
+
+async def create_baseline_schema(conn: Connection) -> None:
+    "Create the tables captured in the original `data.sql` snapshot."
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "questions" (
+            "submitter_id"    INTEGER NOT NULL,
+            "when_submitted"  INTEGER NOT NULL,
+            "category"        INTEGER NOT NULL,
+            "content"         TEXT NOT NULL UNIQUE,
+            "addressed_to"    INTEGER NOT NULL DEFAULT -1
+        )
+        """
+    )
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "statistics" (
+            "user_id"           INTEGER NOT NULL UNIQUE,
+            "play_time"         INTEGER NOT NULL DEFAULT 0,
+            "when_last_played"  INTEGER,
+            "games_played"      INTEGER NOT NULL DEFAULT 0,
+            "lobbies_made"      INTEGER NOT NULL DEFAULT 0,
+            "games_won"         INTEGER NOT NULL DEFAULT 0,
+            "games_lost"        INTEGER NOT NULL DEFAULT 0,
+            "truths_selected"   INTEGER NOT NULL DEFAULT 0,
+            "dares_selected"    INTEGER NOT NULL DEFAULT 0,
+            "truths_answered"   INTEGER NOT NULL DEFAULT 0,
+            "dares_completed"   INTEGER NOT NULL DEFAULT 0,
+            "passes_made"       INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY("user_id")
+        )
+        """
+    )
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "custom_prefixes" (
+            "user_id"  INTEGER NOT NULL UNIQUE,
+            "prefix"   TEXT NOT NULL,
+            PRIMARY KEY("user_id")
+        )
+        """
+    )
+
+async def drop_temp_tables(conn: Connection) -> None:
+    "Drop the `sqlb_temp_table_*` tables left behind by the database editor."
+
+    rows = await conn.fetchall("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'sqlb\\_temp\\_table\\_%' ESCAPE '\\'")
+
+    for row in rows:
+        await conn.execute(f'DROP TABLE "{row["name"]}"')
+
+async def index_hot_queries(conn: Connection) -> None:
+    "Index the columns used to draw questions for a turn."
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS questions_category_addressed_to ON questions (category, addressed_to)")
+
+    await conn.execute("ANALYZE")
+
+async def create_user_profiles(conn: Connection) -> None:
+    "Create the table that caches the names and avatars of question submitters."
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "user_profiles" (
+            "user_id"     INTEGER NOT NULL,
+            "name"        TEXT NOT NULL,
+            "avatar_url"  TEXT NOT NULL,
+            "fetched_at"  REAL NOT NULL,
+            PRIMARY KEY("user_id")
+        )
+        """
+    )
+
+async def create_game_sessions(conn: Connection) -> None:
+    "Create the table that games in progress are checkpointed to."
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "game_sessions" (
+            "session_id"  INTEGER NOT NULL,
+            "kind"        TEXT NOT NULL,
+            "channel_id"  INTEGER NOT NULL,
+            "state"       TEXT NOT NULL,
+            "updated_at"  INTEGER NOT NULL,
+            PRIMARY KEY("session_id")
+        )
+        """
+    )
+
+async def create_user_badges(conn: Connection) -> None:
+    "Create the table that badges are stored in once they're earned."
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "user_badges" (
+            "user_id"    INTEGER NOT NULL,
+            "badge"      TEXT NOT NULL,
+            "earned_at"  INTEGER NOT NULL,
+            PRIMARY KEY("user_id", "badge")
+        ) WITHOUT ROWID
+        """
+    )
+
+async def index_leaderboards(conn: Connection) -> None:
+    "Index every column players are ranked by on the leaderboards."
+
+    for column in ("games_won", "play_time", "dares_completed"):
+        await conn.execute(f"CREATE INDEX IF NOT EXISTS statistics_{column} ON statistics ({column} DESC, user_id DESC)")
+
+    # This has to match the win rate metric's expression and condition exactly to be used
+    await conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS statistics_win_rate
+        ON statistics ((games_won * 1.0 / games_played) DESC, user_id DESC)
+        WHERE games_played >= 5
+        """
+    )
+
+    await conn.execute("ANALYZE")
+
+async def create_game_events(conn: Connection) -> None:
+    "Create the append-only log of everything that happens in a game."
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "game_events" (
+            "event_id"     INTEGER NOT NULL,
+            "session_id"   INTEGER NOT NULL,
+            "guild_id"     INTEGER,
+            "user_id"      INTEGER NOT NULL,
+            "kind"         TEXT NOT NULL,
+            "question_id"  INTEGER,
+            "value"        INTEGER,
+            "occurred_at"  INTEGER NOT NULL,
+            PRIMARY KEY("event_id")
+        )
+        """
+    )
+
+async def create_daily_rollups(conn: Connection) -> None:
+    "Create the tables that daily totals for every user and guild are kept in."
+
+    for table, key in (("daily_user_stats", "user_id"), ("daily_guild_stats", "guild_id")):
+        await conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS "{table}" (
+                "{key}"      INTEGER NOT NULL,
+                "day"        INTEGER NOT NULL,
+                "games"      INTEGER NOT NULL DEFAULT 0,
+                "wins"       INTEGER NOT NULL DEFAULT 0,
+                "passes"     INTEGER NOT NULL DEFAULT 0,
+                "play_time"  INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY("{key}", "day")
+            ) WITHOUT ROWID
+            """
+        )
+
+async def baseline_game_events(conn: Connection) -> None:
+    "Keep everyone's statistics from before the game event log, so replaying the log doesn't lose them."
+
+    columns = (
+        "games_played", "lobbies_made", "games_won", "games_lost", "truths_selected", "dares_selected",
+        "truths_answered", "dares_completed", "passes_made", "play_time"
+    )
+
+    await conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS "statistics_baseline" (
+            "user_id"           INTEGER NOT NULL,
+            "through_event_id"  INTEGER NOT NULL,
+            "when_last_played"  INTEGER,
+            {', '.join(f'"{column}" INTEGER NOT NULL DEFAULT 0' for column in columns)},
+            PRIMARY KEY("user_id")
+        )
+        """
+    )
+
+    # The table already includes every event logged so far, so the baseline is taken as of the latest one
+    await conn.execute(
+        f"""
+        INSERT OR IGNORE INTO statistics_baseline (user_id, through_event_id, when_last_played, {', '.join(columns)})
+        SELECT user_id, (SELECT COALESCE(MAX(event_id), 0) FROM game_events), when_last_played, {', '.join(columns)} FROM statistics
+        """
+    )
+
+async def pin_question_ids(conn: Connection) -> None:
+    "Give `questions` an explicit `INTEGER PRIMARY KEY`, so a `VACUUM` can never renumber the IDs decks and events refer to."
+
+    await conn.execute(
+        """
+        CREATE TABLE "questions_new" (
+            "question_id"     INTEGER PRIMARY KEY,
+            "submitter_id"    INTEGER NOT NULL,
+            "when_submitted"  INTEGER NOT NULL,
+            "category"        INTEGER NOT NULL,
+            "content"         TEXT NOT NULL UNIQUE,
+            "addressed_to"    INTEGER NOT NULL DEFAULT -1
+        )
+        """
+    )
+
+    # The new key takes on each question's current rowid, which it's an alias for from now on
+    await conn.execute(
+        """
+        INSERT INTO questions_new (question_id, submitter_id, when_submitted, category, content, addressed_to)
+        SELECT rowid, submitter_id, when_submitted, category, content, addressed_to FROM questions
+        """
+    )
+
+    await conn.execute("DROP TABLE questions")
+    await conn.execute("ALTER TABLE questions_new RENAME TO questions")
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS questions_category_addressed_to ON questions (category, addressed_to)")
+
+    await conn.execute("ANALYZE questions")
+
+
+MIGRATIONS: list[Migration] = [
+    create_baseline_schema,
+    drop_temp_tables,
+    index_hot_queries,
+    create_user_profiles,
+    create_game_sessions,
+    create_user_badges,
+    index_leaderboards,
+    create_game_events,
+    create_daily_rollups,
+    baseline_game_events,
+    pin_question_ids
+]
+"""
+Every migration in the order they're applied. A migration's schema
+version is its position in this list, starting from 1.
+
+Only ever append to this list - never reorder or remove entries.
+"""
+
+# ======================================================================================================================== #
+
+HOT_QUERIES: dict[str, tuple[str, tuple]] = {
+    "question draw": (
+        "SELECT submitter_id, when_submitted, category, content FROM questions WHERE question_id = ?",
+        (0,)
+    ),
+    "duplicate lookup": (
+        "SELECT submitter_id, when_submitted FROM questions WHERE content = ?",
+        ("",)
+    ),
+    "statistics update": (
+        "UPDATE statistics SET games_won = games_won + 1 WHERE user_id = ?",
+        (0,)
+    ),
+    "statistics fetch": (
+        "SELECT * FROM statistics WHERE user_id = ?",
+        (0,)
+    ),
+    "leaderboard page": (
+        "SELECT user_id, games_won FROM statistics WHERE games_won > 0 AND games_won <= ? AND (games_won < ? OR user_id < ?) ORDER BY games_won DESC, user_id DESC LIMIT 10",
+        (0, 0, 0)
+    ),
+    "win rate leaderboard page": (
+        "SELECT user_id, games_won * 1.0 / games_played FROM statistics WHERE games_played >= 5 AND games_won * 1.0 / games_played <= ? AND (games_won * 1.0 / games_played < ? OR user_id < ?) ORDER BY games_won * 1.0 / games_played DESC, user_id DESC LIMIT 10",
+        (0, 0, 0)
+    )
+}
+"A mapping of names to the queries run on every turn, with placeholder parameters to plan them with."
+
+# ======================================================================================================================== #
+
+async def get_schema_version(conn: Connection) -> int:
+    "Returns the latest schema version applied to the database, or 0 if none have been."
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version      INTEGER NOT NULL PRIMARY KEY,
+            description  TEXT NOT NULL,
+            applied_at   INTEGER NOT NULL
+        )
+        """
+    )
+
+    row = await conn.fetchone("SELECT MAX(version) AS version FROM schema_version")
+
+    return row["version"] or 0
+
+async def apply_migrations(conn: Connection) -> int:
+    """
+    Apply every migration the database hasn't seen yet, each in its own
+    transaction, and return the resulting schema version.
+
+    Raises `RuntimeError` if the database is already on a newer version
+    than this code knows about, rather than running against a schema it
+    wasn't written for.
+    """
+
+    current = await get_schema_version(conn)
+
+    if current > len(MIGRATIONS):
+        raise RuntimeError(f"The database is on schema version {current}, but only {len(MIGRATIONS)} migrations are known. Is this an older checkout?")
+
+    for version, migration in enumerate(MIGRATIONS[current:], start = current + 1):
+        description = migration.__doc__ or migration.__name__
+
+        async with conn.transaction():
+            await migration(conn)
+
+            await conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                version, description, int(dt.now().timestamp())
+            )
+
+        logger.info(f"Applied migration {version}: {description}")
+
+        current = version
+
+    return current
+
+async def verify_query_plans(conn: Connection) -> list[str]:
+    """
+    Run `EXPLAIN QUERY PLAN` on every query in `HOT_QUERIES`, and return
+    the names of the ones that would scan a whole table.
+
+    Each offending query is also logged as critical.
+    """
+
+    offenders: list[str] = []
+
+    for name, (query, parameters) in HOT_QUERIES.items():
+        plan = await conn.fetchall(f"EXPLAIN QUERY PLAN {query}", parameters)
+
+        scans = [
+            row["detail"]
+            for row in plan
+            if row["detail"].startswith("SCAN ") and "USING" not in row["detail"]
+        ]
+
+        if scans:
+            logger.critical(f"The '{name}' query does a full table scan: {'; '.join(scans)}")
+            offenders.append(name)
+
+    return offenders
@@ -0,0 +1,108 @@
+from logging import getLogger
+from re import compile
+from zlib import crc32
+import numpy as np
+
+logger = getLogger(__name__)
+
+PRIME = (1 << 31) - 1
+"Every hash is taken modulo this, so `a * x + b` always fits in 64 bits."
+
+NOT_WORD = compile(r"[^\w\s]+")
+SPACES = compile(r"\s+")
+
+def normalize(text: str) -> str:
+    "Lowercase `text`, drop its punctuation and collapse its whitespace, so trivially different texts compare equal."
+
+    return SPACES.sub(' ', NOT_WORD.sub('', text.lower())).strip()
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    "Returns the hashes of every `size`-character slice of the normalized `text`, without repeats."
+
+    text = normalize(text)
+
+    if len(text) <= size:
+        return np.array([crc32(text.encode()) & PRIME] if text else [], dtype = np.int64)
+
+    return np.unique(np.fromiter(
+        (crc32(text[start:start + size].encode()) & PRIME for start in range(len(text) - size + 1)),
+        dtype = np.int64
+    ))
+
+
+class MinHashIndex:
+    """
+    Finds texts that are nearly the same as one another, like two questions
+    that only differ by case or punctuation.
+
+    Each text is boiled down to a MinHash signature of its 3-character
+    shingles, whose agreement estimates the Jaccard similarity of the two
+    sets. Signatures are split into bands and bucketed (locality-sensitive
+    hashing), so a query only compares against texts that share a bucket
+    with it rather than against everything in the index.
+    """
+
+    PERMUTATIONS = 64
+    BANDS = 16
+    "Signatures are bucketed by this many slices, so two texts share a bucket if they match on all of a slice."
+
+    THRESHOLD = 0.7
+    "The estimated similarity above which a text counts as a near duplicate."
+
+    def __init__(self, seed: int = 1) -> None:
+        generator = np.random.default_rng(seed)
+
+        self._a = generator.integers(1, PRIME, self.PERMUTATIONS, dtype = np.int64)[:, None]
+        self._b = generator.integers(0, PRIME, self.PERMUTATIONS, dtype = np.int64)[:, None]
+
+        self._signatures: dict[int, np.ndarray] = {}
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(self.BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        "Returns the MinHash signature of `text`, or `None` if there's nothing left of it after normalizing."
+
+        hashes = shingles(text)
+
+        if not len(hashes):
+            return None
+
+        return ((self._a * hashes + self._b) % PRIME).min(axis = 1)
+
+    def _bands(self, signature: np.ndarray) -> list[bytes]:
+        return [band.tobytes() for band in np.split(signature, self.BANDS)]
+
+    def add(self, key: int, text: str) -> None:
+        "Index `text` under `key`. Texts with no letters or digits are skipped."
+
+        if (signature := self.signature(text)) is None:
+            return
+
+        self._signatures[key] = signature
+
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            buckets.setdefault(band, []).append(key)
+
+    def closest(self, text: str) -> tuple[int, float] | None:
+        "Returns the key of the most similar indexed text and its estimated similarity, if it's at least `THRESHOLD`."
+
+        if (signature := self.signature(text)) is None:
+            return None
+
+        candidates = {
+            key
+            for buckets, band in zip(self._buckets, self._bands(signature))
+            for key in buckets.get(band, ())
+        }
+
+        best: tuple[int, float] | None = None
+
+        for key in candidates:
+            similarity = float(np.count_nonzero(self._signatures[key] == signature)) / self.PERMUTATIONS
+
+            if similarity >= self.THRESHOLD and (best is None or similarity > best[1]):
+                best = (key, similarity)
+
+        return best
@@ -0,0 +1,101 @@
+from .database import MeteredPool
+from collections import Counter
+
+class PrefixCache:
+    """
+    An in-memory copy of the `custom_prefixes` table.
+
+    This is loaded once when the bot starts and is written through
+    whenever a prefix is changed or reset, so looking up a prefix
+    never has to touch the database.
+    """
+
+    def __init__(self, default: str) -> None:
+        self.default = default
+
+        self._prefixes: dict[int, str] = {}
+        self._usage: Counter[str] = Counter()
+        self._known: tuple[str, ...] = (default,)
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    async def load(self, pool: MeteredPool) -> None:
+        "Fill the cache with every row in the `custom_prefixes` table."
+
+        async with pool.acquire() as conn:
+            rows = await conn.fetchall("SELECT user_id, prefix FROM custom_prefixes")
+
+        self._prefixes = {row["user_id"]: row["prefix"] for row in rows}
+        self._usage = Counter(self._prefixes.values())
+        self._rebuild_known()
+
+    def _rebuild_known(self) -> None:
+        self._known = (self.default, *self._usage)
+
+    def could_match(self, content: str) -> bool:
+        """
+        Returns `True` if `content` starts with any prefix in use,
+        meaning the message could possibly be a command.
+        """
+
+        if content.startswith(self._known):
+            return True
+
+        self.rejected += 1
+        return False
+
+    def get(self, user_id: int) -> str:
+        "Returns the prefix for `user_id`, or the default prefix if they don't have one."
+
+        prefix = self._prefixes.get(user_id)
+
+        if prefix is None:
+            self.misses += 1
+            return self.default
+
+        self.hits += 1
+        return prefix
+
+    def set(self, user_id: int, prefix: str) -> None:
+        "Set a custom prefix for `user_id`. This must be called after the database is updated."
+
+        self.reset(user_id)
+
+        self._prefixes[user_id] = prefix
+        self._usage[prefix] += 1
+        self._rebuild_known()
+
+    def reset(self, user_id: int) -> None:
+        "Remove the custom prefix for `user_id`, if they have one."
+
+        old = self._prefixes.pop(user_id, None)
+
+        if old is None:
+            return
+
+        self._usage[old] -= 1
+
+        if not self._usage[old]:
+            del self._usage[old]
+
+        self._rebuild_known()
+
+    @property
+    def lookups(self) -> int:
+        "The total number of prefix lookups made."
+
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        "The fraction of lookups that found a custom prefix."
+
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def __repr__(self) -> str:
+        return f"<PrefixCache size={len(self)} hit_rate={self.hit_rate:.2%} rejected={self.rejected}>"
@@ -0,0 +1,212 @@
+from __future__ import annotations
+from asyncio import CancelledError, create_task, Task
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from discord import Client, HTTPException, NotFound, User
+from logging import getLogger
+from time import time
+from .database import MeteredPool
+
+logger = getLogger(__name__)
+
+DEFAULT_AVATAR_URL = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+@dataclass(slots = True)
+class Profile:
+    "The parts of a user needed to credit them in an embed."
+
+    id: int
+    name: str
+    avatar_url: str
+
+    fetched_at: float
+    "The UNIX timestamp of when this profile was last fetched from Discord."
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    @classmethod
+    def from_user(cls, user: User) -> Profile:
+        return cls(user.id, user.name, user.display_avatar.url, time())
+
+    @classmethod
+    def placeholder(cls, user_id: int) -> Profile:
+        "A stand-in for a user who hasn't been resolved yet."
+
+        return cls(user_id, "Unknown User", DEFAULT_AVATAR_URL, 0.0)
+
+
+class ProfileCache:
+    """
+    A cache of user names and avatars, backed by the `user_profiles`
+    table and an in-memory LRU.
+
+    Looking up a profile never waits on Discord: users who aren't
+    cached are resolved in the background, and a placeholder is
+    returned until they are.
+    """
+
+    CAPACITY = 4096
+    "The most profiles held in memory at once."
+
+    TTL = 24 * 60 * 60
+    "How long a profile is trusted before it's refreshed, in seconds."
+
+    def __init__(self, bot: Client, pool: MeteredPool, reader: MeteredPool) -> None:
+        self.bot = bot
+        self.pool = pool
+        self.reader = reader
+
+        self._profiles: OrderedDict[int, Profile] = OrderedDict()
+        self._unresolved: set[int] = set()
+        self._resolver: Task | None = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, profile: Profile) -> None:
+        self._profiles[profile.id] = profile
+        self._profiles.move_to_end(profile.id)
+
+        while len(self._profiles) > self.CAPACITY:
+            self._profiles.popitem(last = False)
+
+    def get(self, user_id: int) -> Profile:
+        """
+        Returns the profile for `user_id` straight away.
+
+        If the profile is missing or stale, it is refreshed in the
+        background, and the stale profile or a placeholder is returned
+        in the meantime.
+        """
+
+        profile = self._profiles.get(user_id)
+
+        if profile:
+            self.hits += 1
+            self._profiles.move_to_end(user_id)
+
+            if time() - profile.fetched_at > self.TTL:
+                self.request(user_id)
+
+            return profile
+
+        self.misses += 1
+
+        # The gateway cache is free to check, so try it before giving up
+        if user := self.bot.get_user(user_id):
+            profile = Profile.from_user(user)
+            self._remember(profile)
+            self.request(user_id)
+
+            return profile
+
+        self.request(user_id)
+
+        return Profile.placeholder(user_id)
+
+    def request(self, *user_ids: int) -> None:
+        "Queue users to be resolved and saved in the background."
+
+        self._unresolved.update(user_ids)
+
+        if self._unresolved and (self._resolver is None or self._resolver.done()):
+            self._resolver = create_task(self._resolve_unresolved())
+
+    async def _resolve_unresolved(self) -> None:
+        while self._unresolved:
+            batch = list(self._unresolved)
+            self._unresolved.clear()
+
+            resolved: list[Profile] = []
+
+            for user_id in batch:
+                try:
+                    user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+
+                except NotFound:
+                    profile = Profile(user_id, "Deleted User", DEFAULT_AVATAR_URL, time())
+
+                except HTTPException:
+                    logger.warning(f"Couldn't fetch the profile for user {user_id}.")
+                    continue
+
+                else:
+                    profile = Profile.from_user(user)
+
+                self._remember(profile)
+                resolved.append(profile)
+
+            if resolved:
+                await self._save(resolved)
+
+    async def _save(self, profiles: list[Profile]) -> None:
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO user_profiles (user_id, name, avatar_url, fetched_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    name = excluded.name,
+                    avatar_url = excluded.avatar_url,
+                    fetched_at = excluded.fetched_at
+                """,
+                [(p.id, p.name, p.avatar_url, p.fetched_at) for p in profiles]
+            )
+
+    async def warm(self) -> None:
+        """
+        Load the most recently fetched profiles from the database, and queue
+        every question submitter who doesn't have a profile yet.
+        """
+
+        async with self.reader.acquire() as conn:
+            rows = await conn.fetchall(
+                "SELECT user_id, name, avatar_url, fetched_at FROM user_profiles ORDER BY fetched_at DESC LIMIT ?",
+                self.CAPACITY
+            )
+
+            missing = await conn.fetchall(
+                """
+                SELECT DISTINCT submitter_id FROM questions
+                WHERE submitter_id NOT IN (SELECT user_id FROM user_profiles)
+                """
+            )
+
+        # Oldest first, so the most recently fetched profiles are the last to be evicted
+        for row in reversed(rows):
+            profile = Profile(row["user_id"], row["name"], row["avatar_url"], row["fetched_at"])
+            self._remember(profile)
+
+            if time() - profile.fetched_at > self.TTL:
+                self._unresolved.add(profile.id)
+
+        self.request(*(row["submitter_id"] for row in missing))
+
+    async def close(self) -> None:
+        "Stop resolving users. Anyone still unresolved is picked up again by `warm` on the next startup."
+
+        if self._resolver and not self._resolver.done():
+            self._resolver.cancel()
+
+            with suppress(CancelledError):
+                await self._resolver
+
+    @property
+    def unresolved(self) -> int:
+        "The number of users waiting to be resolved."
+
+        return len(self._unresolved)
+
+    @property
+    def hit_rate(self) -> float:
+        "The fraction of lookups that were served from memory."
+
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __repr__(self) -> str:
+        return f"<ProfileCache size={len(self)} unresolved={self.unresolved} hit_rate={self.hit_rate:.2%}>"
@@ -0,0 +1,162 @@
+from __future__ import annotations
+from asyncio import create_task, sleep, Task
+from logging import getLogger
+from math import ceil
+from time import monotonic
+from typing import Callable
+
+logger = getLogger(__name__)
+
+class Timer:
+    "A callback registered with the `TimerWheel`."
+
+    __slots__ = ("callback", "deadline", "_target", "_slot")
+
+    def __init__(self, callback: Callable[[], object], deadline: float) -> None:
+        self.callback = callback
+        self.deadline = deadline
+
+        self._target = 0
+        "The tick this timer fires on."
+
+        self._slot: set[Timer] | None = None
+        "The wheel slot this timer is in, or `None` if it isn't scheduled."
+
+    @property
+    def active(self) -> bool:
+        return self._slot is not None
+
+    def cancel(self) -> None:
+        "Stop this timer from firing. Does nothing if it already has."
+
+        if self._slot is not None:
+            self._slot.discard(self)
+            self._slot = None
+
+            TimerWheel.active -= 1
+
+    def reschedule(self, delay: float) -> None:
+        "Move this timer's deadline to `delay` seconds from now."
+
+        self.cancel()
+        self.deadline = monotonic() + delay
+
+        TimerWheel._insert(self)
+
+    def __repr__(self) -> str:
+        return f"<Timer deadline={self.deadline:.2f} active={self.active}>"
+
+
+class TimerWheel:
+    """
+    A single hierarchical timer wheel shared by every view timeout.
+
+    Timers are hashed into slots by the tick they're due on, so scheduling,
+    cancelling and rescheduling a timer are all O(1). Timers too far away
+    for the innermost wheel sit in a coarser one, and are cascaded inwards
+    as their time draws near.
+
+    One task drives every wheel, and only runs while there are timers.
+    """
+
+    TICK = 0.25
+    "The resolution of the wheel, in seconds."
+
+    SLOTS = 64
+    "The number of slots in each level of the wheel."
+
+    LEVELS = 3
+    "The number of levels. With the defaults, this covers just over 18 hours before timers are clamped."
+
+    active = 0
+    "The number of timers currently scheduled."
+
+    fired = 0
+    "The number of timers that have fired."
+
+    _wheels: list[list[set[Timer]]] = [[set() for _ in range(slots)] for slots in [SLOTS] * LEVELS]
+
+    _tick = 0
+    _epoch = monotonic()
+    _driver: Task | None = None
+
+    @classmethod
+    def schedule(cls, delay: float, callback: Callable[[], object]) -> Timer:
+        "Call `callback` after `delay` seconds, and return a `Timer` to cancel or reschedule it with."
+
+        timer = Timer(callback, monotonic() + delay)
+        cls._insert(timer)
+
+        return timer
+
+    @classmethod
+    def _insert(cls, timer: Timer, target: int | None = None) -> None:
+        if cls._driver is None or cls._driver.done():
+            # Every wheel is empty when the driver isn't running, so the ticks can be realigned to now
+            cls._tick = int((monotonic() - cls._epoch) / cls.TICK)
+            cls._driver = create_task(cls._drive())
+
+        if target is None:
+            target = max(ceil((timer.deadline - cls._epoch) / cls.TICK), cls._tick + 1)
+
+        timer._target = target
+        delta = target - cls._tick
+
+        for level in range(cls.LEVELS):
+            if delta < cls.SLOTS ** (level + 1):
+                break
+        else:
+            # Too far away for any wheel - park it in the outermost one, and re-insert it when it cascades
+            target = cls._tick + cls.SLOTS ** cls.LEVELS - 1
+
+        slot = cls._wheels[level][(target // cls.SLOTS ** level) % cls.SLOTS]
+        slot.add(timer)
+
+        if timer._slot is None:
+            cls.active += 1
+
+        timer._slot = slot
+
+    @classmethod
+    def _advance(cls) -> None:
+        cls._tick += 1
+
+        # Cascade timers from coarser wheels that have come within range of finer ones
+        for level in range(1, cls.LEVELS):
+            span = cls.SLOTS ** level
+
+            if cls._tick % span:
+                break
+
+            slot = cls._wheels[level][(cls._tick // span) % cls.SLOTS]
+            cascading = list(slot)
+            slot.clear()
+
+            for timer in cascading:
+                timer._slot = None
+                cls.active -= 1
+
+                cls._insert(timer, timer._target)
+
+        slot = cls._wheels[0][cls._tick % cls.SLOTS]
+        due = [timer for timer in slot if timer._target <= cls._tick]
+
+        for timer in due:
+            timer.cancel()
+            cls.fired += 1
+
+            try:
+                timer.callback()
+            except Exception:
+                logger.exception(f"A timer callback raised an exception: {timer.callback!r}")
+
+    @classmethod
+    async def _drive(cls) -> None:
+        while cls.active:
+            await sleep(cls.TICK)
+
+            # Catch up on any ticks missed while the event loop was busy
+            now = int((monotonic() - cls._epoch) / cls.TICK)
+
+            while cls._tick < now:
+                cls._advance()
@@ -0,0 +1,473 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from asyncio import create_task, Task
+from collections import deque
+from .bases import TimedView
+from .database import MeteredPool
+from dataclasses import dataclass, replace
+from discord import Client, HTTPException, Member
+from discord.abc import Messageable
+from .game_threads import GameThreads
+from itertools import count
+from logging import getLogger
+from json import dumps, loads
+from random import Random
+from sqlite3 import Row
+from sys import getsizeof
+from time import time
+from typing import Any, Callable, Self
+
+logger = getLogger(__name__)
+
+@dataclass(frozen = True, slots = True)
+class Event:
+    "Something that happened to a game, like a button being clicked or a view timing out."
+
+    kind: str
+    value: Any = None
+
+    turn: int | None = None
+    "The turn the event belongs to, so events that arrive after their turn is over can be dropped."
+
+
+@dataclass(frozen = True, slots = True)
+class Effect:
+    "Something a game's engine wants done in response to an event, like sending a message."
+
+    kind: str
+    player_id: int | None = None
+    value: Any = None
+
+
+class TurnEngine(ABC):
+    """
+    The pure logic of a turn-based game: who's playing, how many lives
+    they have left, whose turn it is and what phase the turn is in.
+
+    An engine never touches Discord. It's fed `Event`s through `handle`,
+    and returns the `Effect`s its session should carry out, so a game's
+    state can be inspected at any point between events.
+
+    Subclasses implement `transition`, and extend `snapshot` and `restore`
+    with any state of their own. Only IDs and counters are ever stored,
+    so an engine stays small and can be checkpointed cheaply.
+    """
+
+    __slots__ = ("rng", "lives", "dead", "current", "phase", "turns")
+
+    PHASES: tuple[str, ...] = ("waiting", "over")
+    "Every phase the game can be in, from `waiting` for the `start` event until it's `over`."
+
+    def __init__(self, player_ids: list[int], lives: int, rng: Random | None = None) -> None:
+        self.rng = rng or Random()
+
+        self.lives = dict.fromkeys(player_ids, lives)
+        "A mapping of the IDs of players still in the game to their lives left."
+
+        self.dead: list[int] = []
+        "The IDs of players who ran out of lives, in the order they died."
+
+        self.current = self.rng.choice(player_ids)
+        self.phase = "waiting"
+        self.turns = 0
+
+    @property
+    def is_over(self) -> bool:
+        return self.phase == "over"
+
+    def snapshot(self) -> dict[str, Any]:
+        "Returns the engine's state as JSON-serialisable data."
+
+        return {
+            "lives": list(self.lives.items()),
+            "dead": self.dead,
+            "current": self.current,
+            "phase": self.phase,
+            "turns": self.turns
+        }
+
+    @classmethod
+    def restore(cls, state: dict[str, Any]) -> Self:
+        "Rebuild an engine from the data returned by `snapshot`."
+
+        engine = cls.__new__(cls)
+
+        engine.rng = Random()
+        engine.lives = {player_id: lives for player_id, lives in state["lives"]}
+        engine.dead = state["dead"]
+        engine.current = state["current"]
+        engine.phase = state["phase"]
+        engine.turns = state["turns"]
+
+        return engine
+
+    def footprint(self) -> int:
+        "Roughly how many bytes the engine's state takes up in memory, not counting its RNG."
+
+        size = getsizeof(self)
+
+        for name in self.snapshot():
+            value = getattr(self, name)
+            size += getsizeof(value)
+
+            if isinstance(value, dict):
+                size += sum(getsizeof(k) + getsizeof(v) for k, v in value.items())
+            elif isinstance(value, list):
+                size += sum(map(getsizeof, value))
+
+        return size
+
+    def handle(self, event: Event) -> list[Effect]:
+        "Apply `event` to the game, and return the effects to carry out."
+
+        if self.is_over or (event.turn is not None and event.turn != self.turns):
+            return []
+
+        return self.transition(event)
+
+    @abstractmethod
+    def transition(self, event: Event) -> list[Effect]:
+        "Apply `event` to the game's state, and return the effects to carry out."
+
+    def begin_turn(self, player_id: int) -> list[Effect]:
+        "Hand the turn to `player_id`. Returns the effects for starting it."
+
+        self.current = player_id
+        self.turns += 1
+
+        return self.on_turn_start()
+
+    @abstractmethod
+    def on_turn_start(self) -> list[Effect]:
+        "Returns the effects for starting a turn, once `current` and `turns` have been updated."
+
+    def lose_life(self) -> list[Effect]:
+        """
+        Take a life from the current player, killing them if they run out,
+        and end the game if only one player is left.
+        """
+
+        self.lives[self.current] -= 1
+
+        if self.lives[self.current] > 0:
+            return []
+
+        del self.lives[self.current]
+        self.dead.append(self.current)
+
+        effects = [Effect("announce_death", self.current)]
+
+        if len(self.lives) == 1:
+            self.phase = "over"
+            self.current = next(iter(self.lives))
+
+            effects.append(Effect("game_over", self.current))
+
+        return effects
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} phase='{self.phase}' current={self.current} turns={self.turns} alive={len(self.lives)}>"
+
+
+class GameSession(ABC):
+    """
+    Something that carries out a `TurnEngine`'s effects, usually by
+    talking to Discord.
+
+    Sessions don't run a coroutine of their own. Events are posted to the
+    `GameDispatcher`, which feeds them to the engine one at a time and
+    calls `perform` for each effect.
+
+    Subclasses set `KIND` and `ENGINE`, register themselves with
+    `GameDispatcher.register`, and implement `reattach` so games can be
+    resumed after a restart.
+    """
+
+    KIND: str
+    "The name the session's checkpoints are stored under."
+
+    ENGINE: type[TurnEngine]
+
+    engine: TurnEngine
+    channel: Messageable
+
+    def __init__(self, bot: Client, player_ids: list[int], engine: TurnEngine | None = None) -> None:
+        self.bot = bot
+        self.session_id = next(GameDispatcher._ids)
+        self.engine = engine or self.ENGINE(player_ids)
+
+        self._inbox: deque[Event] = deque()
+        self._draining: Task | None = None
+
+    def member(self, player_id: int) -> Member:
+        "Returns the member for `player_id` in the game's guild."
+
+        return self.channel.guild.get_member(player_id) # type: ignore
+
+    def start(self, channel: Messageable) -> None:
+        "Start the game in `channel`. This returns straight away - the game is played out by the `GameDispatcher`."
+
+        self.channel = channel
+
+        GameDispatcher.start(self)
+
+    def post(self, event: Event) -> None:
+        "Shorthand for `GameDispatcher.post(self, event)`."
+
+        GameDispatcher.post(self, event)
+
+    def post_when_finished(self, view: TimedView, event: Callable[[bool], Event]) -> None:
+        """
+        Post the event returned by `event` once `view` stops, tagged with
+        the current turn. `event` is passed whether the view timed out.
+        """
+
+        turn = self.engine.turns
+
+        view.then(lambda timed_out: self.post(replace(event(timed_out), turn = turn)))
+
+    async def perform(self, effect: Effect) -> None:
+        "Carry out `effect`. By default, this calls the method named after the effect's kind."
+
+        await getattr(self, f"on_{effect.kind}")(effect)
+
+    def snapshot(self) -> dict[str, Any]:
+        "Returns everything needed to resume the game as JSON-serialisable data. Subclasses extend this."
+
+        return {"engine": self.engine.snapshot()}
+
+    @abstractmethod
+    async def reattach(self, state: dict[str, Any]) -> None:
+        """
+        Restore the session's own state from a checkpoint, and listen to the
+        view for the turn's current phase again.
+        """
+
+    def finish(self) -> None:
+        "Called once the game is over. By default, this queues the game's thread to be archived, if it has one."
+
+        if GameThreads.is_game_thread(self.channel, self.bot.user.id): # type: ignore
+            GameThreads.archive_later(self.channel) # type: ignore
+
+    @classmethod
+    async def restore(cls, bot: Client, session_id: int, channel: Messageable, state: dict[str, Any]) -> Self:
+        "Rebuild a session from a checkpoint."
+
+        session = cls(bot, [], engine = cls.ENGINE.restore(state["engine"]))
+        session.session_id = session_id
+        session.channel = channel
+
+        await session.reattach(state)
+
+        return session
+
+
+class GameDispatcher:
+    """
+    Routes events to every game in progress.
+
+    Each session's events are handled strictly in order, but no task is
+    kept around for a game between events - one is only started while a
+    session has events waiting.
+
+    After each event is handled, the session is checkpointed to the
+    `game_sessions` table, so games survive a restart.
+    """
+
+    pool: MeteredPool
+    "The writer pool checkpoints are saved with."
+
+    sessions: dict[int, GameSession] = {}
+    "Every session that hasn't finished, keyed by ID."
+
+    kinds: dict[str, type[GameSession]] = {}
+    "Every kind of session that can be resumed, keyed by `GameSession.KIND`."
+
+    dispatched = 0
+    "The number of events handled since the bot started."
+
+    checkpoints = 0
+    "The number of checkpoints saved since the bot started."
+
+    aborted = 0
+    "The number of games ended early since the bot started, because one of their effects failed."
+
+    snapshot_sizes: dict[int, int] = {}
+    "The size of each session's latest checkpoint, in bytes."
+
+    _ids = count(1)
+    _unresumed: list[Row] = []
+
+    @classmethod
+    def register[T: type[GameSession]](cls, session_type: T) -> T:
+        "A class decorator that lets checkpointed sessions of `session_type` be resumed."
+
+        cls.kinds[session_type.KIND] = session_type
+        return session_type
+
+    @classmethod
+    def start(cls, session: GameSession) -> None:
+        "Register `session` and send it the `start` event."
+
+        cls.sessions[session.session_id] = session
+        cls.post(session, Event("start"))
+
+    @classmethod
+    def post(cls, session: GameSession, event: Event) -> None:
+        "Queue `event` for `session`, starting to drain its events if nothing else is."
+
+        if session.session_id not in cls.sessions:
+            return
+
+        session._inbox.append(event)
+
+        if session._draining is None or session._draining.done():
+            session._draining = create_task(cls._drain(session))
+
+    @classmethod
+    async def _drain(cls, session: GameSession) -> None:
+        while session._inbox:
+            event = session._inbox.popleft()
+            cls.dispatched += 1
+
+            for effect in session.engine.handle(event):
+                try:
+                    await session.perform(effect)
+
+                # The engine has already moved on, and nothing is waiting on the phase it moved to
+                except Exception:
+                    logger.exception(f"Session {session.session_id} failed to perform {effect!r}, so it's being aborted")
+
+                    await cls.abort(session)
+                    return
+
+            try:
+                await cls.checkpoint(session)
+            except Exception:
+                logger.exception(f"Failed to checkpoint session {session.session_id}")
+
+        if session.engine.is_over and cls.sessions.pop(session.session_id, None):
+            session.finish()
+
+    @classmethod
+    async def abort(cls, session: GameSession) -> None:
+        """
+        End a game that can't carry on, dropping its checkpoint so it isn't
+        resumed into the same state, and let its channel know.
+        """
+
+        cls.sessions.pop(session.session_id, None)
+        cls.snapshot_sizes.pop(session.session_id, None)
+        cls.aborted += 1
+
+        session._inbox.clear()
+
+        try:
+            async with cls.pool.acquire() as conn:
+                await conn.execute("DELETE FROM game_sessions WHERE session_id = ?", session.session_id)
+        except Exception:
+            logger.exception(f"Failed to remove the checkpoint of aborted session {session.session_id}")
+
+        try:
+            await session.channel.send("Something went wrong, so this game has had to end early. Sorry about that!")
+        except HTTPException:
+            pass
+
+        session.finish()
+
+    @classmethod
+    async def checkpoint(cls, session: GameSession) -> None:
+        "Save `session` to the database, or remove it if its game is over."
+
+        async with cls.pool.acquire() as conn:
+            if session.engine.is_over:
+                await conn.execute("DELETE FROM game_sessions WHERE session_id = ?", session.session_id)
+                cls.snapshot_sizes.pop(session.session_id, None)
+
+                return
+
+            state = dumps(session.snapshot(), separators = (",", ":"))
+
+            await conn.execute(
+                """
+                INSERT INTO game_sessions (session_id, kind, channel_id, state, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    state = excluded.state,
+                    updated_at = excluded.updated_at
+                """,
+                session.session_id, session.KIND, session.channel.id, state, int(time()) # type: ignore
+            )
+
+        cls.checkpoints += 1
+        cls.snapshot_sizes[session.session_id] = len(state)
+
+    @classmethod
+    async def load_checkpoints(cls, pool: MeteredPool) -> None:
+        """
+        Read every checkpointed game, ready to be resumed with `resume` once
+        the bot can see channels, and make sure new sessions don't reuse
+        their IDs.
+        """
+
+        cls.pool = pool
+
+        async with pool.acquire() as conn:
+            cls._unresumed = await conn.fetchall("SELECT session_id, kind, channel_id, state FROM game_sessions")
+
+        cls._ids = count(max((row["session_id"] for row in cls._unresumed), default = 0) + 1)
+
+    @classmethod
+    async def resume(cls, bot: Client) -> int:
+        "Resume every game loaded by `load_checkpoints`, and return how many were resumed."
+
+        resumed = 0
+
+        for row in cls._unresumed:
+            session_type = cls.kinds.get(row["kind"])
+            channel = bot.get_channel(row["channel_id"])
+
+            if session_type is None or channel is None:
+                logger.warning(f"Dropping game {row['session_id']} ({row['kind']}), as it can't be resumed.")
+
+                async with cls.pool.acquire() as conn:
+                    await conn.execute("DELETE FROM game_sessions WHERE session_id = ?", row["session_id"])
+
+                continue
+
+            try:
+                session = await session_type.restore(bot, row["session_id"], channel, loads(row["state"])) # type: ignore
+            except Exception:
+                logger.exception(f"Failed to resume game {row['session_id']} ({row['kind']})")
+                continue
+
+            cls.sessions[session.session_id] = session
+            cls.snapshot_sizes[session.session_id] = len(row["state"])
+            resumed += 1
+
+            # Anything the session queued for itself while reattaching
+            if session._inbox:
+                session._draining = create_task(cls._drain(session))
+
+        cls._unresumed = []
+
+        return resumed
+
+    @classmethod
+    def queued(cls) -> int:
+        "The number of events waiting to be handled across every session."
+
+        return sum(len(session._inbox) for session in cls.sessions.values())
+
+    @classmethod
+    def average_snapshot_size(cls) -> float:
+        "The average size of every session's latest checkpoint, in bytes."
+
+        sizes = cls.snapshot_sizes.values()
+
+        return sum(sizes) / len(sizes) if sizes else 0.0
+
+    @classmethod
+    def footprint(cls) -> int:
+        "Roughly how many bytes every game's engine takes up in memory."
+
+        return sum(session.engine.footprint() for session in cls.sessions.values())